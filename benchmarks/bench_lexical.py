@@ -0,0 +1,161 @@
+"""
+RAG Chatbot - BM25 / Hybrid Arama Benchmark'ı
+Saf vektör aramaya karşı BM25, hybrid (rank füzyonu) ve anahtar kelime hızlı
+yolunun gecikmesi (sorgu encode'u dahil) ve recall@k değeri
+
+Sorgular korpustaki parçalardan alınan ardışık kelimelerin aksansız, küçük
+harfli yazımıdır ("dusman nasil yenilir" gibi); doğru cevap sorgunun alındığı parçadır.
+
+Kullanım:
+    python benchmarks/bench_lexical.py --sizes 1000 10000 --queries 200
+    python benchmarks/bench_lexical.py --embedder hash --output lexical.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from run_benchmarks import synthetic_corpus, latency_summary  # noqa: E402
+
+
+def make_queries(chunks, n, min_words, max_words, seed=2):
+    """
+    Rastgele parçalardan `min_words`-`max_words` ardışık kelimelik, aksanları
+    katlanmış sorgular ve hedef parça indeksleri üretir
+    """
+    from textnorm import normalize_query
+
+    rng = np.random.default_rng(seed)
+    queries, targets = [], []
+    for target in rng.choice(len(chunks), size=n):
+        words = chunks[target]["text"].split()
+        size = min(int(rng.integers(min_words, max_words + 1)), len(words))
+        start = int(rng.integers(0, len(words) - size + 1))
+        queries.append(normalize_query(" ".join(words[start:start + size]), fold=True))
+        targets.append(str(target))
+    return queries, targets
+
+
+def run_mode(search, queries, targets, k):
+    """
+    Her sorgu için `search(query)` -> sıralı id listesi; gecikme ve recall@k
+    """
+    search(queries[0])  # ısınma
+    latencies, hits = [], 0
+    for query, target in zip(queries, targets):
+        start = time.perf_counter()
+        ids = search(query)
+        latencies.append(time.perf_counter() - start)
+        hits += target in ids[:k]
+    result = latency_summary(latencies)
+    result["recall"] = hits / len(queries)
+    return result
+
+
+def bench_size(embedder, chunks, query_sets, k, candidates):
+    """
+    Korpusu bir kez indeksler, her sorgu türü için dört arama yolunu ölçer
+    """
+    from config import HYBRID_VECTOR_WEIGHT
+    from context_builder import fuse_rankings
+    from lexical import BM25Index, is_keyword_query
+    from vector_store import NumpyVectorStore
+
+    ids = [str(i) for i in range(len(chunks))]
+    texts = [c["text"] for c in chunks]
+    collection = NumpyVectorStore()
+    collection.add(ids=ids, embeddings=np.asarray(embedder.encode(texts, batch_size=256)), documents=texts)
+
+    start = time.perf_counter()
+    index = BM25Index(ids, texts)
+    build_seconds = time.perf_counter() - start
+
+    def vector_ids(query, n):
+        emb = np.asarray(embedder.encode([query]))
+        return collection.query(query_embeddings=emb.tolist(), n_results=n, include=())["ids"][0]
+
+    def vector(query):
+        return vector_ids(query, k)
+
+    def lexical(query):
+        return index.search(query, k)["ids"]
+
+    def hybrid(query):
+        return fuse_rankings([
+            (HYBRID_VECTOR_WEIGHT, vector_ids(query, candidates)),
+            (1 - HYBRID_VECTOR_WEIGHT, index.search(query, candidates)["ids"]),
+        ])
+
+    def fast_path(query):
+        return lexical(query) if is_keyword_query(query, index) else hybrid(query)
+
+    results = {"bm25_build": {"seconds": build_seconds, "terms": len(index._postings)}}
+    for kind, (queries, targets) in query_sets.items():
+        section = results[kind] = {}
+        for name, search in (("vector", vector), ("bm25", lexical), ("hybrid", hybrid),
+                             ("hybrid_fast_path", fast_path)):
+            section[name] = run_mode(search, queries, targets, k)
+        section["hybrid_fast_path"]["fast_path_share"] = (
+            sum(is_keyword_query(q, index) for q in queries) / len(queries)
+        )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BM25 / hybrid / vektor arama gecikme ve recall benchmark'i")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000], help="Sentetik korpus boyutlari")
+    parser.add_argument("--queries", type=int, default=200, help="Sorgu turu basina sorgu sayisi")
+    parser.add_argument("--k", type=int, default=3, help="Recall@k")
+    parser.add_argument("--candidates", type=int, default=10, help="Hybrid modda her aramadan alinan aday")
+    parser.add_argument("--embedder", default="sentence-transformers", choices=["sentence-transformers", "hash"],
+                        help="hash: model indirmeyen deterministik embedder")
+    parser.add_argument("--corpus", default=os.path.join(ROOT, "sun_tzu.txt"), help="Kelime kaynagi")
+    parser.add_argument("--output", help="Sonuclarin yazilacagi JSON dosyasi")
+    args = parser.parse_args()
+
+    os.environ["EMBED_BACKEND"] = args.embedder
+
+    from config import EMBED_MODEL_NAME
+    from startup import load_embedder, warm_up
+
+    embedder = load_embedder()
+    warm_up(embedder)
+    print(f"Embedder: {EMBED_MODEL_NAME}, recall@{args.k}, {args.queries} sorgu/tur")
+
+    results = {}
+    for size in args.sizes:
+        chunks = synthetic_corpus(size, args.corpus)
+        # "ifade": 4-8 kelimelik soru benzeri; "anahtar": 1-3 kelime (hızlı yol adayı)
+        query_sets = {
+            "ifade": make_queries(chunks, args.queries, 4, 8),
+            "anahtar": make_queries(chunks, args.queries, 1, 3),
+        }
+        result = results[str(size)] = bench_size(embedder, chunks, query_sets, args.k, args.candidates)
+
+        print(f"\n{size:,} parca (BM25 indeksi {result['bm25_build']['seconds']:.2f} sn, "
+              f"{result['bm25_build']['terms']:,} terim)")
+        for kind in query_sets:
+            section = result[kind]
+            print(f"  {kind} sorgulari")
+            for name in ("vector", "bm25", "hybrid", "hybrid_fast_path"):
+                summary = section[name]
+                extra = (f"  hizli yol {summary['fast_path_share']:.0%}"
+                         if "fast_path_share" in summary else "")
+                print(f"    {name:<17} recall {summary['recall']:>6.1%}  p50 {summary['p50_ms']:>8.2f} ms  "
+                      f"p95 {summary['p95_ms']:>8.2f} ms{extra}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "results": results}, f, indent=2)
+        print(f"\nSonuclar yazildi: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+RAG Chatbot - LLM İstemcisi Dayanıklılık Benchmark'ı
+Gecikme ve hata enjekte eden yerel Gemini stub sunucusuna karşı düz REST
+istemcisi, tekrar denemeli istemci ve hedging'li istemcinin başarı oranı ve p50/p95/p99 gecikmesi
+
+Kullanım:
+    python benchmarks/bench_llm_client.py --requests 200 --slow-rate 0.05 --error-rate 0.05
+    python benchmarks/bench_llm_client.py --hedge-after 0.2 --output llm.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from llm_client import GeminiRestModel, ResilientModel  # noqa: E402
+from run_benchmarks import latency_summary  # noqa: E402
+from stubs import StubGeminiServer  # noqa: E402
+
+
+def run_client(model, n):
+    latencies, failures = [], 0
+    for i in range(n):
+        start = time.perf_counter()
+        try:
+            model.generate_content(f"Soru: deneme {i}")
+        except Exception:
+            failures += 1
+        latencies.append(time.perf_counter() - start)
+    result = latency_summary(latencies)
+    result["success_rate"] = 1 - failures / n
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub sunucuya karsi LLM istemcisi dayaniklilik benchmark'i")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--delay", type=float, default=0.05, help="Normal istek suresi (sn)")
+    parser.add_argument("--slow-rate", type=float, default=0.05, help="Yavas isteklerin orani")
+    parser.add_argument("--slow-delay", type=float, default=1.0, help="Yavas istek suresi (sn)")
+    parser.add_argument("--error-rate", type=float, default=0.05, help="503 donen isteklerin orani")
+    parser.add_argument("--hedge-after", type=float, default=0.2, help="Hedging esigi (sn)")
+    parser.add_argument("--output", help="Sonuclarin yazilacagi JSON dosyasi")
+    args = parser.parse_args()
+
+    clients = (
+        ("duz", lambda url: GeminiRestModel("stub", "stub-key", base_url=url)),
+        ("tekrar", lambda url: ResilientModel(GeminiRestModel("stub", "stub-key", base_url=url),
+                                              backoff=0.05, rate_limit=0, hedge_after=0)),
+        ("tekrar+hedging", lambda url: ResilientModel(GeminiRestModel("stub", "stub-key", base_url=url),
+                                                      backoff=0.05, rate_limit=0,
+                                                      hedge_after=args.hedge_after)),
+    )
+    print(f"{args.requests} istek, gecikme {args.delay * 1000:.0f} ms, yavas %{args.slow_rate * 100:.0f} "
+          f"({args.slow_delay:.1f} sn), hata %{args.error_rate * 100:.0f}\n")
+
+    results = {}
+    for name, make in clients:
+        # Her istemci aynı tohumla aynı gecikme/hata dizisini görür
+        with StubGeminiServer(delay=args.delay, slow_rate=args.slow_rate, slow_delay=args.slow_delay,
+                              error_rate=args.error_rate) as server:
+            # Tekrar deneme mesajları ölçüm çıktısını kirletmesin
+            with contextlib.redirect_stdout(io.StringIO()):
+                result = run_client(make(server.url), args.requests)
+            result["server_requests"] = server.requests
+        results[name] = result
+        print(f"  {name:<15} basari {result['success_rate']:>6.1%}  p50 {result['p50_ms']:>8.1f} ms  "
+              f"p95 {result['p95_ms']:>8.1f} ms  p99 {result['p99_ms']:>8.1f} ms  "
+              f"({result['server_requests']} sunucu istegi)")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "results": results}, f, indent=2)
+        print(f"\nSonuclar yazildi: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+RAG Chatbot - ONNX Embedding Benchmark'ı
+PyTorch (sentence-transformers), ONNX fp32 ve ONNX int8 arka uçlarının yükleme
+süresi, tek sorgu gecikmesi, batch throughput'u ve PyTorch vektörleriyle kosinüs uyumu
+
+Uyum eşiğin altında kalırsa çıkış kodu 1 olur (CI'da parity kontrolü olarak kullanılabilir).
+
+Kullanım:
+    python benchmarks/bench_onnx_embed.py --docs 2000 --queries 200
+    python benchmarks/bench_onnx_embed.py --min-cosine-int8 0.98 --output onnx.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from config import EMBED_MODEL_NAME, ENCODE_BATCH_SIZE  # noqa: E402
+from onnx_embed import OnnxEmbedder, cosine_agreement, export_model, quantize_model  # noqa: E402
+from run_benchmarks import latency_summary, synthetic_queries  # noqa: E402
+from bench_parallel_embed import synthetic_texts  # noqa: E402
+
+
+def bench_backend(load, texts, queries, batch_size):
+    start = time.perf_counter()
+    embedder = load()
+    load_seconds = time.perf_counter() - start
+
+    embedder.encode(queries[:1], show_progress_bar=False)  # ısınma
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        embedder.encode(query, show_progress_bar=False)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    embeddings = np.asarray(embedder.encode(texts, batch_size=batch_size, show_progress_bar=False),
+                            dtype=np.float32)
+    seconds = time.perf_counter() - start
+
+    result = {"load_seconds": load_seconds, "docs_per_s": len(texts) / seconds}
+    result.update(latency_summary(latencies))
+    return embeddings, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PyTorch / ONNX / ONNX int8 embedder karsilastirmasi")
+    parser.add_argument("--model", default=EMBED_MODEL_NAME)
+    parser.add_argument("--docs", type=int, default=2000, help="Throughput icin metin sayisi")
+    parser.add_argument("--queries", type=int, default=200, help="Tek sorgu gecikmesi icin sorgu sayisi")
+    parser.add_argument("--batch-size", type=int, default=ENCODE_BATCH_SIZE)
+    parser.add_argument("--corpus", default=os.path.join(ROOT, "sun_tzu.txt"), help="Kelime kaynagi")
+    parser.add_argument("--min-cosine-fp32", type=float, default=0.9999, help="fp32 icin en dusuk kosinus")
+    parser.add_argument("--min-cosine-int8", type=float, default=0.98, help="int8 icin en dusuk kosinus")
+    parser.add_argument("--output", help="Sonuclarin yazilacagi JSON dosyasi")
+    args = parser.parse_args()
+
+    from sentence_transformers import SentenceTransformer
+
+    texts = synthetic_texts(args.docs, args.corpus)
+    queries = synthetic_queries(args.queries, args.corpus)
+
+    # Aktarım ve kuantizasyon tek seferlik maliyettir, yükleme süresine katılmaz
+    start = time.perf_counter()
+    quantize_model(export_model(args.model))
+    print(f"ONNX aktarimi/kuantizasyonu: {time.perf_counter() - start:.1f} sn")
+
+    backends = (
+        ("pytorch", lambda: SentenceTransformer(args.model, device="cpu"), None),
+        ("onnx_fp32", lambda: OnnxEmbedder(args.model, quantize=False), args.min_cosine_fp32),
+        ("onnx_int8", lambda: OnnxEmbedder(args.model, quantize=True), args.min_cosine_int8),
+    )
+    results, reference, failed = {}, None, False
+    print(f"Model: {args.model}, {len(texts)} metin, {len(queries)} sorgu\n")
+    for name, load, min_cosine in backends:
+        embeddings, result = bench_backend(load, texts, queries, args.batch_size)
+        if reference is None:
+            reference = embeddings
+        else:
+            agreement = cosine_agreement(reference, embeddings)
+            result["cosine_mean"] = float(agreement.mean())
+            result["cosine_min"] = float(agreement.min())
+            result["parity_ok"] = result["cosine_min"] >= min_cosine
+            failed |= not result["parity_ok"]
+        results[name] = result
+
+        parity = ""
+        if "cosine_min" in result:
+            parity = (f"  kosinus ort {result['cosine_mean']:.5f} min {result['cosine_min']:.5f}"
+                      f"{'' if result['parity_ok'] else '  <-- esik alti'}")
+        print(f"  {name:<10} yukleme {result['load_seconds']:>6.2f} sn  sorgu p50 {result['p50_ms']:>7.2f} ms  "
+              f"p95 {result['p95_ms']:>7.2f} ms  {result['docs_per_s']:>8.1f} metin/sn{parity}")
+
+    base = results["pytorch"]
+    for name in ("onnx_fp32", "onnx_int8"):
+        print(f"  {name}: sorgu {base['p50_ms'] / results[name]['p50_ms']:.2f}x, "
+              f"throughput {results[name]['docs_per_s'] / base['docs_per_s']:.2f}x")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "results": results}, f, indent=2)
+        print(f"\nSonuclar yazildi: {args.output}")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+RAG Chatbot - Çok Süreçli Embedding Benchmark'ı
+Süreç sayısı 1'den N'e çıkarken encode throughput'unun ölçeklenmesi ve
+sonuçların tek süreçli encode ile aynı sırada/değerde olduğunun kontrolü
+
+Kullanım:
+    python benchmarks/bench_parallel_embed.py --workers 1 2 4 8 --docs 20000
+    python benchmarks/bench_parallel_embed.py --corpus sun_tzu.txt --output sonuc.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from config import EMBED_MODEL_NAME, ENCODE_BATCH_SIZE
+from parallel_embed import MultiProcessEmbedder
+from startup import load_embedder
+
+
+def synthetic_texts(n, corpus_path, seed=0):
+    """
+    Korpustaki kelimelerden parça uzunluğuna yakın (40-80 kelime) rastgele metinler üretir
+    """
+    with open(corpus_path, "r", encoding="utf-8") as f:
+        words = f.read().split()
+    rng = np.random.default_rng(seed)
+    return [
+        " ".join(rng.choice(words, size=int(rng.integers(40, 80))))
+        for _ in range(n)
+    ]
+
+
+def bench_workers(embedder, texts, workers, batch_size, chunk_size, reference):
+    wrapped = MultiProcessEmbedder(embedder, workers=workers, chunk_size=chunk_size)
+    try:
+        start = time.perf_counter()
+        if workers > 1:
+            wrapped._ensure_pool()
+        pool_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        embeddings = wrapped.encode(texts, batch_size=batch_size, show_progress_bar=False)
+        seconds = time.perf_counter() - start
+    finally:
+        wrapped.close()
+
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    return embeddings, {
+        "workers": workers,
+        "docs": len(texts),
+        "pool_start_seconds": pool_seconds,
+        "seconds": seconds,
+        "docs_per_s": len(texts) / seconds,
+        # Sıra korunmuyorsa fark embedding'lerin kendisi kadar büyük olur
+        "max_abs_diff": float(np.abs(embeddings - reference).max()) if reference is not None else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cok surecli encode olceklenmesini olcer")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    parser.add_argument("--docs", type=int, default=10_000)
+    parser.add_argument("--corpus", default="sun_tzu.txt", help="Kelime kaynagi olarak kullanilan metin")
+    parser.add_argument("--model", default=EMBED_MODEL_NAME)
+    parser.add_argument("--batch-size", type=int, default=ENCODE_BATCH_SIZE)
+    parser.add_argument("--chunk-size", type=int, default=0, help="Surece gonderilen metin (0: otomatik)")
+    parser.add_argument("--output", help="Sonuclarin yazilacagi JSON dosyasi")
+    args = parser.parse_args()
+
+    texts = synthetic_texts(args.docs, args.corpus)
+    embedder = load_embedder(args.model)
+    embedder.encode(texts[:args.batch_size], batch_size=args.batch_size, show_progress_bar=False)
+    print(f"{len(texts):,} metin, model {args.model}, {os.cpu_count()} CPU")
+
+    results = []
+    reference = None
+    print(f"{'surec':>6} {'havuz sn':>9} {'sn':>8} {'metin/sn':>10} {'hizlanma':>9} {'verim':>7} {'max fark':>9}")
+    for workers in sorted(set(args.workers)):
+        embeddings, result = bench_workers(
+            embedder, texts, workers, args.batch_size, args.chunk_size, reference
+        )
+        if reference is None:
+            # En az süreçli çalıştırma hem hız hem sıra/değer kontrolü için referanstır
+            reference = embeddings
+            base, base_workers = result["docs_per_s"], workers
+        result["speedup"] = result["docs_per_s"] / base
+        result["efficiency"] = result["speedup"] * base_workers / workers
+        results.append(result)
+        print(f"{workers:>6} {result['pool_start_seconds']:>9.2f} {result['seconds']:>8.2f} "
+              f"{result['docs_per_s']:>10.1f} {result['speedup']:>8.2f}x {result['efficiency']:>7.0%} "
+              f"{result['max_abs_diff']:>9.1e}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"model": args.model, "cpus": os.cpu_count(), "results": results}, f, indent=2)
+        print(f"Sonuclar yazildi: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
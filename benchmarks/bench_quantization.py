@@ -0,0 +1,116 @@
+"""
+RAG Chatbot - Embedding Kuantizasyonu Benchmark'ı
+float32 / float16 / int8 saklamanın bellek tasarrufu ve float32 birebir aramaya
+göre recall@k karşılaştırması (yeniden puanlamalı ve puanlamasız)
+
+Kullanım:
+    python benchmarks/bench_quantization.py --size 100000
+    python benchmarks/bench_quantization.py --embeddings vektorler.npy --holdout 500
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from vector_store import NumpyVectorStore
+from bench_vector_store import synthetic_vectors, percentile_ms
+
+CONFIGS = [
+    ("float32", False),
+    ("float16", False),
+    ("float16", True),
+    ("int8", False),
+    ("int8", True),
+]
+
+
+def load_vectors(args):
+    """
+    Korpus ve ayrı tutulan (held-out) sorgu vektörlerini döndürür
+    """
+    if args.embeddings:
+        vectors = np.load(args.embeddings).astype(np.float32)
+        rng = np.random.default_rng(0)
+        order = rng.permutation(len(vectors))
+        holdout = order[:args.holdout]
+        return vectors[order[args.holdout:]], vectors[holdout]
+    return synthetic_vectors(args.size, args.dim, seed=0), synthetic_vectors(args.holdout, args.dim, seed=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Kuantize embedding saklamayi karsilastirir")
+    parser.add_argument("--size", type=int, default=100_000, help="Sentetik korpus boyutu")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--embeddings", help="Gercek embedding'lerin .npy dosyasi (verilirse sentetik yerine)")
+    parser.add_argument("--holdout", type=int, default=500, help="Sorgu olarak ayrilan vektor sayisi")
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--space", default="l2", choices=["l2", "ip", "cosine"])
+    parser.add_argument("--rescore-factor", type=int, default=4)
+    parser.add_argument("--output", help="Sonuclarin yazilacagi JSON dosyasi")
+    args = parser.parse_args()
+
+    corpus, queries = load_vectors(args)
+    ids = [str(i) for i in range(len(corpus))]
+    print(f"{len(corpus):,} vektor, {len(queries)} held-out sorgu, k={args.k}")
+
+    results = []
+    exact_ids = None
+    baseline_memory = None
+    print(f"{'saklama':<18} {'bellek MB':>10} {'tasarruf':>9} {'recall@k':>9} {'p50 ms':>8} {'p95 ms':>8}")
+    for dtype, rescore in CONFIGS:
+        workdir = tempfile.mkdtemp(prefix="bench_q_")
+        try:
+            store = NumpyVectorStore(space=args.space, path=workdir, dtype=dtype,
+                                     rescore=rescore, rescore_factor=args.rescore_factor)
+            store.add(ids=ids, embeddings=corpus)
+            # Diskten yeniden açınca float32 kopyalar memory-map ile açılır
+            store.persist()
+            store = NumpyVectorStore(space=args.space, path=workdir, dtype=dtype,
+                                     rescore=rescore, rescore_factor=args.rescore_factor)
+
+            latencies = []
+            found = []
+            for query in queries:
+                t0 = time.perf_counter()
+                result = store.query(query_embeddings=[query], n_results=args.k, include=[])
+                latencies.append(time.perf_counter() - t0)
+                found.append(result["ids"][0])
+
+            if exact_ids is None:
+                exact_ids = found
+                baseline_memory = store.memory_bytes()
+            recall = np.mean([len(set(f) & set(e)) / len(e) for f, e in zip(found, exact_ids)])
+            memory = store.memory_bytes()
+
+            row = {
+                "dtype": dtype,
+                "rescore": rescore,
+                "memory_mb": memory / (1024 * 1024),
+                "memory_saved": 1 - memory / baseline_memory,
+                "recall_at_k": float(recall),
+                "p50_ms": percentile_ms(latencies, 50),
+                "p95_ms": percentile_ms(latencies, 95),
+            }
+            results.append(row)
+            label = f"{dtype}{' + rescore' if rescore else ''}"
+            print(f"{label:<18} {row['memory_mb']:>10.1f} {row['memory_saved']:>8.0%} "
+                  f"{row['recall_at_k']:>9.3f} {row['p50_ms']:>8.2f} {row['p95_ms']:>8.2f}")
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nSonuclar kaydedildi: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
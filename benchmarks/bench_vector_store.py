@@ -0,0 +1,154 @@
+"""
+RAG Chatbot - Vector Store Benchmark'ı
+Chroma, NumPy ve FAISS (flat / IVF / HNSW) arka uçlarının sorgu gecikmesi,
+bellek kullanımı ve birebir aramaya göre recall@k karşılaştırması
+
+Kullanım:
+    python benchmarks/bench_vector_store.py --sizes 10000 100000 1000000
+    python benchmarks/bench_vector_store.py --backends numpy faiss-hnsw --output sonuc.json
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from vector_store import NumpyVectorStore, FaissVectorStore
+
+BACKENDS = ["numpy", "faiss-flat", "faiss-ivf", "faiss-hnsw", "chroma"]
+
+
+def synthetic_vectors(n, dim, seed):
+    """
+    Kümelenmiş, MiniLM embedding'lerine benzer birim vektörler üretir
+    """
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(n // 100, 1), dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, len(centers), n)] + 0.5 * rng.standard_normal((n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def make_store(backend, space, workdir):
+    if backend == "numpy":
+        return NumpyVectorStore(space=space)
+    if backend.startswith("faiss-"):
+        return FaissVectorStore(space=space, index_type=backend.split("-", 1)[1])
+    if backend == "chroma":
+        import chromadb
+
+        client = chromadb.PersistentClient(path=os.path.join(workdir, "chroma"))
+        return client.create_collection(name="bench", metadata={"hnsw:space": space})
+    raise ValueError(backend)
+
+
+def directory_size(path):
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, files in os.walk(path) for name in files
+    )
+
+
+def percentile_ms(samples, q):
+    return float(np.percentile(samples, q) * 1000)
+
+
+def bench_backend(backend, vectors, queries, exact_ids, k, space, chunk_size):
+    workdir = tempfile.mkdtemp(prefix="bench_vs_")
+    try:
+        store = make_store(backend, space, workdir)
+        ids = [str(i) for i in range(len(vectors))]
+
+        start = time.perf_counter()
+        for i in range(0, len(vectors), chunk_size):
+            store.add(ids=ids[i:i + chunk_size], embeddings=vectors[i:i + chunk_size])
+        # FAISS index'i ilk sorguda kurulur; kurulum süresini ayrıca ölç
+        if isinstance(store, FaissVectorStore):
+            store.build_index()
+        build_seconds = time.perf_counter() - start
+
+        # Isınma
+        store.query(query_embeddings=queries[:1], n_results=k)
+
+        latencies = []
+        found = []
+        for query in queries:
+            t0 = time.perf_counter()
+            result = store.query(query_embeddings=[query], n_results=k, include=["distances"])
+            latencies.append(time.perf_counter() - t0)
+            found.append(result["ids"][0])
+
+        t0 = time.perf_counter()
+        store.query(query_embeddings=queries, n_results=k, include=["distances"])
+        batch_seconds = time.perf_counter() - t0
+
+        recall = np.mean([
+            len(set(f) & set(e)) / len(e) for f, e in zip(found, exact_ids)
+        ])
+        memory = directory_size(workdir) if backend == "chroma" else store.memory_bytes()
+
+        return {
+            "backend": backend,
+            "build_seconds": build_seconds,
+            "p50_ms": percentile_ms(latencies, 50),
+            "p95_ms": percentile_ms(latencies, 95),
+            "p99_ms": percentile_ms(latencies, 99),
+            "batch_qps": len(queries) / batch_seconds,
+            "recall_at_k": float(recall),
+            "memory_mb": memory / (1024 * 1024),
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vector store arka uclarini karsilastirir")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--backends", nargs="+", default=BACKENDS, choices=BACKENDS)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--space", default="l2", choices=["l2", "ip", "cosine"])
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--output", help="Sonuclarin yazilacagi JSON dosyasi")
+    args = parser.parse_args()
+
+    results = []
+    for n in args.sizes:
+        print(f"\n{n:,} vektor, {args.dim} boyut, {args.queries} sorgu, k={args.k}")
+        vectors = synthetic_vectors(n, args.dim, seed=0)
+        queries = synthetic_vectors(args.queries, args.dim, seed=1)
+
+        reference = NumpyVectorStore(space=args.space)
+        reference.add(ids=[str(i) for i in range(n)], embeddings=vectors)
+        exact_ids = reference.query(query_embeddings=queries, n_results=args.k, include=[])["ids"]
+        del reference
+
+        print(f"{'arka uc':<12} {'kurulum sn':>10} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+              f"{'batch qps':>10} {'recall':>7} {'bellek MB':>10}")
+        for backend in args.backends:
+            try:
+                row = bench_backend(backend, vectors, queries, exact_ids, args.k, args.space, args.chunk_size)
+            except ImportError as e:
+                print(f"{backend:<12} atlandi ({e})")
+                continue
+            row["n"] = n
+            results.append(row)
+            print(f"{backend:<12} {row['build_seconds']:>10.2f} {row['p50_ms']:>8.2f} {row['p95_ms']:>8.2f} "
+                  f"{row['p99_ms']:>8.2f} {row['batch_qps']:>10.0f} {row['recall_at_k']:>7.3f} "
+                  f"{row['memory_mb']:>10.1f}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nSonuclar kaydedildi: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""
+RAG Chatbot - Benchmark Takımı
+Sentetik korpuslarda ingestion throughput'u, sorgu embedding gecikmesi,
+vector arama gecikmesi (p50/p95/p99) ve deterministik stub LLM ile uçtan uca
+get_response gecikmesi; sonuçlar commit'ler arası karşılaştırma için JSON'a yazılır
+
+Kullanım:
+    python benchmarks/run_benchmarks.py --sizes 1000 10000 --output bench.json
+    python benchmarks/run_benchmarks.py --embedder hash --compare bench.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+
+def synthetic_corpus(n, corpus_path, seed=0):
+    """
+    Korpustaki kelimelerden 13 bölüme dağılmış, parça uzunluğunda (40-80 kelime) metinler üretir
+    """
+    with open(corpus_path, "r", encoding="utf-8") as f:
+        words = f.read().split()
+    rng = np.random.default_rng(seed)
+    return [
+        {
+            "text": " ".join(rng.choice(words, size=int(rng.integers(40, 80)))),
+            "metadata": {"chapter": i % 13 + 1, "chapter_title": "", "source": "synthetic", "chunk": i},
+        }
+        for i in range(n)
+    ]
+
+
+def synthetic_queries(n, corpus_path, seed=1):
+    """
+    Birbirinden farklı kısa (4-10 kelime) sorular üretir; cache isabeti olmaz
+    """
+    with open(corpus_path, "r", encoding="utf-8") as f:
+        words = f.read().split()
+    rng = np.random.default_rng(seed)
+    return [
+        " ".join(rng.choice(words, size=int(rng.integers(4, 10)))) + f" ({i})?"
+        for i in range(n)
+    ]
+
+
+def latency_summary(samples):
+    samples = np.asarray(samples) * 1000
+    return {
+        "mean_ms": float(samples.mean()),
+        "p50_ms": float(np.percentile(samples, 50)),
+        "p95_ms": float(np.percentile(samples, 95)),
+        "p99_ms": float(np.percentile(samples, 99)),
+    }
+
+
+def open_store(backend, workdir):
+    from vector_store import NumpyVectorStore, FaissVectorStore
+
+    if backend == "numpy":
+        return NumpyVectorStore()
+    if backend.startswith("faiss-"):
+        return FaissVectorStore(index_type=backend.split("-", 1)[1])
+    if backend == "chroma":
+        import chromadb
+
+        from config import VECTOR_SPACE
+
+        client = chromadb.PersistentClient(path=os.path.join(workdir, "chroma"))
+        return client.create_collection(name="bench", metadata={"hnsw:space": VECTOR_SPACE})
+    raise ValueError(backend)
+
+
+def bench_ingestion(embedder, chunks, backend, workdir):
+    from ingest import sync_collection
+
+    collection = open_store(backend, workdir)
+    stats = sync_collection(collection, embedder, chunks,
+                            manifest_path=os.path.join(workdir, "manifest.json"))
+    build_index = getattr(collection, "build_index", None)
+    if callable(build_index):
+        build_index()
+    return collection, {
+        "docs": stats["docs"],
+        "seconds": stats["seconds"],
+        "docs_per_s": stats["docs_per_s"],
+        "mb_per_s": stats["mb_per_s"],
+        "encode_seconds": stats["encode_seconds"],
+        "write_seconds": stats["write_seconds"],
+    }
+
+
+def bench_query_embedding(embedder, queries):
+    from query_cache import encode_query
+
+    encode_query(embedder, queries[0], cache=None)  # ısınma
+    latencies = []
+    vectors = []
+    for query in queries:
+        start = time.perf_counter()
+        vectors.append(encode_query(embedder, query, cache=None))
+        latencies.append(time.perf_counter() - start)
+    return np.array(vectors), latency_summary(latencies)
+
+
+def bench_search(collection, query_vectors, k):
+    collection.query(query_embeddings=query_vectors[:1].tolist(), n_results=k)  # ısınma
+    latencies = []
+    for vector in query_vectors:
+        start = time.perf_counter()
+        collection.query(query_embeddings=[vector.tolist()], n_results=k)
+        latencies.append(time.perf_counter() - start)
+    return latency_summary(latencies)
+
+
+def bench_end_to_end(embedder, collection, queries, llm_delay):
+    from rag_pipeline import get_response
+    from stubs import StubLLM
+
+    model = StubLLM(delay=llm_delay)
+    latencies = []
+    # get_response her adımı yazdırır; ölçümü kirletmesin
+    with contextlib.redirect_stdout(io.StringIO()):
+        for query in queries:
+            start = time.perf_counter()
+            get_response(model, embedder, collection, query)
+            latencies.append(time.perf_counter() - start)
+    return latency_summary(latencies)
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def flatten(results):
+    """
+    {"1000": {"ingestion": {"docs_per_s": ...}}} -> {"1000.ingestion.docs_per_s": ...}
+    """
+    flat = {}
+    for size, sections in results.items():
+        for section, metrics in sections.items():
+            for name, value in metrics.items():
+                flat[f"{size}.{section}.{name}"] = value
+    return flat
+
+
+def compare(results, baseline_path, threshold=0.10):
+    """
+    Önceki bir çalıştırmanın JSON'uyla metrik metrik yüzde değişimi yazdırır
+    """
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    old, new = flatten(baseline["results"]), flatten(results)
+    print(f"\nKarsilastirma: {baseline.get('commit')} -> {git_commit()}")
+    for key in sorted(set(old) & set(new)):
+        if not key.endswith(("_ms", "_per_s")) or not old[key]:
+            continue
+        change = (new[key] - old[key]) / old[key]
+        # Gecikmede artış, throughput'ta düşüş gerilemedir
+        worse = change > 0 if key.endswith("_ms") else change < 0
+        flag = "  <-- gerileme" if worse and abs(change) > threshold else ""
+        print(f"  {key:<45} {old[key]:>12.2f} -> {new[key]:>12.2f} ({change:+.1%}){flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingestion, arama ve uctan uca gecikme benchmark'i")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000], help="Sentetik korpus boyutlari")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--backend", default="numpy", choices=["numpy", "faiss-flat", "faiss-ivf", "faiss-hnsw", "chroma"])
+    parser.add_argument("--embedder", default="sentence-transformers", choices=["sentence-transformers", "hash"],
+                        help="hash: model indirmeyen deterministik embedder")
+    parser.add_argument("--llm-delay", type=float, default=0.0, help="Stub LLM cagri suresi (sn)")
+    parser.add_argument("--corpus", default=os.path.join(ROOT, "sun_tzu.txt"), help="Kelime kaynagi")
+    parser.add_argument("--output", help="Sonuclarin yazilacagi JSON dosyasi")
+    parser.add_argument("--compare", help="Karsilastirilacak onceki JSON sonucu")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Gerileme sayilan degisim orani")
+    args = parser.parse_args()
+
+    # Ayarlar config import edilmeden önce belirlenmeli: cevap/embedding cache'leri
+    # ölçümü bozmasın, sorgu cache'i diske yazılmasın
+    os.environ["EMBED_BACKEND"] = args.embedder
+    os.environ["ANSWER_CACHE_ENABLED"] = "0"
+    os.environ.pop("QUERY_CACHE_PATH", None)
+
+    from config import EMBED_MODEL_NAME, N_RESULTS
+    from startup import load_embedder, warm_up
+
+    embedder = load_embedder()
+    warm_up(embedder)
+    queries = synthetic_queries(args.queries, args.corpus)
+    print(f"Embedder: {EMBED_MODEL_NAME}, store: {args.backend}, {len(queries)} sorgu, k={N_RESULTS}")
+
+    results = {}
+    for size in args.sizes:
+        workdir = tempfile.mkdtemp(prefix="bench_run_")
+        try:
+            chunks = synthetic_corpus(size, args.corpus)
+            collection, ingestion = bench_ingestion(embedder, chunks, args.backend, workdir)
+            query_vectors, query_embedding = bench_query_embedding(embedder, queries)
+            search = bench_search(collection, query_vectors, N_RESULTS)
+            end_to_end = bench_end_to_end(embedder, collection, queries, args.llm_delay)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+        results[str(size)] = {
+            "ingestion": ingestion,
+            "query_embedding": query_embedding,
+            "search": search,
+            "end_to_end": end_to_end,
+        }
+        print(f"\n{size:,} parca")
+        print(f"  ingestion       {ingestion['docs_per_s']:>10.1f} parca/sn  {ingestion['mb_per_s']:.2f} MB/sn")
+        for name, summary in (("sorgu embedding", query_embedding), ("arama", search), ("uctan uca", end_to_end)):
+            print(f"  {name:<15} p50 {summary['p50_ms']:>8.2f} ms  p95 {summary['p95_ms']:>8.2f} ms  "
+                  f"p99 {summary['p99_ms']:>8.2f} ms")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({
+                "commit": git_commit(),
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(),
+                "cpus": os.cpu_count(),
+                "config": vars(args),
+                "results": results,
+            }, f, indent=2)
+        print(f"\nSonuclar yazildi: {args.output}")
+
+    if args.compare:
+        compare(results, args.compare, args.threshold)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+RAG Chatbot - Semantik Cevap Cache'i
+Daha önce cevaplanmış sorulara çok benzeyen sorularda Gemini çağrısını atlama
+"""
+
+import os
+import threading
+import time
+
+import numpy as np
+
+from config import (
+    MANIFEST_PATH, ANSWER_CACHE_ENABLED, ANSWER_CACHE_THRESHOLD, ANSWER_CACHE_TTL, ANSWER_CACHE_SIZE
+)
+from ingest import load_manifest
+from textnorm import normalize_query
+
+
+class SemanticAnswerCache:
+    """
+    Sorgu embedding'ine göre anahtarlanan cevap cache'i.
+
+    Önce aksanları katlanmış sorgu metniyle birebir eşleşme aranır, sonra
+    kosinüs benzerliği `threshold` üzerindeki en yakın kayıt döndürülür.
+    Kayıtlar `ttl` saniye sonra geçersiz olur, `max_size` aşılınca en uzun
+    süredir kullanılmayan kayıt atılır. Manifest'teki koleksiyon sürümü
+    değiştiğinde (yeniden indeksleme) cache tamamen temizlenir.
+    """
+
+    def __init__(self, threshold=ANSWER_CACHE_THRESHOLD, ttl=ANSWER_CACHE_TTL,
+                 max_size=ANSWER_CACHE_SIZE, manifest_path=MANIFEST_PATH):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_size = max_size
+        self.manifest_path = manifest_path
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._entries = []
+        self._matrix = None
+        self._lock = threading.Lock()
+        self._version = None
+        self._manifest_mtime = None
+
+    def _check_version(self):
+        """
+        Manifest değiştiyse koleksiyon sürümünü yeniden okur, sürüm farklıysa cache'i boşaltır
+        """
+        try:
+            mtime = os.stat(self.manifest_path).st_mtime
+        except OSError:
+            mtime = None
+        if mtime == self._manifest_mtime:
+            return
+        self._manifest_mtime = mtime
+        version = load_manifest(self.manifest_path).get("version")
+        if version != self._version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries = []
+            self._matrix = None
+            self._version = version
+
+    def _prune(self, now):
+        alive = [e for e in self._entries if now - e["created"] < self.ttl]
+        if len(alive) != len(self._entries):
+            self._entries = alive
+            self._matrix = None
+
+    def lookup(self, query, query_emb):
+        """
+        Eşleşen kaydı (answer, context) olarak döndürür, yoksa None
+        """
+        key = normalize_query(query, fold=True)
+        vector = _unit(query_emb)
+        now = time.time()
+        with self._lock:
+            self._check_version()
+            self._prune(now)
+
+            match = next((e for e in self._entries if e["key"] == key), None)
+            if match is None and self._entries:
+                if self._matrix is None:
+                    self._matrix = np.stack([e["vector"] for e in self._entries])
+                scores = self._matrix @ vector
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    match = self._entries[best]
+
+            if match is None:
+                self.misses += 1
+                return None
+            match["last_used"] = now
+            self.hits += 1
+            return match["answer"], match["context"]
+
+    def store(self, query, query_emb, answer, context):
+        now = time.time()
+        with self._lock:
+            self._check_version()
+            self._entries.append({
+                "key": normalize_query(query, fold=True),
+                "vector": _unit(query_emb),
+                "answer": answer,
+                "context": context,
+                "created": now,
+                "last_used": now,
+            })
+            if len(self._entries) > self.max_size:
+                self._entries.remove(min(self._entries, key=lambda e: e["last_used"]))
+            self._matrix = None
+
+    def invalidate(self):
+        with self._lock:
+            self._entries = []
+            self._matrix = None
+            self.invalidations += 1
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+def _unit(vector):
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+
+# Süreç genelinde paylaşılan varsayılan cache (ANSWER_CACHE_ENABLED=0 ise None)
+default_cache = SemanticAnswerCache() if ANSWER_CACHE_ENABLED else None
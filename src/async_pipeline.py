@@ -0,0 +1,101 @@
+"""
+RAG Chatbot - Async RAG Pipeline
+Birden fazla sorguyu eşzamanlı işleme: encode ve Chroma işleri thread pool'da,
+Gemini çağrıları async client ile
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from config import ASYNC_CONCURRENCY, ASYNC_WORKERS
+from query_cache import encode_query
+from answer_cache import default_cache as answer_cache
+from prompt import build_prompt
+from context_builder import retrieve_context
+from lexical import use_lexical_fast_path
+from chunker import chapter_filter
+from metrics import Trace, count_error
+
+
+async def _generate(model, prompt, executor):
+    """
+    Model async API'yi destekliyorsa onu, yoksa senkron çağrıyı thread pool'da kullanır
+    """
+    if hasattr(model, "generate_content_async"):
+        return await model.generate_content_async(prompt)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, model.generate_content, prompt)
+
+
+async def aget_response(model, embedder, collection, query, executor=None, chapter=None,
+                        trace=None):
+    """
+    get_response'un async karşılığı; (cevap, bağlam) döndürür
+    """
+    loop = asyncio.get_running_loop()
+    trace = Trace() if trace is None else trace
+
+    query_emb = None
+    if not use_lexical_fast_path(collection, query):
+        with trace.span("encode"):
+            query_emb = await loop.run_in_executor(executor, encode_query, embedder, query)
+
+    use_cache = answer_cache is not None and chapter is None and query_emb is not None
+    if use_cache:
+        cached = answer_cache.lookup(query, query_emb)
+        if cached is not None:
+            trace["cached"] = True
+            return cached
+
+    if query_emb is not None:
+        query_emb = query_emb.tolist()
+    with trace.span("search"):
+        built = await loop.run_in_executor(
+            executor,
+            partial(retrieve_context, collection, query_emb, getattr(embedder, "tokenizer", None),
+                    where=chapter_filter(chapter), query=query),
+        )
+    context = built["context"]
+    trace["context_tokens"] = built["tokens"]
+    trace["tokens_saved"] = built["tokens_saved"]
+    with trace.span("prompt"):
+        prompt = build_prompt(context, query)
+
+    try:
+        with trace.span("generation"):
+            response = await _generate(model, prompt, executor)
+    except Exception as e:
+        count_error("llm")
+        print(f"Gemini API hatasi: {e}")
+        return "Uzgunum, bir hata olustu. Lutfen tekrar deneyin.", context
+
+    if use_cache:
+        answer_cache.store(query, query_emb, response.text, context)
+    return response.text, context
+
+
+async def aget_responses(model, embedder, collection, queries,
+                         concurrency=ASYNC_CONCURRENCY, executor=None):
+    """
+    Sorguları en fazla `concurrency` tanesi aynı anda olacak şekilde işler.
+    Sonuçlar sorgularla aynı sırada döner.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(query):
+        async with semaphore:
+            return await aget_response(model, embedder, collection, query, executor)
+
+    return await asyncio.gather(*(run(query) for query in queries))
+
+
+def run_batch(model, embedder, collection, queries,
+              concurrency=ASYNC_CONCURRENCY, workers=ASYNC_WORKERS):
+    """
+    Senkron koddan sorgu listesini eşzamanlı çalıştırır
+    """
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rag") as executor:
+        return asyncio.run(
+            aget_responses(model, embedder, collection, queries, concurrency, executor)
+        )
@@ -0,0 +1,225 @@
+"""
+RAG Chatbot - Toplu Cevaplama
+JSONL dosyasındaki soruları akış halinde okuyup bloklar halinde tek encode ve
+tek vektör aramasıyla hazırlama, cevapları sınırlı eşzamanlılıkla üretip
+JSONL'e artımlı yazma; yarıda kalan çalıştırma kaldığı yerden devam eder
+
+Girdi satırları `{"id": ..., "query": "...", "chapter": 3}` (veya "question")
+ya da düz JSON string olabilir; "id" yoksa satır numarası kullanılır.
+
+Kullanım:
+    python src/batch_answer.py sorular.jsonl cevaplar.jsonl
+    python src/batch_answer.py sorular.jsonl cevaplar.jsonl --concurrency 16 --block-size 128
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config import BATCH_ANSWER_BLOCK_SIZE, BATCH_ANSWER_CONCURRENCY, ASYNC_WORKERS
+from query_cache import encode_queries
+from answer_cache import default_cache as answer_cache
+from prompt import build_prompt
+from context_builder import retrieve_contexts
+from lexical import use_lexical_fast_path
+from chunker import chapter_filter
+from async_pipeline import _generate
+from metrics import count_error
+
+
+def iter_questions(path):
+    """
+    Girdi dosyasından (id, soru, bölüm) üçlülerini akış halinde döndürür
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if isinstance(record, str):
+                record = {"query": record}
+            query = record.get("query", record.get("question"))
+            if not query:
+                print(f"Satir {line_number}: soru bulunamadi, atlaniyor")
+                continue
+            yield str(record.get("id", line_number)), query, record.get("chapter")
+
+
+def completed_ids(path):
+    """
+    Çıktı dosyasındaki tamamlanmış soruların id'leri.
+
+    Çıktı dosyası checkpoint olarak kullanılır: her cevap tamamlandığında tek
+    satır olarak yazılır. Kesinti sırasında yarım kalmış son satır kesilir.
+    """
+    if not os.path.exists(path):
+        return set()
+    with open(path, "rb+") as f:
+        data = f.read()
+        end = data.rfind(b"\n") + 1
+        if end < len(data):
+            f.truncate(end)
+    return {json.loads(line)["id"] for line in data[:end].decode("utf-8").splitlines() if line.strip()}
+
+
+def iter_blocks(items, size):
+    block = []
+    for item in items:
+        block.append(item)
+        if len(block) == size:
+            yield block
+            block = []
+    if block:
+        yield block
+
+
+def prepare_block(embedder, collection, block):
+    """
+    Bloktaki soruları tek encode ve bölüm başına tek vektör aramasıyla hazırlar.
+    Her soru için (id, soru, bağlam sözlüğü veya None, sorgu vektörü, cache'teki cevap) döner.
+    """
+    # Anahtar kelime sorguları (hybrid mod) encode edilmez, yalnızca BM25 ile aranır
+    encode_rows = [i for i, (_, query, _) in enumerate(block) if not use_lexical_fast_path(collection, query)]
+    vectors = [None] * len(block)
+    if encode_rows:
+        encoded = encode_queries(embedder, [block[i][1] for i in encode_rows])
+        for i, vector in zip(encode_rows, encoded):
+            vectors[i] = vector
+
+    prepared = [None] * len(block)
+    pending = {}
+    for i, (question_id, query, chapter) in enumerate(block):
+        cached = None
+        if answer_cache is not None and chapter is None and vectors[i] is not None:
+            cached = answer_cache.lookup(query, vectors[i])
+        if cached is not None:
+            prepared[i] = (question_id, query, {"context": cached[1], "mode": "cache"}, vectors[i], cached[0])
+        else:
+            pending.setdefault(chapter, []).append(i)
+
+    # Bölüm filtresi aramanın parçası olduğundan sorgular bölüme göre gruplanır
+    tokenizer = getattr(embedder, "tokenizer", None)
+    for chapter, rows in pending.items():
+        built = retrieve_contexts(
+            collection, [None if vectors[i] is None else vectors[i].tolist() for i in rows], tokenizer,
+            where=chapter_filter(chapter), queries=[block[i][1] for i in rows],
+        )
+        for i, context in zip(rows, built):
+            prepared[i] = (block[i][0], block[i][1], context, vectors[i], None)
+    return prepared
+
+
+async def answer_all(model, embedder, collection, questions, out, concurrency=BATCH_ANSWER_CONCURRENCY,
+                     block_size=BATCH_ANSWER_BLOCK_SIZE, executor=None, progress_callback=None):
+    """
+    Soruları cevaplayıp her cevabı tamamlandığı anda `out`'a bir JSON satırı olarak yazar.
+
+    Bir blok hazırlanırken önceki bloğun cevapları üretilmeye devam eder; en
+    fazla `concurrency` üretim aynı anda çalışır ve yeni blok ancak boş yer
+    açıldıkça okunur. Hata alan sorular yazılmaz (sonraki çalıştırmada tekrar
+    denenir). {"answered", "cached", "failed"} sayıları döner.
+    """
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+    stats = {"answered": 0, "cached": 0, "failed": 0}
+    tasks = set()
+
+    def write(question_id, query, answer, built, seconds):
+        record = {
+            "id": question_id, "query": query, "answer": answer, "context": built["context"],
+            "mode": built["mode"], "context_tokens": built.get("tokens"), "seconds": round(seconds, 3),
+        }
+        out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        out.flush()
+        stats["answered"] += 1
+        if progress_callback:
+            progress_callback(stats)
+
+    async def generate(question_id, query, built, query_emb):
+        start = time.perf_counter()
+        try:
+            response = await _generate(model, build_prompt(built["context"], query), executor)
+        except Exception as e:
+            count_error("llm")
+            stats["failed"] += 1
+            print(f"{question_id}: Gemini API hatasi: {e}")
+            return
+        if answer_cache is not None and query_emb is not None:
+            answer_cache.store(query, query_emb, response.text, built["context"])
+        write(question_id, query, response.text, built, time.perf_counter() - start)
+
+    for block in iter_blocks(questions, block_size):
+        prepared = await loop.run_in_executor(executor, prepare_block, embedder, collection, block)
+        for question_id, query, built, query_emb, cached in prepared:
+            if cached is not None:
+                stats["cached"] += 1
+                write(question_id, query, cached, built, 0.0)
+                continue
+            await semaphore.acquire()
+            task = asyncio.create_task(generate(question_id, query, built, query_emb))
+            task.add_done_callback(lambda _: semaphore.release())
+            task.add_done_callback(tasks.discard)
+            tasks.add(task)
+    await asyncio.gather(*tasks)
+    return stats
+
+
+def run(model, embedder, collection, input_path, output_path, concurrency=BATCH_ANSWER_CONCURRENCY,
+        block_size=BATCH_ANSWER_BLOCK_SIZE, restart=False, workers=ASYNC_WORKERS):
+    """
+    Girdi dosyasını cevaplar; `restart` verilmedikçe çıktıda bulunan sorular atlanır
+    """
+    done = set() if restart else completed_ids(output_path)
+    if done:
+        print(f"Devam ediliyor: {len(done)} soru zaten cevaplanmis")
+    questions = (item for item in iter_questions(input_path) if item[0] not in done)
+
+    start = time.perf_counter()
+
+    def report(stats):
+        if stats["answered"] % 100 == 0:
+            elapsed = time.perf_counter() - start
+            print(f"   {stats['answered']} cevap ({stats['answered'] / elapsed:.1f} soru/sn)")
+
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with open(output_path, "w" if restart else "a", encoding="utf-8") as out, \
+            ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch") as executor:
+        stats = asyncio.run(answer_all(model, embedder, collection, questions, out, concurrency,
+                                       block_size, executor, report))
+    stats["seconds"] = time.perf_counter() - start
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSONL dosyasindaki sorulari toplu cevapla")
+    parser.add_argument("input", help="Soru dosyasi (.jsonl)")
+    parser.add_argument("output", help="Cevaplarin eklenecegi dosya (.jsonl)")
+    parser.add_argument("--concurrency", type=int, default=BATCH_ANSWER_CONCURRENCY,
+                        help="Ayni anda uretilen cevap sayisi")
+    parser.add_argument("--block-size", type=int, default=BATCH_ANSWER_BLOCK_SIZE,
+                        help="Tek encode/arama ile hazirlanan soru sayisi")
+    parser.add_argument("--restart", action="store_true", help="Ciktiyi silip bastan basla")
+    args = parser.parse_args()
+
+    from rag_pipeline import setup_rag_pipeline
+
+    model, embedder, collection = setup_rag_pipeline()
+    if not all([model, embedder, collection]):
+        return
+
+    stats = run(model, embedder, collection, args.input, args.output, args.concurrency,
+                args.block_size, args.restart)
+    total = stats["answered"]
+    print(f"{total} soru {stats['seconds']:.1f} sn'de cevaplandi "
+          f"({total / max(stats['seconds'], 1e-9):.1f} soru/sn, {stats['cached']} cache, "
+          f"{stats['failed']} hata)")
+    if stats["failed"]:
+        print("Hata alan sorular ciktiya yazilmadi; ayni komutla tekrar calistirarak yeniden denenebilir")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+RAG Chatbot - Çok Turlu Sohbet Oturumu
+Son turların kayan penceresi, eski turların kısa özete sıkıştırılması, arama
+için bağımsız soru üretimi ve tur başına token sayımı
+"""
+
+import re
+
+from config import CHAT_WINDOW_TURNS, CHAT_SUMMARY_MAX_TOKENS, CHAT_FOLLOWUP_MAX_WORDS, CHAT_USE_LLM
+from context_builder import count_tokens, truncate_tokens
+from textnorm import turkish_casefold, fold_diacritics
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+# Önceki turlara gönderme yapan (aksanları katlanmış) kelimeler
+REFERENCE_WORDS = frozenset("""
+    bu bunu bunun buna bunlar bunlari o onu onun ona onlar onlari su sunu sunun
+    peki oyleyse boyleyse ayrica baska
+""".split())
+
+CONDENSE_PROMPT = """
+Aşağıdaki sohbet geçmişini ve takip sorusunu kullanarak, geçmişe bakmadan
+anlaşılabilecek tek bir bağımsız soru yaz. Yalnızca soruyu yaz.
+
+Geçmiş:
+{history}
+
+Takip sorusu: {question}
+Bağımsız soru:"""
+
+SUMMARY_PROMPT = """
+Aşağıdaki sohbet özetini ve yeni konuşma turunu birleştirerek en fazla
+{max_words} kelimelik tek paragraflık bir özet yaz. Yalnızca özeti yaz.
+
+Özet:
+{summary}
+
+Yeni tur:
+Soru: {question}
+Cevap: {answer}
+
+Yeni özet:"""
+
+
+class ChatSession:
+    """
+    Tek bir kullanıcının sohbet geçmişi.
+
+    Son `window` tur prompt'a olduğu gibi girer; pencereden çıkan turlar en
+    fazla `summary_max_tokens` tokenlık bir özete eklenir, böylece prompt
+    sohbet uzadıkça büyümez. Takip soruları ("peki bunu nasıl yaparım?")
+    arama için bağımsız bir soruya çevrilir. `model` verilirse özet ve
+    bağımsız soru LLM ile, verilmezse ek çağrı yapmadan kural tabanlı
+    üretilir. `transcript` arayüzde gösterilmek üzere tüm turları ve tur
+    başına token sayılarını tutar.
+    """
+
+    def __init__(self, model=None, tokenizer=None, window=CHAT_WINDOW_TURNS,
+                 summary_max_tokens=CHAT_SUMMARY_MAX_TOKENS):
+        self.model = model
+        self.tokenizer = tokenizer
+        self.window = window
+        self.summary_max_tokens = summary_max_tokens
+        self.summary = ""
+        self.turns = []
+        self.transcript = []
+        # Son bağımsız soru; kural tabanlı modda takip sorularının konusu
+        self.topic = None
+
+    def __len__(self):
+        return len(self.transcript)
+
+    def clear(self):
+        self.summary = ""
+        self.turns = []
+        self.transcript = []
+        self.topic = None
+
+    def has_history(self):
+        return bool(self.turns or self.summary)
+
+    def history_text(self):
+        """
+        Prompt'a eklenecek geçmiş: özet ve penceredeki turlar
+        """
+        parts = [f"Özet: {self.summary}"] if self.summary else []
+        parts += [f"Kullanıcı: {question}\nAsistan: {answer}" for question, answer in self.turns]
+        return "\n".join(parts)
+
+    def is_follow_up(self, question):
+        """
+        Soru önceki turlara dayanıyor mu: kısa veya gönderme kelimesi içeriyor
+        """
+        if not self.has_history():
+            return False
+        words = _WORD.findall(fold_diacritics(turkish_casefold(question)))
+        return len(words) <= CHAT_FOLLOWUP_MAX_WORDS or any(w in REFERENCE_WORDS for w in words)
+
+    def standalone_question(self, question):
+        """
+        Arama için geçmişe bakmadan anlaşılabilen soru. Takip sorusu değilse
+        olduğu gibi döner; kural tabanlı modda son bağımsız soruyla birleştirilir.
+        """
+        if not self.is_follow_up(question):
+            return question
+        if self.model is not None:
+            try:
+                prompt = CONDENSE_PROMPT.format(history=self.history_text(), question=question)
+                condensed = self.model.generate_content(prompt).text.strip()
+                if condensed:
+                    return condensed
+            except Exception as e:
+                print(f"Bagimsiz soru uretilemedi, kural tabanli kullaniliyor: {e}")
+        return f"{self.topic} {question}" if self.topic else question
+
+    def add_turn(self, question, answer, **tokens):
+        """
+        Turu geçmişe ekler, pencereden taşanları özete sıkıştırır.
+        `tokens` (ör. prompt, history, context) ve cevabın token sayısı tur
+        kaydına yazılır ve döndürülür.
+        """
+        if not self.is_follow_up(question):
+            self.topic = question
+        self.turns.append((question, answer))
+        while len(self.turns) > self.window:
+            self._compact(*self.turns.pop(0))
+        tokens["answer"] = count_tokens(answer, self.tokenizer)
+        self.transcript.append({"question": question, "answer": answer, "tokens": tokens})
+        return tokens
+
+    def _compact(self, question, answer):
+        if self.model is not None:
+            try:
+                prompt = SUMMARY_PROMPT.format(
+                    summary=self.summary or "-", question=question, answer=answer,
+                    max_words=self.summary_max_tokens // 2,
+                )
+                summary = self.model.generate_content(prompt).text.strip()
+                if summary:
+                    self.summary = truncate_tokens(summary, self.summary_max_tokens, self.tokenizer)
+                    return
+            except Exception as e:
+                print(f"Ozet uretilemedi, kural tabanli kullaniliyor: {e}")
+
+        # Kural tabanlı: soru ve cevabın ilk cümlesi; bütçe aşılırsa en eski satırlar atılır
+        first_sentence = _SENTENCE_END.split(answer.strip(), 1)[0]
+        lines = (self.summary.split("\n") if self.summary else []) + [f"{question} -> {first_sentence}"]
+        while len(lines) > 1 and count_tokens("\n".join(lines), self.tokenizer) > self.summary_max_tokens:
+            lines.pop(0)
+        self.summary = truncate_tokens("\n".join(lines), self.summary_max_tokens, self.tokenizer)
+
+
+def new_session(model=None, tokenizer=None):
+    """
+    CHAT_USE_LLM açıksa özet ve bağımsız soru için `model`'i kullanan oturum
+    """
+    return ChatSession(model=model if CHAT_USE_LLM else None, tokenizer=tokenizer)
+
+
+def record_prompt_tokens(trace, prompt, history=None, tokenizer=None):
+    """
+    Prompt'un ve içindeki sohbet geçmişinin token sayısını trace'e yazar
+    """
+    trace["prompt_tokens"] = count_tokens(prompt, tokenizer)
+    trace["history_tokens"] = count_tokens(history, tokenizer) if history else 0
+
+
+def format_turn_tokens(turn, number):
+    """
+    Bir turun token sayıları: "Tur 4: prompt 812 token · geçmiş 230 · bağlam 410 · cevap 120"
+    """
+    tokens = turn["tokens"]
+    if "prompt" not in tokens:
+        return f"Tur {number}: cache'ten, cevap {tokens['answer']} token"
+    return (f"Tur {number}: prompt {tokens['prompt']} token · geçmiş {tokens['history']} · "
+            f"bağlam {tokens['context']} · cevap {tokens['answer']}")
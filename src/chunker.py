@@ -0,0 +1,133 @@
+"""
+RAG Chatbot - Akışlı Metin Parçalayıcı
+Dosyayı satır satır okuyup bölüm başlıklarını takip ederek örtüşmeli parçalar üretme
+"""
+
+import re
+
+from config import CHUNK_SIZE, CHUNK_OVERLAP, MIN_TEXT_LENGTH
+
+# "BÖLÜM 3: STRATEJİK SALDIRI" ve data_prep.py'nin yazdığı "=== BOLUM 3: ... ===" biçimleri
+_CHAPTER = re.compile(r"^=*\s*B[ÖO]L[ÜU]M\s+(\d+)\s*:?\s*(.*?)\s*=*$", re.IGNORECASE)
+# "=== SUN TZU'NUN ÖĞÜTLERİ ===" gibi numarasız bölüm başlıkları
+_SECTION = re.compile(r"^=+\s*(.+?)\s*=+$")
+_SENTENCE_END = re.compile(r"(?<=[.!?…])\s+")
+
+
+def parse_header(line):
+    """
+    Satır bir bölüm başlığıysa (numara, başlık) döndürür, değilse None.
+    Numarasız başlıklar için numara 0'dır.
+    """
+    match = _CHAPTER.match(line)
+    if match:
+        return int(match.group(1)), match.group(2).strip(" =")
+    match = _SECTION.match(line)
+    if match:
+        return 0, match.group(1)
+    return None
+
+
+def _split_long(text, chunk_size):
+    """
+    chunk_size'tan uzun bir paragrafı önce cümle, gerekirse kelime sınırlarından böler
+    """
+    if len(text) <= chunk_size:
+        return [text]
+    pieces = []
+    for sentence in _SENTENCE_END.split(text):
+        while len(sentence) > chunk_size:
+            cut = sentence.rfind(" ", 0, chunk_size)
+            cut = cut if cut > 0 else chunk_size
+            pieces.append(sentence[:cut].strip())
+            sentence = sentence[cut:].strip()
+        if sentence:
+            pieces.append(sentence)
+    return pieces
+
+
+def _tail(text, overlap):
+    """
+    Metnin son `overlap` karakterini kelime sınırından başlayacak şekilde döndürür
+    """
+    if overlap <= 0 or len(text) <= overlap:
+        return text if overlap > 0 else ""
+    tail = text[-overlap:]
+    space = tail.find(" ")
+    return tail[space + 1:] if space >= 0 else tail
+
+
+def iter_chunks(lines, chunk_size=CHUNK_SIZE, overlap=CHUNK_OVERLAP,
+                min_length=MIN_TEXT_LENGTH, source=""):
+    """
+    Satır akışından {"text", "metadata"} parçaları üretir.
+
+    Bellekte yalnızca o an oluşturulan parça tutulur. Parçalar bölüm
+    sınırlarını aşmaz; aynı bölümdeki ardışık parçalar `overlap` karakter
+    örtüşür. Metadata: chapter (numarasız bölüm ve başlık öncesi için 0),
+    chapter_title, source ve chunk (kaynak içindeki sıra numarası).
+    """
+    chapter, title = 0, ""
+    pieces, size, fresh = [], 0, False
+    index = 0
+
+    def emit():
+        nonlocal index
+        text = " ".join(pieces).strip()
+        if len(text) <= min_length:
+            return None
+        chunk = {
+            "text": text,
+            "metadata": {"chapter": chapter, "chapter_title": title, "source": source, "chunk": index},
+        }
+        index += 1
+        return chunk
+
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+
+        header = parse_header(line)
+        if header is not None:
+            if fresh:
+                chunk = emit()
+                if chunk:
+                    yield chunk
+            chapter, title = header
+            pieces, size, fresh = [], 0, False
+            continue
+
+        for piece in _split_long(line, chunk_size):
+            if fresh and size + len(piece) + 1 > chunk_size:
+                chunk = emit()
+                if chunk:
+                    yield chunk
+                tail = _tail(chunk["text"], overlap) if chunk else ""
+                pieces, size, fresh = ([tail], len(tail), False) if tail else ([], 0, False)
+            if not fresh and size + len(piece) + 1 > chunk_size:
+                # Örtüşme ile parça sınırı aşılıyorsa örtüşmeyi bırak
+                pieces, size = [], 0
+            pieces.append(piece)
+            size += len(piece) + 1
+            fresh = True
+
+    if fresh:
+        chunk = emit()
+        if chunk:
+            yield chunk
+
+
+def iter_file_chunks(path, **kwargs):
+    """
+    Dosyayı belleğe almadan satır satır okuyarak parçalar
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        yield from iter_chunks(f, source=kwargs.pop("source", path), **kwargs)
+
+
+def chapter_filter(chapter):
+    """
+    Bölüm numarasından vector store sorgusu için `where` filtresi üretir (None: filtre yok)
+    """
+    return None if chapter is None else {"chapter": int(chapter)}
@@ -0,0 +1,192 @@
+"""
+RAG Chatbot - Ortak Ayarlar
+Model, veritabanı ve ingestion parametreleri (ortam değişkenleriyle değiştirilebilir)
+"""
+
+import os
+
+# Embedding modeli
+# "sentence-transformers" (PyTorch), "onnx" (ONNX Runtime, isteğe bağlı int8) veya
+# model indirmeden çalışan deterministik "hash" (stub)
+EMBED_BACKEND = os.getenv("EMBED_BACKEND", "sentence-transformers")
+EMBED_MODEL_NAME = os.getenv(
+    "EMBED_MODEL_NAME", "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+)
+if EMBED_BACKEND == "hash":
+    # Manifest model adıyla anahtarlandığından hash vektörleri gerçek modelinkilerle karışmasın
+    EMBED_MODEL_NAME = "stub-hash-384"
+# ONNX arka ucu: model ilk kullanımda bir kez ONNX'e aktarılır (ve istenirse int8'e kuantize edilir)
+ONNX_MODEL_PATH = os.getenv("ONNX_MODEL_PATH", "./.cache/onnx")
+ONNX_QUANTIZE = os.getenv("ONNX_QUANTIZE", "0") == "1"  # 1: dinamik int8 kuantizasyon
+ONNX_THREADS = int(os.getenv("ONNX_THREADS", "0"))  # ONNX Runtime thread sayısı (0: otomatik)
+# Embedding ve sorgu cache'lerinin anahtarı: arka uçlar (ve int8) aynı modelden
+# birebir aynı vektörü üretmediğinden her biri kendi cache'ini kullanır
+EMBED_CACHE_KEY = f"{EMBED_MODEL_NAME}-{EMBED_BACKEND}" + ("-int8" if EMBED_BACKEND == "onnx" and ONNX_QUANTIZE else "")
+
+# ChromaDB
+CHROMA_PATH = os.getenv("CHROMA_PATH", "./chroma_db")
+COLLECTION_NAME = os.getenv("COLLECTION_NAME", "sun_tzu_collection")
+# Koleksiyondaki içerik hash'lerini tutan manifest (artımlı yeniden indeksleme için)
+MANIFEST_PATH = os.getenv(
+    "MANIFEST_PATH", os.path.join(CHROMA_PATH, f"{COLLECTION_NAME}_manifest.json")
+)
+
+# Vector store arka ucu: "chroma", "numpy" (birebir arama) veya "faiss"
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma")
+VECTOR_STORE_PATH = os.getenv("VECTOR_STORE_PATH", "./vector_store")  # numpy/faiss dosyaları
+VECTOR_SPACE = os.getenv("VECTOR_SPACE", "l2")  # "l2", "ip" veya "cosine" (Chroma ile aynı anlamda)
+# NumPy store'da vektörlerin saklanma tipi: "float32", "float16" veya "int8" (vektör başına ölçekli)
+VECTOR_DTYPE = os.getenv("VECTOR_DTYPE", "float32")
+VECTOR_RESCORE = os.getenv("VECTOR_RESCORE", "0") == "1"  # En iyi adayları float32 ile yeniden puanla
+VECTOR_RESCORE_FACTOR = int(os.getenv("VECTOR_RESCORE_FACTOR", "4"))  # Yeniden puanlanan aday = k * bu
+FAISS_INDEX = os.getenv("FAISS_INDEX", "flat")  # "flat", "ivf" veya "hnsw"
+FAISS_NLIST = int(os.getenv("FAISS_NLIST", "1024"))  # IVF küme sayısı (üst sınır)
+FAISS_NPROBE = int(os.getenv("FAISS_NPROBE", "16"))  # IVF'te sorgu başına taranan küme
+FAISS_HNSW_M = int(os.getenv("FAISS_HNSW_M", "32"))
+FAISS_EF_CONSTRUCTION = int(os.getenv("FAISS_EF_CONSTRUCTION", "200"))
+FAISS_EF_SEARCH = int(os.getenv("FAISS_EF_SEARCH", "64"))
+# Chroma HNSW index'i (koleksiyon oluşturulurken metadata'ya yazılır; space/M/construction_ef
+# yalnızca yeniden indekslemeyle, search_ef açılışta değişir). Uzay VECTOR_SPACE'tir.
+CHROMA_HNSW_M = int(os.getenv("CHROMA_HNSW_M", "16"))  # Düğüm başına komşu sayısı
+CHROMA_HNSW_CONSTRUCTION_EF = int(os.getenv("CHROMA_HNSW_CONSTRUCTION_EF", "100"))  # Kurulumdaki aday listesi
+CHROMA_HNSW_SEARCH_EF = int(os.getenv("CHROMA_HNSW_SEARCH_EF", "10"))  # Sorgudaki aday listesi
+# src/tune_hnsw.py'nin seçtiği ayarlar; dosya varsa yukarıdaki değerlerin yerine geçer ("" ile kapatılır)
+HNSW_CONFIG_PATH = os.getenv("HNSW_CONFIG_PATH", os.path.join(CHROMA_PATH, f"{COLLECTION_NAME}_hnsw.json"))
+
+# Retrieval
+N_RESULTS = int(os.getenv("N_RESULTS", "3"))  # Prompt'a eklenecek metin parçası sayısı
+
+# Bağlam oluşturma: uyarlanan parça sayısı, örtüşme ayıklama ve token bütçesi
+CONTEXT_MAX_K = int(os.getenv("CONTEXT_MAX_K", str(N_RESULTS)))  # Bağlama girebilecek en fazla parça
+CONTEXT_CANDIDATES = int(os.getenv("CONTEXT_CANDIDATES", str(CONTEXT_MAX_K * 2)))  # Store'dan çekilen aday
+# En yakın adayın uzaklığının bu katından uzak parçalar atılır (0: eşik yok)
+CONTEXT_DISTANCE_RATIO = float(os.getenv("CONTEXT_DISTANCE_RATIO", "1.5"))
+CONTEXT_MAX_TOKENS = int(os.getenv("CONTEXT_MAX_TOKENS", "1024"))  # Bağlamın token bütçesi
+CONTEXT_DEDUP_THRESHOLD = float(os.getenv("CONTEXT_DEDUP_THRESHOLD", "0.8"))  # Bu oranda ortak 3-gram: kopya
+
+# Arama modu: "vector" (yalnızca embedding) veya "hybrid" (BM25 + embedding, rank füzyonu)
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "vector")
+HYBRID_VECTOR_WEIGHT = float(os.getenv("HYBRID_VECTOR_WEIGHT", "0.5"))  # Füzyonda vektör sırasının ağırlığı
+HYBRID_RRF_K = int(os.getenv("HYBRID_RRF_K", "60"))  # Reciprocal rank fusion sabiti
+BM25_K1 = float(os.getenv("BM25_K1", "1.2"))
+BM25_B = float(os.getenv("BM25_B", "0.75"))
+LEXICAL_PREFIX_LEN = int(os.getenv("LEXICAL_PREFIX_LEN", "5"))  # Terimlerin kısaltıldığı harf sayısı (0: kısaltma yok)
+# Hybrid modda kısa anahtar kelime sorguları embedder'a gitmeden yalnızca BM25 ile cevaplanır
+LEXICAL_FAST_PATH = os.getenv("LEXICAL_FAST_PATH", "1") == "1"
+LEXICAL_MAX_TERMS = int(os.getenv("LEXICAL_MAX_TERMS", "3"))  # Hızlı yol için en fazla kelime
+
+# Ingestion
+ENCODE_BATCH_SIZE = int(os.getenv("ENCODE_BATCH_SIZE", "64"))  # Tek forward pass'teki metin sayısı
+WRITE_CHUNK_SIZE = int(os.getenv("WRITE_CHUNK_SIZE", "2048"))  # Tek Chroma yazımındaki kayıt sayısı
+# Encode süreç sayısı (1: tek süreç); >1 ise SentenceTransformer süreç havuzu kullanılır
+EMBED_WORKERS = int(os.getenv("EMBED_WORKERS", "1"))
+EMBED_PROCESS_CHUNK_SIZE = int(os.getenv("EMBED_PROCESS_CHUNK_SIZE", "0"))  # Sürece gönderilen metin (0: otomatik)
+# Doküman embedding'lerinin kalıcı cache'i ((model, metin hash'i) anahtarlı, memory-mapped)
+EMBED_CACHE_ENABLED = os.getenv("EMBED_CACHE_ENABLED", "1") == "1"
+EMBED_CACHE_PATH = os.getenv("EMBED_CACHE_PATH", "./.cache/embeddings")
+MIN_TEXT_LENGTH = 10  # Bu uzunluktaki ve daha kısa metinler atlanır
+CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "500"))  # Parça başına en fazla karakter
+CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "100"))  # Ardışık parçalar arasındaki örtüşme (karakter)
+
+# Akışlı ingestion (Hugging Face dataset -> parçalama -> encode -> vector store)
+DATASET_NAME = os.getenv("DATASET_NAME", "umithy/sun_tzu_savas_sanati")  # veya yerel .jsonl dosyası
+DATASET_SPLIT = os.getenv("DATASET_SPLIT", "train")
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "4"))  # Aşamalar arası kuyrukta bekleyen yazım parçası
+PIPELINE_CHECKPOINT_PATH = os.getenv("PIPELINE_CHECKPOINT_PATH", "./.cache/ingest_checkpoint.json")
+PIPELINE_CHECKPOINT_EVERY = int(os.getenv("PIPELINE_CHECKPOINT_EVERY", "1"))  # Kaç yazımda bir checkpoint
+
+# Başlangıç (startup)
+# "fast": model adı diskten okunur, list_models() arka planda çalışır
+# "check": list_models() başlangıçta beklenir (eski davranış)
+STARTUP_MODE = os.getenv("STARTUP_MODE", "fast")
+MODEL_CACHE_PATH = os.getenv("MODEL_CACHE_PATH", "./.cache/gemini_model.json")
+MODEL_CACHE_TTL = int(os.getenv("MODEL_CACHE_TTL", str(24 * 3600)))  # saniye
+WARMUP_EMBEDDER = os.getenv("WARMUP_EMBEDDER", "1") == "1"
+
+# LLM arka ucu: "gemini" veya ağ gerektirmeyen deterministik "stub"
+LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini")
+STUB_LLM_DELAY = float(os.getenv("STUB_LLM_DELAY", "0.5"))  # saniye
+
+# Cevapları parça parça akıt (web arayüzü ve etkileşimli CLI)
+STREAM_RESPONSES = os.getenv("STREAM_RESPONSES", "1") == "1"
+
+# Çok turlu sohbet: son turlar olduğu gibi, daha eskileri özet olarak prompt'a girer
+CHAT_WINDOW_TURNS = int(os.getenv("CHAT_WINDOW_TURNS", "3"))  # Prompt'a olduğu gibi eklenen son tur sayısı
+CHAT_SUMMARY_MAX_TOKENS = int(os.getenv("CHAT_SUMMARY_MAX_TOKENS", "200"))  # Eski turların özet bütçesi
+# Bu kadar veya daha az kelimelik sorular (ya da "bu", "peki" gibi göndermeler) takip sorusu sayılır
+CHAT_FOLLOWUP_MAX_WORDS = int(os.getenv("CHAT_FOLLOWUP_MAX_WORDS", "3"))
+# 1: özet ve bağımsız soru LLM ile üretilir (tur başına ek çağrı); 0: kural tabanlı, ek çağrı yok
+CHAT_USE_LLM = os.getenv("CHAT_USE_LLM", "0") == "1"
+
+# Gemini modeli
+GEMINI_MODEL = os.getenv("GEMINI_MODEL")  # Verilirse model çözümlemesi tamamen atlanır
+DEFAULT_GEMINI_MODEL = "gemini-1.5-flash-latest"
+# list_models() sonucunda tercih sırası
+GEMINI_MODEL_PREFERENCE = [
+    "gemini-1.5-flash-latest",
+    "gemini-1.5-flash",
+    "gemini-flash-latest",
+]
+
+# Gemini istemcisi
+# "sdk": google-generativeai, "rest": bağlantı havuzlu doğrudan REST çağrıları
+# (GEMINI_BASE_URL ile yerel stub sunucuya yönlendirilebilir)
+GEMINI_TRANSPORT = os.getenv("GEMINI_TRANSPORT", "sdk")
+GEMINI_BASE_URL = os.getenv("GEMINI_BASE_URL", "https://generativelanguage.googleapis.com")
+LLM_POOL_SIZE = int(os.getenv("LLM_POOL_SIZE", "8"))  # REST bağlantı havuzu ve eşzamanlı deneme sayısı
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))  # Tek denemenin süre sınırı (sn)
+LLM_DEADLINE = float(os.getenv("LLM_DEADLINE", "60"))  # Tekrar denemeler dahil toplam süre sınırı (sn)
+LLM_RETRIES = int(os.getenv("LLM_RETRIES", "3"))  # Geçici hatalarda (429, 5xx, zaman aşımı) tekrar sayısı
+LLM_BACKOFF = float(os.getenv("LLM_BACKOFF", "0.5"))  # İlk bekleme (sn); her denemede iki katına çıkar
+LLM_MAX_BACKOFF = float(os.getenv("LLM_MAX_BACKOFF", "8"))
+LLM_RATE_LIMIT = float(os.getenv("LLM_RATE_LIMIT", "15"))  # Dakikadaki istek kotası (0: sınırsız)
+LLM_RATE_BURST = int(os.getenv("LLM_RATE_BURST", "5"))  # Art arda gönderilebilecek istek
+# İlk deneme bu kadar saniyede bitmezse ikinci bir istek gönderilir, önce biten kullanılır (0: kapalı)
+LLM_HEDGE_AFTER = float(os.getenv("LLM_HEDGE_AFTER", "0"))
+
+# Sorgu embedding cache'i (LRU)
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "1024"))
+QUERY_CACHE_PATH = os.getenv("QUERY_CACHE_PATH")  # Verilirse cache yeniden başlatmalar arasında korunur
+
+# Semantik cevap cache'i (benzer sorular için Gemini çağrısını atlar)
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "1") == "1"
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.92"))  # Kosinüs benzerliği
+ANSWER_CACHE_TTL = int(os.getenv("ANSWER_CACHE_TTL", "3600"))  # saniye
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "256"))
+
+# Web arayüzündeki örnek sorular; cevapları indeksin yanında önceden hesaplanıp saklanır
+EXAMPLE_QUESTIONS = [
+    "Savaşta strateji nasıl belirlenir?",
+    "Düşman nasıl yenilir?",
+    "Ordunun moralini nasıl yükseltirsin?",
+    "Kaynakları nasıl yönetirsin?",
+    "Liderlik nasıl olmalıdır?",
+    "Ne zaman savaşmamak gerekir?",
+]
+EXAMPLE_ANSWERS_PATH = os.getenv(
+    "EXAMPLE_ANSWERS_PATH", os.path.join(CHROMA_PATH, f"{COLLECTION_NAME}_examples.json")
+)
+# 1: koleksiyon sürümü veya prompt değiştiyse eksik cevaplar başlangıçta arka planda üretilir
+PRECOMPUTE_EXAMPLES = os.getenv("PRECOMPUTE_EXAMPLES", "1") == "1"
+
+# Async pipeline
+ASYNC_CONCURRENCY = int(os.getenv("ASYNC_CONCURRENCY", "4"))  # Aynı anda işlenen sorgu sayısı
+ASYNC_WORKERS = int(os.getenv("ASYNC_WORKERS", "4"))  # Encode/Chroma işleri için thread sayısı
+
+# Toplu cevaplama (src/batch_answer.py): her blok tek encode ve tek vektör aramasıyla hazırlanır
+BATCH_ANSWER_BLOCK_SIZE = int(os.getenv("BATCH_ANSWER_BLOCK_SIZE", "64"))  # Blok başına soru
+BATCH_ANSWER_CONCURRENCY = int(os.getenv("BATCH_ANSWER_CONCURRENCY", "8"))  # Aynı anda üretilen cevap
+
+# HTTP servisi (FastAPI)
+SERVER_HOST = os.getenv("SERVER_HOST", "0.0.0.0")
+SERVER_PORT = int(os.getenv("SERVER_PORT", "8000"))
+SERVER_PROCESSES = int(os.getenv("SERVER_PROCESSES", "1"))  # uvicorn worker süreç sayısı
+SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", "8"))  # Süreç başına encode/Chroma thread sayısı
+SERVER_MAX_CONCURRENCY = int(os.getenv("SERVER_MAX_CONCURRENCY", "16"))  # Aynı anda işlenen istek
+SERVER_QUEUE_SIZE = int(os.getenv("SERVER_QUEUE_SIZE", "64"))  # Bekleyebilecek istek; aşılırsa 503
+SERVER_MAX_BATCH = int(os.getenv("SERVER_MAX_BATCH", "64"))  # /batch başına en fazla soru
+
+# Sorgu embedding micro-batching (eşzamanlı istekleri tek forward pass'te toplar)
+MICROBATCH_ENABLED = os.getenv("MICROBATCH_ENABLED", "1") == "1"
+MICROBATCH_MAX_SIZE = int(os.getenv("MICROBATCH_MAX_SIZE", "32"))
+MICROBATCH_MAX_WAIT_MS = float(os.getenv("MICROBATCH_MAX_WAIT_MS", "5"))
@@ -0,0 +1,198 @@
+"""
+RAG Chatbot - Token Bütçeli Bağlam Oluşturma
+Benzerlik eşiğiyle uyarlanan parça sayısı, örtüşen parçaların ayıklanması ve
+yerel tokenizer sayımıyla prompt bağlamını bütçe içinde tutma
+"""
+
+import re
+
+from config import (
+    N_RESULTS, CHUNK_OVERLAP, CONTEXT_MAX_K, CONTEXT_CANDIDATES, CONTEXT_DISTANCE_RATIO,
+    CONTEXT_MAX_TOKENS, CONTEXT_DEDUP_THRESHOLD, RETRIEVAL_MODE, HYBRID_VECTOR_WEIGHT, HYBRID_RRF_K
+)
+from lexical import index_for
+from metrics import default_registry as metrics
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+metrics.describe("rag_context_tokens_total", "Baglama eklenen (used) ve eski davranisa gore tasarruf edilen (saved) tokenlar")
+metrics.describe("rag_retrieval_total", "Arama moduna (vector, hybrid, lexical) gore sorgu sayisi")
+
+
+def count_tokens(text, tokenizer=None):
+    """
+    Metnin token sayısı; tokenizer yoksa ~4 karakter/token yaklaşımı kullanılır
+    """
+    if tokenizer is not None:
+        return len(tokenizer.encode(text, add_special_tokens=False))
+    return max(1, len(text) // 4) if text else 0
+
+
+def _shingles(text, size=3):
+    words = _WORD.findall(text.lower())
+    return {tuple(words[i:i + size]) for i in range(max(len(words) - size + 1, 1))}
+
+
+def _strip_overlap(previous, text, max_overlap=CHUNK_OVERLAP, min_overlap=20):
+    """
+    Chunker'ın ardışık parçalar arasında bıraktığı örtüşmeyi `text`'ten atar:
+    `previous`'un sonu `text`'in başıyla (veya `text`'in sonu `previous`'un
+    başıyla) örtüşüyorsa o kısım kırpılır
+    """
+    limit = min(len(previous), len(text), max_overlap)
+    for size in range(limit, min_overlap - 1, -1):
+        if previous.endswith(text[:size]):
+            return text[size:].lstrip()
+        if text.endswith(previous[:size]):
+            return text[:-size].rstrip()
+    return text
+
+
+def truncate_tokens(text, max_tokens, tokenizer):
+    """
+    Metni kelime sınırından keserek en fazla `max_tokens` tokena indirir
+    """
+    while text and count_tokens(text, tokenizer) > max_tokens:
+        cut = int(len(text) * max_tokens / count_tokens(text, tokenizer) * 0.95)
+        cut = text.rfind(" ", 0, cut)
+        if cut <= 0:
+            return ""
+        text = text[:cut]
+    return text
+
+
+def select_documents(documents, distances, max_k=CONTEXT_MAX_K, ratio=CONTEXT_DISTANCE_RATIO,
+                     dedup_threshold=CONTEXT_DEDUP_THRESHOLD):
+    """
+    Uzaklığa göre sıralı adaylardan bağlama girecek metinleri seçer.
+
+    En yakın adayın uzaklığının `ratio` katından uzak olanlar atılır (ratio <= 0
+    veya `distances` None ise eşik yok), zaten seçilmiş bir metinle örtüşen kısım kırpılır ve
+    3-kelimelik parçalarının `dedup_threshold` oranından fazlası seçilmiş
+    metinlerde geçen (neredeyse kopya) adaylar atlanır.
+    """
+    if not documents:
+        return []
+    # Eşik yalnızca pozitif uzaklıklarda anlamlı (ör. normalize edilmemiş "ip" uzayı hariç)
+    cutoff = distances[0] * ratio if ratio > 0 and distances and distances[0] > 0 else None
+    selected, seen = [], set()
+    for i, text in enumerate(documents):
+        if len(selected) >= max_k:
+            break
+        if cutoff is not None and i > 0 and distances[i] > cutoff:
+            break
+        for previous in selected:
+            text = _strip_overlap(previous, text)
+        shingles = _shingles(text)
+        if not text or len(shingles & seen) / len(shingles) >= dedup_threshold:
+            continue
+        selected.append(text)
+        seen |= shingles
+    return selected
+
+
+def build_context(documents, distances, tokenizer=None, max_tokens=CONTEXT_MAX_TOKENS,
+                  baseline_k=N_RESULTS, **select_kwargs):
+    """
+    Seçilen metinleri token bütçesini aşmadan birleştirir.
+
+    Bütçeye sığmayan metinler eklenmez; ilk metin tek başına sığmıyorsa kesilir.
+    Dönen sözlük: context, k (kullanılan metin sayısı), tokens (bağlam tokenı)
+    ve tokens_saved (ilk `baseline_k` metnin olduğu gibi birleştirilmesine göre).
+    """
+    parts, used = [], 0
+    for text in select_documents(documents, distances, **select_kwargs):
+        tokens = count_tokens(text, tokenizer)
+        if used + tokens > max_tokens:
+            if parts:
+                continue
+            text = truncate_tokens(text, max_tokens, tokenizer)
+            tokens = count_tokens(text, tokenizer)
+            if not text:
+                break
+        parts.append(text)
+        used += tokens
+
+    baseline = count_tokens("\n\n".join(documents[:baseline_k]), tokenizer)
+    context = "\n\n".join(parts)
+    return {
+        "context": context,
+        "k": len(parts),
+        "tokens": used,
+        "tokens_saved": max(baseline - used, 0),
+    }
+
+
+def fuse_rankings(rankings, rrf_k=HYBRID_RRF_K):
+    """
+    Ağırlıklı reciprocal rank fusion: her (ağırlık, ids) sıralamasında r.
+    sıradaki doküman ağırlık / (rrf_k + r) puan alır. Skorlar farklı
+    ölçeklerde (BM25, L2/kosinüs uzaklığı) olduğundan yalnızca sıralar birleştirilir.
+    Id'ler füzyon skoruna göre sıralı döner.
+    """
+    scores = {}
+    for weight, ids in rankings:
+        for rank, doc_id in enumerate(ids, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + weight / (rrf_k + rank)
+    return sorted(scores, key=scores.get, reverse=True)
+
+
+def retrieve_context(collection, query_emb, tokenizer=None, where=None, query=None):
+    """
+    Vector store'dan aday metinleri çekip token bütçeli bağlamı oluşturur.
+
+    `query_emb` liste olarak verilmelidir. Hybrid modda `query` metniyle BM25
+    adayları da alınır ve sıralar birleştirilir; `query_emb` None ise (anahtar
+    kelime hızlı yolu) yalnızca BM25 kullanılır. Dönen sözlükte build_context
+    alanlarına ek olarak "mode" (vector, hybrid, lexical) bulunur.
+    """
+    return retrieve_contexts(collection, [query_emb], tokenizer, where, [query])[0]
+
+
+def retrieve_contexts(collection, query_embs, tokenizer=None, where=None, queries=None):
+    """
+    retrieve_context'in toplu hali: tüm sorgu vektörleri tek bir
+    `collection.query` çağrısıyla (tek matris çarpımı / HNSW batch'i) aranır.
+    Sonuçlar sorgularla aynı sırada döner.
+    """
+    queries = [None] * len(query_embs) if queries is None else queries
+    vector_rows = [i for i, emb in enumerate(query_embs) if emb is not None]
+    hits = {}
+    if vector_rows:
+        results = collection.query(
+            query_embeddings=[query_embs[i] for i in vector_rows], n_results=CONTEXT_CANDIDATES,
+            where=where, include=["documents", "distances"],
+        )
+        for j, i in enumerate(vector_rows):
+            hits[i] = (results["ids"][j], results["documents"][j], results["distances"][j])
+
+    contexts = []
+    for i, query in enumerate(queries):
+        lexical = None
+        if query is not None and (RETRIEVAL_MODE == "hybrid" or i not in hits):
+            lexical = index_for(collection).search(query, CONTEXT_CANDIDATES, where)
+
+        if i not in hits:
+            # BM25 skoru uzaklığa çevrilir: oran eşiği "en iyi skorun 1/ratio'su" olur
+            mode, documents = "lexical", lexical["documents"]
+            distances = [1.0 / score for score in lexical["scores"]]
+        elif lexical is None:
+            mode, (_, documents, distances) = "vector", hits[i]
+        else:
+            mode, distances = "hybrid", None
+            ids, docs, _ = hits[i]
+            texts = dict(zip(lexical["ids"], lexical["documents"]))
+            texts.update(zip(ids, docs))
+            ids = fuse_rankings([
+                (HYBRID_VECTOR_WEIGHT, ids),
+                (1 - HYBRID_VECTOR_WEIGHT, lexical["ids"]),
+            ])
+            documents = [texts[doc_id] for doc_id in ids]
+
+        built = build_context(documents, distances, tokenizer)
+        built["mode"] = mode
+        metrics.inc("rag_retrieval_total", mode=mode)
+        metrics.inc("rag_context_tokens_total", built["tokens"], kind="used")
+        metrics.inc("rag_context_tokens_total", built["tokens_saved"], kind="saved")
+        contexts.append(built)
+    return contexts
@@ -1,62 +1,64 @@
 """
 RAG Chatbot - Embedding ve Vector Database Kurulumu
-Sun Tzu metinlerini embedding'e dönüştürüp ChromaDB'ye kaydetme
+Sun Tzu metinlerini embedding'e dönüştürüp vector database'e (varsayılan: ChromaDB) kaydetme
 """
 
-from sentence_transformers import SentenceTransformer
-import chromadb
 import os
+import sys
 
-def setup_embedding_and_vector_db():
+from config import EMBED_MODEL_NAME, EMBED_CACHE_KEY, COLLECTION_NAME, VECTOR_BACKEND, EMBED_WORKERS
+from chunker import iter_file_chunks
+from ingest import sync_collection, format_stats
+from vector_store import open_vector_store
+from parallel_embed import parallel_embedder
+from embedding_cache import cached_embedder
+from startup import load_embedder
+
+def setup_embedding_and_vector_db(rebuild=False):
     """
-    Sun Tzu metinlerini embedding'e dönüştürüp ChromaDB'ye kaydeder
+    Sun Tzu metinlerini embedding'e dönüştürüp ChromaDB'ye kaydeder.
+    Varsayılan olarak yalnızca değişen metinler işlenir; rebuild=True koleksiyonu sıfırdan kurar.
     """
     print("Embedding ve Vector Database kurulumu basliyor...")
     
-    # 1. Veri dosyasını oku
-    print("Veri dosyasi okunuyor...")
-    with open("data/sun_tzu.txt", "r", encoding="utf-8") as f:
-        texts = [t.strip() for t in f.readlines() if t.strip()]
-    
-    print(f"Toplam {len(texts)} metin satiri bulundu")
+    # 1. Veri dosyası akış olarak, bölüm sınırlarına uyan örtüşmeli parçalara bölünür
+    print("Veri dosyasi parcalaniyor...")
+    chunks = iter_file_chunks("data/sun_tzu.txt")
     
     # 2. Embedding modeli (küçük ve hızlı bir Türkçe uyumlu model)
     print("Embedding modeli yukleniyor...")
-    model_name = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
-    model = SentenceTransformer(model_name)
+    model_name = EMBED_MODEL_NAME
+    model = load_embedder(model_name)
     print(f"Model yuklendi: {model_name}")
     
-    # 3. Chroma client (kalıcı veritabanı)
-    print("ChromaDB baglantisi kuruluyor...")
-    chroma_client = chromadb.PersistentClient(path="./chroma_db")
-    
-    # 4. Koleksiyon oluştur (varsa sil ve yeniden oluştur)
-    collection_name = "sun_tzu_collection"
-    try:
-        chroma_client.delete_collection(name=collection_name)
+    # 3-4. Vector store'u aç (rebuild istenirse sil ve yeniden oluştur)
+    print(f"Vector store aciliyor ({VECTOR_BACKEND})...")
+    collection_name = COLLECTION_NAME
+    collection = open_vector_store(rebuild=rebuild)
+    if rebuild:
         print(f"Eski koleksiyon silindi: {collection_name}")
-    except:
-        pass
+    print(f"Koleksiyon hazir: {collection_name} ({collection.count()} kayit)")
+    
+    # 5. Yalnızca yeni/değişen metinleri batch'ler halinde embed edip ekle, silinenleri kaldır
+    print("Koleksiyon metin dosyasiyla esitleniyor...")
     
-    collection = chroma_client.create_collection(name=collection_name)
-    print(f"Koleksiyon olusturuldu: {collection_name}")
+    def report(done, total):
+        print(f"   {done} parca islendi...")
     
-    # 5. Her metin parçasını embed edip ekle
-    print("Metinler embedding'e donusturuluyor ve kaydediliyor...")
+    # EMBED_WORKERS > 1 ise encode tüm çekirdeklere süreç havuzuyla dağıtılır
+    if EMBED_WORKERS > 1:
+        print(f"Encode {EMBED_WORKERS} surece dagitiliyor")
+    # Daha önce encode edilmiş parçalar diskteki embedding cache'inden okunur
+    with parallel_embedder(model) as encoder:
+        encoder = cached_embedder(encoder, EMBED_CACHE_KEY)
+        stats = sync_collection(collection, encoder, chunks, progress_callback=report)
     
-    for i, text in enumerate(texts):
-        if len(text) > 10:  # Çok kısa metinleri atla
-            emb = model.encode(text).tolist()
-            collection.add(
-                ids=[str(i)],
-                embeddings=[emb],
-                documents=[text]
-            )
-            
-            if (i + 1) % 10 == 0:
-                print(f"   {i + 1}/{len(texts)} metin islendi...")
+    if hasattr(encoder, "cache"):
+        cache_stats = encoder.cache.stats()
+        print(f"Embedding cache: {cache_stats['hits']} isabet, {cache_stats['misses']} yeni encode")
     
-    print(f"Toplam {len(texts)} metin ChromaDB'ye kaydedildi!")
+    print(f"Eklenen/guncellenen: {stats['added']}, silinen: {stats['removed']}, degismeyen: {stats['unchanged']}")
+    print(f"Ingestion: {format_stats(stats)}")
     
     return model, collection
 
@@ -95,7 +97,7 @@ def main():
     """
     try:
         # Embedding ve vector database kurulumu
-        model, collection = setup_embedding_and_vector_db()
+        model, collection = setup_embedding_and_vector_db(rebuild="--rebuild" in sys.argv)
         
         # Test sorgusu
         print("\nBasit test sorgusu...")
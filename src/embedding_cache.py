@@ -0,0 +1,194 @@
+"""
+RAG Chatbot - Kalıcı Embedding Cache'i
+(model ve arka uç, metin hash'i) anahtarlı, memory-mapped vektör dosyasında tutulan
+doküman embedding'leri; yeniden indeksleme ve store geçişlerinde tekrar encode'u önler
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+
+import numpy as np
+
+from config import EMBED_BACKEND, EMBED_CACHE_KEY, EMBED_CACHE_ENABLED, EMBED_CACHE_PATH
+
+KEY_BYTES = 20  # sha1
+
+
+def text_key(text):
+    """
+    Metnin cache anahtarı (ham sha1 özeti)
+    """
+    return hashlib.sha1(text.encode("utf-8")).digest()
+
+
+class EmbeddingCache:
+    """
+    Tek bir embedding modeline ait, diskte büyüyen vektör cache'i.
+
+    `path/<model>/` altında üç dosya tutulur: `vectors.f32` (satır satır ham
+    float32 vektörler, okuma için memory-map edilir), `keys.bin` (her satırın
+    20 baytlık metin hash'i) ve `meta.json` (cache anahtarı ve boyut). Yazma yalnızca
+    dosya sonuna eklemedir; yarıda kalmış bir yazım açılışta tutarlı satır
+    sayısına kırpılır. Anahtar -> satır indeksi açılışta bellekte kurulur.
+    """
+
+    def __init__(self, path=EMBED_CACHE_PATH, model_name=EMBED_CACHE_KEY):
+        self.model_name = model_name
+        self.dir = os.path.join(path, re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name))
+        self.dim = None
+        self.hits = 0
+        self.misses = 0
+        self._index = {}
+        self._mmap = None
+        self._lock = threading.Lock()
+        self._load()
+
+    @property
+    def _vectors_path(self):
+        return os.path.join(self.dir, "vectors.f32")
+
+    @property
+    def _keys_path(self):
+        return os.path.join(self.dir, "keys.bin")
+
+    def _load(self):
+        try:
+            with open(os.path.join(self.dir, "meta.json"), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(self._keys_path, "rb") as f:
+                keys = f.read()
+            vector_bytes = os.path.getsize(self._vectors_path)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        if meta.get("model") != self.model_name:
+            return
+        self.dim = meta["dim"]
+
+        rows = min(len(keys) // KEY_BYTES, vector_bytes // (4 * self.dim))
+        # Yarıda kalmış son yazımı at
+        for path, size in ((self._keys_path, rows * KEY_BYTES),
+                           (self._vectors_path, rows * 4 * self.dim)):
+            if os.path.getsize(path) != size:
+                os.truncate(path, size)
+        self._index = {keys[i * KEY_BYTES:(i + 1) * KEY_BYTES]: i for i in range(rows)}
+
+    def _vectors(self):
+        rows = len(self._index)
+        if self._mmap is None or len(self._mmap) < rows:
+            self._mmap = np.memmap(self._vectors_path, dtype=np.float32, mode="r",
+                                   shape=(rows, self.dim))
+        return self._mmap
+
+    def __len__(self):
+        return len(self._index)
+
+    def get_many(self, keys):
+        """
+        Her anahtar için satır numarasını (yoksa -1) ve bulunan vektörleri döndürür
+        """
+        with self._lock:
+            rows = np.array([self._index.get(k, -1) for k in keys], dtype=np.int64)
+            found = rows[rows >= 0]
+            vectors = np.asarray(self._vectors()[found]) if len(found) else None
+            self.hits += len(found)
+            self.misses += len(rows) - len(found)
+        return rows, vectors
+
+    def put_many(self, keys, vectors):
+        """
+        Yeni anahtar/vektör çiftlerini dosyaların sonuna ekler
+        """
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        with self._lock:
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+                os.makedirs(self.dir, exist_ok=True)
+                with open(os.path.join(self.dir, "meta.json"), "w", encoding="utf-8") as f:
+                    json.dump({"model": self.model_name, "dim": self.dim}, f)
+                # Farklı modelle yazılmış eski dosyalar kullanılmaz
+                for path in (self._keys_path, self._vectors_path):
+                    open(path, "wb").close()
+
+            new = {}
+            for k, v in zip(keys, vectors):
+                if k not in self._index:
+                    new.setdefault(k, v)
+            if not new:
+                return
+            # Önce vektörler, sonra anahtarlar: anahtarı olan her satırın vektörü diskte olur
+            with open(self._vectors_path, "ab") as f:
+                f.write(np.stack(list(new.values())).tobytes())
+            with open(self._keys_path, "ab") as f:
+                f.write(b"".join(new))
+            for k in new:
+                self._index[k] = len(self._index)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self._index),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "disk_bytes": len(self._index) * (KEY_BYTES + 4 * (self.dim or 0)),
+        }
+
+
+class CachedEmbedder:
+    """
+    Embedder'ın önüne konan, aynı `encode` arayüzünü sunan kalıcı cache.
+
+    Liste halinde gelen metinlerden cache'te olanlar diskten okunur, kalanlar
+    tek bir encode çağrısıyla hesaplanıp cache'e eklenir; sonuç girdiyle aynı
+    sıradadır. Tek metinler (sorgular) ve çıktıyı değiştiren ek argümanlı
+    çağrılar doğrudan embedder'a iletilir.
+    """
+
+    _PASSTHROUGH_KWARGS = {"batch_size", "show_progress_bar"}
+
+    def __init__(self, embedder, cache):
+        self.embedder = embedder
+        self.cache = cache
+
+    def encode(self, sentences, **kwargs):
+        if isinstance(sentences, str) or set(kwargs) - self._PASSTHROUGH_KWARGS:
+            return self.embedder.encode(sentences, **kwargs)
+        sentences = list(sentences)
+        if not sentences:
+            return self.embedder.encode(sentences, **kwargs)
+
+        keys = [text_key(s) for s in sentences]
+        rows, cached = self.cache.get_many(keys)
+        missing = np.flatnonzero(rows < 0)
+
+        computed = None
+        if len(missing):
+            computed = np.asarray(
+                self.embedder.encode([sentences[i] for i in missing], **kwargs), dtype=np.float32
+            )
+            self.cache.put_many([keys[i] for i in missing], computed)
+
+        dim = (cached if cached is not None else computed).shape[1]
+        result = np.empty((len(sentences), dim), dtype=np.float32)
+        if cached is not None:
+            result[rows >= 0] = cached
+        if computed is not None:
+            result[missing] = computed
+        return result
+
+    def __getattr__(self, name):
+        # tokenizer, get_sentence_embedding_dimension vb. embedder'dan gelir
+        return getattr(self.embedder, name)
+
+
+def cached_embedder(embedder, model_name=EMBED_CACHE_KEY, path=EMBED_CACHE_PATH):
+    """
+    Cache açıksa embedder'ı CachedEmbedder ile sarar, değilse olduğu gibi döndürür.
+    Hash embedder'ı cache'ten okumaktan daha hızlı olduğundan sarılmaz.
+    """
+    if not EMBED_CACHE_ENABLED or EMBED_BACKEND == "hash":
+        return embedder
+    return CachedEmbedder(embedder, EmbeddingCache(path, model_name))
@@ -0,0 +1,129 @@
+"""
+RAG Chatbot - Önceden Hesaplanmış Örnek Cevaplar
+Web arayüzündeki örnek soruların cevaplarını ve bağlamlarını indeksin yanında
+saklama; koleksiyon sürümü, prompt şablonu veya model değişince yeniden üretme
+
+Kullanım:
+    python src/example_answers.py   # Eksik/eskimiş örnek cevapları üret (build adımı)
+"""
+
+import hashlib
+import io
+import json
+import os
+import threading
+
+from config import MANIFEST_PATH, EXAMPLE_QUESTIONS, EXAMPLE_ANSWERS_PATH
+from ingest import load_manifest
+from prompt import PROMPT_TEMPLATE
+
+
+def model_label(model):
+    """
+    Modelin adı ("gemini-1.5-flash"); ResilientModel sarmalayıcısı açılır
+    """
+    inner = getattr(model, "model", model)
+    name = getattr(inner, "model_name", None) or (inner if isinstance(inner, str) else None)
+    name = name or type(inner).__name__
+    return name[len("models/"):] if name.startswith("models/") else name
+
+
+def examples_key(model_name, manifest_path=MANIFEST_PATH):
+    """
+    Cevapların geçerli olduğu durumun anahtarı: koleksiyon sürümü, prompt
+    şablonunun hash'i ve LLM modeli. Bunlardan biri değişince cevaplar yeniden üretilir.
+    """
+    state = {
+        "version": load_manifest(manifest_path).get("version"),
+        "prompt": hashlib.sha256(PROMPT_TEMPLATE.encode("utf-8")).hexdigest(),
+        "model": model_name,
+    }
+    return hashlib.sha256(json.dumps(state, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+class ExampleAnswers:
+    """
+    Örnek soru -> (cevap, bağlam) deposu.
+
+    Dosyadaki cevaplar yalnızca anahtar (examples_key) eşleşirse yüklenir.
+    `precompute` eksik soruları batch_answer ile cevaplayıp dosyayı atomik
+    olarak yeniden yazar; arka plan thread'inde çalıştırılabilir, `get`
+    bu sırada hazır olan cevapları döndürür.
+    """
+
+    def __init__(self, key, path=EXAMPLE_ANSWERS_PATH):
+        self.key = key
+        self.path = path
+        self.answers = {}
+        self._lock = threading.Lock()
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            stored = {}
+        if stored.get("key") == key:
+            self.answers = stored.get("answers", {})
+
+    @classmethod
+    def for_model(cls, model, path=EXAMPLE_ANSWERS_PATH, manifest_path=MANIFEST_PATH):
+        return cls(examples_key(model_label(model), manifest_path), path)
+
+    def get(self, question):
+        """
+        Sorunun hazır (cevap, bağlam) ikilisi, yoksa None
+        """
+        with self._lock:
+            entry = self.answers.get(question)
+        return None if entry is None else (entry["answer"], entry["context"])
+
+    def missing(self, questions=EXAMPLE_QUESTIONS):
+        with self._lock:
+            return [question for question in questions if question not in self.answers]
+
+    def precompute(self, model, embedder, collection, questions=EXAMPLE_QUESTIONS):
+        """
+        Eksik soruları cevaplayıp kaydeder; üretilen cevap sayısını döndürür
+        """
+        import asyncio
+        from batch_answer import answer_all
+
+        todo = self.missing(questions)
+        if not todo:
+            return 0
+        out = io.StringIO()
+        asyncio.run(answer_all(model, embedder, collection, [(q, q, None) for q in todo], out,
+                               concurrency=len(todo)))
+        records = [json.loads(line) for line in out.getvalue().splitlines()]
+        with self._lock:
+            for record in records:
+                self.answers[record["id"]] = {"answer": record["answer"], "context": record["context"]}
+            self._save()
+        return len(records)
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"key": self.key, "answers": self.answers}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+def main():
+    from rag_pipeline import setup_rag_pipeline
+
+    model, embedder, collection = setup_rag_pipeline()
+    if not all([model, embedder, collection]):
+        return
+
+    examples = ExampleAnswers.for_model(model)
+    missing = examples.missing()
+    if not missing:
+        print(f"Ornek cevaplar guncel ({examples.path})")
+        return
+    print(f"{len(missing)} ornek soru cevaplaniyor...")
+    done = examples.precompute(model, embedder, collection)
+    print(f"{done}/{len(missing)} ornek cevap yazildi: {examples.path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""
+RAG Chatbot - Toplu Ingestion
+Metinleri batch'ler halinde embed edip vector database'e büyük parçalar halinde yazma
+"""
+
+import hashlib
+import json
+import os
+import time
+from itertools import count, islice, repeat
+
+from config import EMBED_MODEL_NAME, MANIFEST_PATH, ENCODE_BATCH_SIZE, WRITE_CHUNK_SIZE
+
+
+def _chunked(iterable, size):
+    """
+    Bir iterable'ı en fazla `size` elemanlık listelere böler
+    """
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def bulk_ingest(collection, embedder, texts, ids=None, metadatas=None,
+                batch_size=ENCODE_BATCH_SIZE, write_chunk_size=WRITE_CHUNK_SIZE,
+                upsert=False, progress_callback=None):
+    """
+    Metinleri batch'li encode eder ve koleksiyona toplu olarak yazar.
+
+    Her `write_chunk_size` kayıt tek bir add/upsert çağrısıyla yazılır, encode
+    işlemi ise bu parça içinde `batch_size`'lık forward pass'lerle yapılır.
+    `texts` liste veya generator olabilir; bellekte yalnızca bir yazım parçası
+    tutulur. `ids` verilmezse sıra numaraları kullanılır. `progress_callback(done,
+    total)` her yazımdan sonra çağrılır (uzunluğu bilinmeyen girdide total None).
+    Throughput istatistiklerini döndürür.
+    """
+    total = len(texts) if hasattr(texts, "__len__") else None
+    records = zip(
+        ids if ids is not None else (str(i) for i in count()),
+        texts,
+        metadatas if metadatas is not None else repeat(None),
+    )
+    return ingest_records(collection, embedder, records, total, batch_size,
+                          write_chunk_size, upsert, progress_callback)
+
+
+def ingest_records(collection, embedder, records, total=None, batch_size=ENCODE_BATCH_SIZE,
+                   write_chunk_size=WRITE_CHUNK_SIZE, upsert=False, progress_callback=None):
+    """
+    (id, metin, metadata) kayıt akışını parça parça encode edip koleksiyona yazar
+    """
+    write = collection.upsert if upsert else collection.add
+    stats = {"docs": 0, "bytes": 0, "encode_seconds": 0.0, "write_seconds": 0.0}
+    start = time.perf_counter()
+
+    for chunk in _chunked(records, write_chunk_size):
+        chunk_ids = [r[0] for r in chunk]
+        chunk_texts = [r[1] for r in chunk]
+        chunk_metadatas = [r[2] for r in chunk]
+
+        t0 = time.perf_counter()
+        embeddings = embedder.encode(
+            chunk_texts, batch_size=batch_size, show_progress_bar=False
+        ).tolist()
+        t1 = time.perf_counter()
+
+        kwargs = {"ids": chunk_ids, "embeddings": embeddings, "documents": chunk_texts}
+        if any(m is not None for m in chunk_metadatas):
+            kwargs["metadatas"] = chunk_metadatas
+        write(**kwargs)
+        t2 = time.perf_counter()
+
+        stats["docs"] += len(chunk)
+        stats["bytes"] += sum(len(t.encode("utf-8")) for t in chunk_texts)
+        stats["encode_seconds"] += t1 - t0
+        stats["write_seconds"] += t2 - t1
+
+        if progress_callback:
+            progress_callback(stats["docs"], total)
+
+    elapsed = time.perf_counter() - start
+    stats["seconds"] = elapsed
+    stats["docs_per_s"] = stats["docs"] / elapsed if elapsed > 0 else 0.0
+    stats["mb_per_s"] = stats["bytes"] / (1024 * 1024) / elapsed if elapsed > 0 else 0.0
+    return stats
+
+
+def format_stats(stats):
+    """
+    Ingestion istatistiklerini tek satırlık özet olarak döndürür
+    """
+    diff = ""
+    if "added" in stats:
+        diff = f"+{stats['added']} / -{stats['removed']} / ={stats['unchanged']}; "
+    return (
+        f"{diff}{stats['docs']} metin, {stats['bytes'] / 1024:.1f} KB, {stats['seconds']:.2f} sn "
+        f"({stats['docs_per_s']:.1f} metin/sn, {stats['mb_per_s']:.2f} MB/sn; "
+        f"encode {stats['encode_seconds']:.2f} sn, yazma {stats['write_seconds']:.2f} sn)"
+    )
+
+
+# Id'ye giren metadata alanları. "chunk" (sıra numarası) ve "source" (dosya
+# yolu) saklanır ama id'ye girmez; aksi halde tek bir düzenleme sonraki tüm
+# parçaların id'sini değiştirir ve hepsi yeniden embed edilir.
+ID_FIELDS = ("chapter", "chapter_title")
+
+
+def content_id(text, metadata=None):
+    """
+    Metin ve metadata'nın kararlı alanlarından (ID_FIELDS) doküman id'si üretir
+    """
+    h = hashlib.sha1(text.encode("utf-8"))
+    stable = {key: metadata[key] for key in ID_FIELDS if key in metadata} if metadata else None
+    if stable:
+        h.update(json.dumps(stable, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+    return h.hexdigest()
+
+
+def collection_version(ids):
+    """
+    Koleksiyondaki id kümesinden kısa bir sürüm etiketi üretir
+    """
+    h = hashlib.sha1()
+    for doc_id in sorted(ids):
+        h.update(doc_id.encode("utf-8"))
+    return h.hexdigest()[:12]
+
+
+def load_manifest(path=MANIFEST_PATH):
+    """
+    Kayıtlı manifest'i okur, yoksa boş manifest döndürür
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {"model": None, "version": None, "ids": []}
+
+
+def save_manifest(manifest, path=MANIFEST_PATH):
+    """
+    Manifest'i atomik olarak diske yazar
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def split_record(record):
+    """
+    Düz metin veya {"text", "metadata"} kaydını (metin, metadata) çiftine çevirir
+    """
+    if isinstance(record, str):
+        return record, None
+    return record["text"], record.get("metadata")
+
+
+def known_ids(collection, manifest_path=MANIFEST_PATH, model_name=EMBED_MODEL_NAME):
+    """
+    Koleksiyondaki id'leri ve bunların yeniden embed gerektirmeyen kısmını döndürür.
+
+    Manifest koleksiyonla uyuşmuyorsa (ilk çalıştırma, silinmiş veritabanı) id'ler
+    koleksiyondan okunur; embedding modeli değiştiyse hiçbiri güncel sayılmaz.
+    """
+    manifest = load_manifest(manifest_path)
+    known = set(manifest.get("ids", []))
+    if collection.count() != len(known):
+        known = set(collection.get(include=[])["ids"])
+    if manifest.get("model") not in (None, model_name):
+        print(f"Embedding modeli degisti ({manifest['model']} -> {model_name}), tum metinler yeniden embed edilecek")
+        return known, set()
+    return known, known
+
+
+def finish_sync(collection, known, seen, stats, unchanged, manifest_path=MANIFEST_PATH,
+                model_name=EMBED_MODEL_NAME, write_chunk_size=WRITE_CHUNK_SIZE):
+    """
+    Artık bulunmayan id'leri siler, store'u kalıcı hale getirir ve manifest'i yazar.
+    `seen` bu çalıştırmada görülen id'lerin sıralı kümesidir (dict).
+    """
+    removed = [doc_id for doc_id in known if doc_id not in seen]
+    for chunk in _chunked(removed, write_chunk_size):
+        collection.delete(ids=chunk)
+
+    # NumPy/FAISS store'ları diske açıkça yazılır (Chroma kendisi kalıcıdır)
+    persist = getattr(collection, "persist", None)
+    if callable(persist):
+        persist()
+
+    version = collection_version(seen)
+    save_manifest({"model": model_name, "version": version, "ids": list(seen)}, manifest_path)
+
+    stats.update({
+        "added": stats["docs"],
+        "removed": len(removed),
+        "unchanged": unchanged,
+        "version": version,
+    })
+    return stats
+
+
+def sync_collection(collection, embedder, chunks, manifest_path=MANIFEST_PATH,
+                    model_name=EMBED_MODEL_NAME, **ingest_kwargs):
+    """
+    Koleksiyonu verilen parçalarla artımlı olarak eşitler.
+
+    `chunks` düz metinler veya chunker'ın ürettiği {"text", "metadata"}
+    sözlükleri olabilir ve akış olarak işlenir; bellekte yalnızca id kümeleri
+    ve bir yazım parçası tutulur. Id'ler içerik hash'idir; yalnızca yeni/değişen
+    parçalar embed edilip upsert edilir, artık bulunmayanlar silinir.
+    """
+    known, known_current = known_ids(collection, manifest_path, model_name)
+    seen = {}  # id -> None; ekleme sırasını koruyan küme
+    unchanged = 0
+
+    def pending():
+        nonlocal unchanged
+        for record in chunks:
+            text, metadata = split_record(record)
+            doc_id = content_id(text, metadata)
+            if doc_id in seen:
+                continue
+            seen[doc_id] = None
+            if doc_id in known_current:
+                unchanged += 1
+                continue
+            yield doc_id, text, metadata
+
+    stats = ingest_records(collection, embedder, pending(), upsert=True, **ingest_kwargs)
+    return finish_sync(
+        collection, known, seen, stats, unchanged, manifest_path, model_name,
+        ingest_kwargs.get("write_chunk_size", WRITE_CHUNK_SIZE),
+    )
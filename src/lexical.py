@@ -0,0 +1,167 @@
+"""
+RAG Chatbot - BM25 Sözcüksel İndeks
+Türkçe küçük harf (İ/ı) ve aksan katlamalı ters indeks; vektör aramayla
+birleştirilen (hybrid) ilk aşama ve anahtar kelime sorgularında embedder'ı atlayan hızlı yol
+"""
+
+import os
+import re
+import threading
+
+import numpy as np
+
+from config import (
+    MANIFEST_PATH, RETRIEVAL_MODE, BM25_K1, BM25_B, LEXICAL_PREFIX_LEN,
+    LEXICAL_FAST_PATH, LEXICAL_MAX_TERMS
+)
+from textnorm import turkish_casefold, fold_diacritics
+from vector_store import _matches
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+# Aksanları katlanmış yaygın Türkçe bağlaç, edat ve soru sözcükleri
+STOPWORDS = frozenset("""
+    ve veya ile ama fakat ancak ki de da mi mu bu su o bir her hem ne icin gibi kadar daha en
+    cok az nasil neden nicin niye nedir nerede hangi kim kimi olan olarak ise eger
+    sen ben biz siz onlar beni seni onu bunu sunu bana sana ona
+""".split())
+
+
+def tokenize(text, prefix_len=LEXICAL_PREFIX_LEN):
+    """
+    Metni indeks terimlerine böler.
+
+    Türkçe kurallarıyla küçük harfe çevrilir, aksanlar katlanır ("Düşmanı" ->
+    "dusmani"), bağlaçlar/soru sözcükleri atılır ve terimler ilk `prefix_len`
+    harfine kısaltılır (Türkçe ekleri için basit kök bulma; 0: kısaltma yok).
+    """
+    words = _WORD.findall(fold_diacritics(turkish_casefold(text)))
+    terms = [w for w in words if w not in STOPWORDS]
+    if prefix_len:
+        terms = [w[:prefix_len] for w in terms]
+    return terms
+
+
+class BM25Index:
+    """
+    Bellek içi ters indeks ve Okapi BM25 skorlama.
+
+    Her terim için dokümanların satır numaraları ve terim frekansları NumPy
+    dizilerinde tutulur; sorgu skoru yalnızca sorgu terimlerinin listeleri
+    üzerinden toplanır. İndeks salt okunurdur, koleksiyon değişince yeniden kurulur.
+    """
+
+    def __init__(self, ids, documents, metadatas=None, k1=BM25_K1, b=BM25_B,
+                 prefix_len=LEXICAL_PREFIX_LEN):
+        self.ids = list(ids)
+        self.documents = list(documents)
+        self.metadatas = list(metadatas) if metadatas is not None else [None] * len(self.ids)
+        self.k1 = k1
+        self.b = b
+        self.prefix_len = prefix_len
+
+        postings = {}
+        lengths = np.zeros(len(self.documents), dtype=np.float32)
+        for row, text in enumerate(self.documents):
+            terms = tokenize(text or "", prefix_len)
+            lengths[row] = len(terms)
+            counts = {}
+            for term in terms:
+                counts[term] = counts.get(term, 0) + 1
+            for term, tf in counts.items():
+                postings.setdefault(term, ([], []))
+                postings[term][0].append(row)
+                postings[term][1].append(tf)
+
+        n = len(self.documents)
+        avg_length = float(lengths.mean()) if n else 0.0
+        # Doküman uzunluk normalizasyonu her sorguda yeniden hesaplanmasın
+        self._norm = k1 * (1 - b + b * lengths / avg_length) if avg_length else np.full(n, k1, np.float32)
+        self._postings = {}
+        for term, (rows, tfs) in postings.items():
+            df = len(rows)
+            idf = np.log(1 + (n - df + 0.5) / (df + 0.5))
+            self._postings[term] = (np.array(rows, dtype=np.int64), np.array(tfs, dtype=np.float32), idf)
+
+    @classmethod
+    def from_collection(cls, collection, **kwargs):
+        """
+        Vector store'daki tüm dokümanlardan indeks kurar
+        """
+        data = collection.get(include=["documents", "metadatas"])
+        return cls(data["ids"], data["documents"], data.get("metadatas"), **kwargs)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, term):
+        return term in self._postings
+
+    def search(self, query, k=10, where=None):
+        """
+        Sorguya en yüksek BM25 skorlu `k` dokümanı döndürür.
+        Dönen sözlük: ids, documents, scores (skoru 0 olanlar dahil edilmez).
+        """
+        scores = np.zeros(len(self.ids), dtype=np.float32)
+        for term in set(tokenize(query, self.prefix_len)):
+            entry = self._postings.get(term)
+            if entry is None:
+                continue
+            rows, tfs, idf = entry
+            scores[rows] += idf * tfs * (self.k1 + 1) / (tfs + self._norm[rows])
+
+        if where:
+            mask = np.array([_matches(m, where) for m in self.metadatas], dtype=bool)
+            scores[~mask] = 0
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        order = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return {
+            "ids": [self.ids[row] for row in order],
+            "documents": [self.documents[row] for row in order],
+            "scores": [float(scores[row]) for row in order],
+        }
+
+
+_indexes = {}
+_lock = threading.Lock()
+
+
+def index_for(collection, manifest_path=MANIFEST_PATH):
+    """
+    Koleksiyonun BM25 indeksini döndürür; ilk çağrıda kurar.
+
+    Kayıt sayısı değiştiyse veya manifest yeniden yazıldıysa (yeniden
+    indeksleme) indeks yeniden kurulur.
+    """
+    try:
+        mtime = os.stat(manifest_path).st_mtime
+    except OSError:
+        mtime = None
+    key = (collection.count(), mtime)
+    with _lock:
+        cached = _indexes.get(id(collection))
+        if cached is None or cached[0] is not collection or cached[1] != key:
+            cached = _indexes[id(collection)] = (collection, key, BM25Index.from_collection(collection))
+        return cached[2]
+
+
+def is_keyword_query(query, index, max_terms=LEXICAL_MAX_TERMS):
+    """
+    Sorgu kısa bir anahtar kelime listesi mi: soru sözcüğü/bağlaç içermez,
+    en fazla `max_terms` terimden oluşur ve tüm terimler indekste geçer
+    """
+    words = _WORD.findall(fold_diacritics(turkish_casefold(query)))
+    if not words or len(words) > max_terms or any(w in STOPWORDS for w in words):
+        return False
+    return all(term in index for term in tokenize(query, index.prefix_len))
+
+
+def use_lexical_fast_path(collection, query):
+    """
+    Hybrid modda anahtar kelime sorgularında embedder ve vektör arama atlanır
+    """
+    if RETRIEVAL_MODE != "hybrid" or not LEXICAL_FAST_PATH:
+        return False
+    return is_keyword_query(query, index_for(collection))
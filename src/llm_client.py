@@ -0,0 +1,365 @@
+"""
+RAG Chatbot - Dayanıklı Gemini İstemcisi
+Bağlantı havuzlu REST istemcisi; süre sınırı, geçici hatalarda üstel geri
+çekilmeli tekrar, token bucket hız sınırlama ve yavaş isteklerde hedging
+"""
+
+import asyncio
+import json
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from config import (
+    GEMINI_TRANSPORT, GEMINI_BASE_URL, LLM_POOL_SIZE, LLM_TIMEOUT, LLM_DEADLINE, LLM_RETRIES,
+    LLM_BACKOFF, LLM_MAX_BACKOFF, LLM_RATE_LIMIT, LLM_RATE_BURST, LLM_HEDGE_AFTER
+)
+from metrics import default_registry as metrics
+
+metrics.describe("rag_llm_attempts_total", "LLM denemeleri (ok, error, timeout)")
+metrics.describe("rag_llm_hedges_total", "Hedging istekleri ve kazanan deneme")
+metrics.describe("rag_llm_rate_limit_wait_seconds_total", "Hiz sinirlayicida beklenen toplam sure")
+
+# Tekrar denenen HTTP durum kodları
+TRANSIENT_STATUSES = {408, 429, 500, 502, 503, 504}
+# google.api_core'daki geçici hata sınıfları (SDK import edilmeden adla kontrol edilir)
+_TRANSIENT_SDK_ERRORS = {
+    "ResourceExhausted", "ServiceUnavailable", "DeadlineExceeded", "InternalServerError",
+    "TooManyRequests", "GatewayTimeout", "BadGateway",
+}
+
+
+class GeminiHTTPError(Exception):
+    """
+    Gemini REST API'sinin başarısız cevabı
+    """
+
+    def __init__(self, status, message, retry_after=None):
+        super().__init__(f"HTTP {status}: {message}")
+        self.status = status
+        self.retry_after = retry_after
+
+
+class LLMTimeoutError(TimeoutError):
+    """
+    Deneme veya toplam süre sınırı aşıldı
+    """
+
+
+def is_transient(error):
+    """
+    Hata tekrar denemeye değer mi (kota, sunucu hatası, bağlantı/zaman aşımı)
+    """
+    if isinstance(error, GeminiHTTPError):
+        return error.status in TRANSIENT_STATUSES
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    names = {cls.__name__ for cls in type(error).__mro__}
+    # requests.ConnectionError / requests.Timeout ve SDK hataları
+    return bool(names & (_TRANSIENT_SDK_ERRORS | {"ConnectionError", "Timeout", "ChunkedEncodingError"}))
+
+
+class LLMResponse:
+    """
+    Gemini cevabı gibi davranan basit nesne (`.text`)
+    """
+
+    def __init__(self, text):
+        self.text = text
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: saniyede `rate` token dolar, en fazla `capacity` birikir
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = max(capacity, 1)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _take(self):
+        """
+        Token varsa alıp 0, yoksa bir token dolana kadar geçecek süreyi döndürür
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def try_acquire(self):
+        return not self._take()
+
+    def acquire(self, timeout=None):
+        """
+        Token alınana kadar bekler; `timeout` içinde alınamazsa False döner
+        """
+        start = time.monotonic()
+        while True:
+            wait_for = self._take()
+            if not wait_for:
+                metrics.inc("rag_llm_rate_limit_wait_seconds_total", time.monotonic() - start)
+                return True
+            if timeout is not None and time.monotonic() - start + wait_for > timeout:
+                return False
+            time.sleep(wait_for)
+
+    async def acquire_async(self, timeout=None):
+        """
+        acquire'ın event loop'u bloklamayan karşılığı
+        """
+        start = time.monotonic()
+        while True:
+            wait_for = self._take()
+            if not wait_for:
+                metrics.inc("rag_llm_rate_limit_wait_seconds_total", time.monotonic() - start)
+                return True
+            if timeout is not None and time.monotonic() - start + wait_for > timeout:
+                return False
+            await asyncio.sleep(wait_for)
+
+
+class GeminiRestModel:
+    """
+    genai.GenerativeModel arayüzünü (generate_content, stream=True) sunan REST istemcisi.
+
+    Tek bir requests.Session ve `pool_size` bağlantılık havuz kullanılır; TLS
+    bağlantıları istekler arasında yeniden kullanılır. HTTP hataları
+    GeminiHTTPError olarak yükseltilir (429'da Retry-After başlığı korunur).
+    """
+
+    def __init__(self, model_name, api_key, base_url=GEMINI_BASE_URL, timeout=LLM_TIMEOUT,
+                 pool_size=LLM_POOL_SIZE):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.model = model_name if model_name.startswith("models/") else f"models/{model_name}"
+        self.model_name = self.model  # genai.GenerativeModel ile aynı ("models/..." biçiminde)
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["x-goog-api-key"] = api_key
+
+    def _post(self, method, prompt, **kwargs):
+        response = self.session.post(
+            f"{self.base_url}/v1beta/{self.model}:{method}",
+            json={"contents": [{"role": "user", "parts": [{"text": prompt}]}]},
+            timeout=self.timeout, **kwargs,
+        )
+        if response.status_code >= 400:
+            retry_after = response.headers.get("Retry-After")
+            raise GeminiHTTPError(response.status_code, response.text[:200],
+                                  float(retry_after) if retry_after else None)
+        return response
+
+    @staticmethod
+    def _text(payload):
+        candidates = payload.get("candidates") or []
+        if not candidates:
+            raise ValueError(f"Gemini cevap uretmedi: {payload.get('promptFeedback')}")
+        parts = candidates[0].get("content", {}).get("parts", [])
+        return "".join(part.get("text", "") for part in parts)
+
+    def generate_content(self, prompt, stream=False):
+        if stream:
+            return self._stream(prompt)
+        return LLMResponse(self._text(self._post("generateContent", prompt).json()))
+
+    def _stream(self, prompt):
+        # İstek ilk parça istendiğinde gönderilir
+        with self._post("streamGenerateContent", prompt, params={"alt": "sse"}, stream=True) as response:
+            for line in response.iter_lines(decode_unicode=True):
+                if line and line.startswith("data:"):
+                    text = self._text(json.loads(line[len("data:"):]))
+                    if text:
+                        yield LLMResponse(text)
+
+    def close(self):
+        self.session.close()
+
+
+class ResilientModel:
+    """
+    Herhangi bir `generate_content` modelini saran dayanıklılık katmanı.
+
+    Her deneme thread havuzunda çalışır ve en fazla `timeout` saniye beklenir;
+    geçici hatalarda (429, 5xx, bağlantı/zaman aşımı) jitter'lı üstel geri
+    çekilmeyle `retries` kez tekrar denenir, toplam süre `deadline`'ı aşmaz.
+    Her deneme öncesi hız sınırlayıcıdan token alınır. `hedge_after` > 0 ise
+    ilk deneme o kadar sürede bitmediğinde (token varsa) ikinci bir istek
+    gönderilir ve önce başarılı olan kullanılır. Streaming'de yalnızca ilk
+    parça gelene kadar tekrar denenir; hedging uygulanmaz.
+
+    `generate_content_async`, iç model async API sunuyorsa (genai SDK) aynı
+    tekrar, süre ve hız sınırı kurallarını event loop'ta uygular (hedging
+    yapılmaz); sunmuyorsa (REST istemcisi, stub) senkron yolu thread'de çalıştırır.
+    """
+
+    def __init__(self, model, timeout=LLM_TIMEOUT, deadline=LLM_DEADLINE, retries=LLM_RETRIES,
+                 backoff=LLM_BACKOFF, max_backoff=LLM_MAX_BACKOFF, rate_limit=LLM_RATE_LIMIT,
+                 burst=LLM_RATE_BURST, hedge_after=LLM_HEDGE_AFTER, pool_size=LLM_POOL_SIZE):
+        self.model = model
+        self.timeout = timeout
+        self.deadline = deadline
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.hedge_after = hedge_after
+        # Dakikalık kota -> saniyedeki token
+        self.limiter = TokenBucket(rate_limit / 60.0, burst) if rate_limit > 0 else None
+        # Süresi dolan denemeler arka planda bitene kadar thread tutabilir
+        self._executor = ThreadPoolExecutor(max_workers=pool_size * 2, thread_name_prefix="llm")
+
+    def _acquire(self, remaining):
+        if self.limiter is not None and not self.limiter.acquire(timeout=remaining):
+            raise LLMTimeoutError("Hiz siniri nedeniyle sure siniri asildi")
+
+    def _attempt(self, fn, remaining, hedge):
+        """
+        Tek deneme (hedging dahil); `remaining` saniyeden uzun sürerse LLMTimeoutError
+        """
+        limit = min(self.timeout, remaining)
+        primary = self._executor.submit(fn)
+        if not hedge or not self.hedge_after or self.hedge_after >= limit:
+            # result(timeout=...) kullanılmaz: FutureTimeout Python 3.11+'ta TimeoutError'dır
+            # ve `fn`'in kendi zaman aşımı (ör. soket) deneme süresinin dolmasıyla karışır
+            done, _ = wait([primary], timeout=limit)
+            if not done:
+                metrics.inc("rag_llm_attempts_total", result="timeout")
+                raise LLMTimeoutError(f"LLM {limit:.1f} sn icinde cevap vermedi")
+            result = primary.result()
+            metrics.inc("rag_llm_attempts_total", result="ok")
+            return result
+
+        start = time.monotonic()
+        done, _ = wait([primary], timeout=self.hedge_after)
+        futures = [primary]
+        if not done and (self.limiter is None or self.limiter.try_acquire()):
+            futures.append(self._executor.submit(fn))
+        pending = set(futures)
+        error = None
+        while pending:
+            left = limit - (time.monotonic() - start)
+            done, pending = wait(pending, timeout=max(left, 0), return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                if future.exception() is None:
+                    if len(futures) > 1:
+                        metrics.inc("rag_llm_hedges_total", winner="primary" if future is primary else "hedge")
+                    metrics.inc("rag_llm_attempts_total", result="ok")
+                    return future.result()
+                error = future.exception()
+        if error is not None and not pending:
+            raise error
+        metrics.inc("rag_llm_attempts_total", result="timeout")
+        raise LLMTimeoutError(f"LLM {limit:.1f} sn icinde cevap vermedi")
+
+    def _retry_delay(self, error, attempt, start):
+        """
+        Başarısız denemeden sonra beklenecek süre; tekrar denenmeyecekse None
+        """
+        if not isinstance(error, LLMTimeoutError):
+            metrics.inc("rag_llm_attempts_total", result="error")
+        if attempt == self.retries or not is_transient(error):
+            return None
+        delay = min(self.max_backoff, self.backoff * 2 ** attempt) * random.uniform(0.5, 1.0)
+        delay = max(delay, getattr(error, "retry_after", None) or 0)
+        if time.monotonic() - start + delay >= self.deadline:
+            return None
+        print(f"LLM hatasi ({error}), {delay:.1f} sn sonra tekrar denenecek ({attempt + 1}/{self.retries})")
+        return delay
+
+    def _call(self, fn, hedge=True):
+        start = time.monotonic()
+        for attempt in range(self.retries + 1):
+            remaining = self.deadline - (time.monotonic() - start)
+            if remaining <= 0:
+                raise LLMTimeoutError(f"LLM cagrisi {self.deadline:.0f} sn icinde tamamlanamadi")
+            self._acquire(remaining)
+            try:
+                return self._attempt(fn, self.deadline - (time.monotonic() - start), hedge)
+            except Exception as e:
+                delay = self._retry_delay(e, attempt, start)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+
+    async def _call_async(self, fn):
+        start = time.monotonic()
+        for attempt in range(self.retries + 1):
+            remaining = self.deadline - (time.monotonic() - start)
+            if remaining <= 0:
+                raise LLMTimeoutError(f"LLM cagrisi {self.deadline:.0f} sn icinde tamamlanamadi")
+            if self.limiter is not None and not await self.limiter.acquire_async(timeout=remaining):
+                raise LLMTimeoutError("Hiz siniri nedeniyle sure siniri asildi")
+            limit = min(self.timeout, self.deadline - (time.monotonic() - start))
+            try:
+                # wait_for yerine wait: modelin kendi TimeoutError'ı deneme süresinin dolmasıyla karışmaz
+                task = asyncio.ensure_future(fn())
+                done, _ = await asyncio.wait({task}, timeout=limit)
+                if not done:
+                    task.cancel()
+                    metrics.inc("rag_llm_attempts_total", result="timeout")
+                    raise LLMTimeoutError(f"LLM {limit:.1f} sn icinde cevap vermedi")
+                result = task.result()
+                metrics.inc("rag_llm_attempts_total", result="ok")
+                return result
+            except Exception as e:
+                delay = self._retry_delay(e, attempt, start)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+
+    def generate_content(self, prompt, stream=False):
+        if stream:
+            return self._stream(prompt)
+        return self._call(lambda: self.model.generate_content(prompt))
+
+    async def generate_content_async(self, prompt):
+        generate_async = getattr(self.model, "generate_content_async", None)
+        if generate_async is None:
+            # Denemeler zaten self._executor'da çalıştığından dış çağrı varsayılan havuzda bekler
+            return await asyncio.get_running_loop().run_in_executor(None, self.generate_content, prompt)
+        return await self._call_async(lambda: generate_async(prompt))
+
+    def _stream(self, prompt):
+        def first_chunk():
+            chunks = iter(self.model.generate_content(prompt, stream=True))
+            return next(chunks, None), chunks
+
+        first, chunks = self._call(first_chunk, hedge=False)
+        if first is None:
+            return
+        yield first
+        yield from chunks
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        close = getattr(self.model, "close", None)
+        if callable(close):
+            close()
+
+
+def create_gemini_model(genai, model_name, api_key, transport=GEMINI_TRANSPORT):
+    """
+    Ayarlanan taşıma katmanıyla Gemini modelini oluşturup ResilientModel ile sarar
+    """
+    if transport == "rest":
+        model = GeminiRestModel(model_name, api_key)
+    else:
+        model = genai.GenerativeModel(model_name)
+    return ResilientModel(model)
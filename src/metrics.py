@@ -0,0 +1,205 @@
+"""
+RAG Chatbot - Gecikme Ölçümü ve Metrikler
+İstek başına aşama süreleri (span), sayaçlar ve Prometheus metin formatında dışa aktarım
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+# Aşama süreleri için histogram sınırları (saniye)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Arayüzde gösterim sırası
+STAGES = ("condense", "encode", "search", "prompt", "ttft", "generation", "render")
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+class MetricsRegistry:
+    """
+    Thread-safe sayaç ve histogram deposu.
+
+    Metrikler (ad, etiketler) ile anahtarlanır ve ilk kullanımda oluşur.
+    `register_callback` ile kendi istatistiğini tutan bileşenler (cache'ler,
+    micro-batcher) dışa aktarım anında okunur. `render()` Prometheus metin
+    formatını (0.0.4) döndürür.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._counters = {}
+        self._histograms = {}
+        self._help = {}
+        self._callbacks = {}
+        self._lock = threading.Lock()
+
+    def describe(self, name, help_text):
+        self._help[name] = help_text
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    hist["buckets"][i] += 1
+            hist["sum"] += value
+            hist["count"] += 1
+
+    def register_callback(self, name, metric_type, help_text, fn):
+        """
+        Değeri dışa aktarım anında `fn()` ile okunan metrik ekler (aynı ad tekrar
+        kaydedilirse eskisinin yerine geçer). `fn()` tek bir sayı veya
+        {((etiket, değer), ...): sayı} sözlüğü döndürür.
+        """
+        self._callbacks[name] = (metric_type, help_text, fn)
+
+    def counter_values(self, name):
+        """
+        Bir sayacın etiket -> değer sözlüğü
+        """
+        with self._lock:
+            return {labels: v for (n, labels), v in self._counters.items() if n == name}
+
+    def histogram_stats(self, name):
+        """
+        Bir histogramın etiket -> {"count", "sum"} sözlüğü
+        """
+        with self._lock:
+            return {
+                labels: {"count": h["count"], "sum": h["sum"]}
+                for (n, labels), h in self._histograms.items() if n == name
+            }
+
+    def render(self):
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(
+                (key, {"buckets": list(h["buckets"]), "sum": h["sum"], "count": h["count"]})
+                for key, h in self._histograms.items()
+            )
+
+        typed = set()
+
+        def header(name, metric_type):
+            if name in typed:
+                return
+            typed.add(name)
+            if name in self._help:
+                lines.append(f"# HELP {name} {self._help[name]}")
+            lines.append(f"# TYPE {name} {metric_type}")
+
+        for (name, labels), value in counters:
+            header(name, "counter")
+            lines.append(f"{name}{_labels(labels)} {value}")
+
+        for (name, labels), hist in histograms:
+            header(name, "histogram")
+            for bound, count in zip(self.buckets, hist["buckets"]):
+                lines.append(f"{name}_bucket{_labels(labels + (('le', bound),))} {count}")
+            lines.append(f"{name}_bucket{_labels(labels + (('le', '+Inf'),))} {hist['count']}")
+            lines.append(f"{name}_sum{_labels(labels)} {hist['sum']}")
+            lines.append(f"{name}_count{_labels(labels)} {hist['count']}")
+
+        for name, (metric_type, help_text, fn) in list(self._callbacks.items()):
+            try:
+                values = fn()
+            except Exception:
+                continue
+            if not isinstance(values, dict):
+                values = {(): values}
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for labels, value in sorted(values.items()):
+                lines.append(f"{name}{_labels(labels)} {value}")
+
+        return "\n".join(lines) + "\n"
+
+
+# Süreç genelinde paylaşılan varsayılan registry
+default_registry = MetricsRegistry()
+default_registry.describe("rag_stage_seconds", "RAG istegi asama sureleri")
+default_registry.describe("rag_errors_total", "Asama bazinda hata sayisi")
+default_registry.describe("rag_http_requests_total", "Yol ve durum koduna gore HTTP istekleri")
+default_registry.describe("rag_http_request_seconds", "HTTP istek suresi (yanit basliklarina kadar)")
+
+
+class Trace(dict):
+    """
+    Tek bir isteğin aşama süreleri (saniye, aşama adı -> süre).
+
+    Her aşama aynı zamanda registry'deki `rag_stage_seconds{stage=...}`
+    histogramına yazılır. Sözlük olduğundan ek bilgiler (ör. "cached") de
+    tutulabilir. `current` çalışmakta olan aşamadır; aşama hatayla biterse
+    hatanın etiketlenebilmesi için o aşamada kalır.
+    """
+
+    def __init__(self, registry=None):
+        super().__init__()
+        self.registry = default_registry if registry is None else registry
+        self.current = None
+
+    @contextmanager
+    def span(self, stage):
+        start = time.perf_counter()
+        previous, self.current = self.current, stage
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+        self.current = previous
+
+    def record(self, stage, seconds):
+        self[stage] = self.get(stage, 0.0) + seconds
+        self.registry.observe("rag_stage_seconds", seconds, stage=stage)
+
+    def format(self):
+        """
+        "encode 12 ms · search 3 ms · ... · bağlam 310 token (-95)" biçiminde tek satırlık özet
+        """
+        parts = [f"{stage} {self[stage] * 1000:.1f} ms" for stage in STAGES if stage in self]
+        if "context_tokens" in self:
+            parts.append(f"bağlam {self['context_tokens']} token (-{self.get('tokens_saved', 0)})")
+        if "prompt_tokens" in self:
+            parts.append(f"prompt {self['prompt_tokens']} token (geçmiş {self.get('history_tokens', 0)})")
+        return " · ".join(parts)
+
+
+def count_error(stage, registry=None):
+    (default_registry if registry is None else registry).inc("rag_errors_total", stage=stage)
+
+
+def register_cache_metrics(query_cache, answer_cache=None, registry=None):
+    """
+    Sorgu embedding ve cevap cache'lerinin isabet/ıska sayılarını registry'ye bağlar
+    """
+    registry = default_registry if registry is None else registry
+
+    def counts():
+        values = {}
+        for name, cache in (("query_embedding", query_cache), ("answer", answer_cache)):
+            if cache is None:
+                continue
+            stats = cache.stats()
+            values[(("cache", name), ("result", "hit"))] = stats["hits"]
+            values[(("cache", name), ("result", "miss"))] = stats["misses"]
+        return values
+
+    registry.register_callback("rag_cache_lookups_total", "counter", "Cache isabet/iska sayilari", counts)
@@ -0,0 +1,124 @@
+"""
+RAG Chatbot - Dinamik Micro-Batching
+Eşzamanlı gelen tekil sorgu encode isteklerini kısa bir zaman penceresinde
+toplayıp embedder'ı tek batch'li çağrıyla çalıştırma
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+from config import MICROBATCH_MAX_SIZE, MICROBATCH_MAX_WAIT_MS
+
+
+class MicroBatcher:
+    """
+    Embedder'ın önüne konan, aynı `encode` arayüzünü sunan micro-batcher.
+
+    Tek bir metinle yapılan `encode` çağrıları kuyruğa alınır; arka plandaki
+    thread ilk isteği aldıktan sonra en fazla `max_wait_ms` bekleyerek veya
+    `max_batch_size` isteğe ulaşana kadar toplar ve hepsini tek çağrıda encode
+    eder. Liste halinde gelen çağrılar zaten batch'li olduğundan doğrudan
+    embedder'a iletilir.
+    """
+
+    def __init__(self, embedder, max_batch_size=MICROBATCH_MAX_SIZE,
+                 max_wait_ms=MICROBATCH_MAX_WAIT_MS):
+        self.embedder = embedder
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._metrics = {
+            "batches": 0,
+            "items": 0,
+            "max_batch_size": 0,
+            "wait_seconds": 0.0,
+            "encode_seconds": 0.0,
+        }
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="embed-microbatch", daemon=True)
+        self._thread.start()
+
+    def encode(self, sentences, **kwargs):
+        if not isinstance(sentences, str):
+            return self.embedder.encode(sentences, **kwargs)
+        if self._closed:
+            raise RuntimeError("MicroBatcher kapatildi")
+        future = Future()
+        self._queue.put((sentences, future, time.perf_counter()))
+        return future.result()
+
+    def __getattr__(self, name):
+        # tokenizer, get_sentence_embedding_dimension vb. embedder'dan gelir
+        return getattr(self.embedder, name)
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            texts = [item[0] for item in batch]
+            started = time.perf_counter()
+            try:
+                vectors = np.asarray(self.embedder.encode(
+                    texts, batch_size=len(texts), show_progress_bar=False
+                ))
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            finished = time.perf_counter()
+
+            for (_, future, _), vector in zip(batch, vectors):
+                future.set_result(vector)
+
+            with self._lock:
+                m = self._metrics
+                m["batches"] += 1
+                m["items"] += len(batch)
+                m["max_batch_size"] = max(m["max_batch_size"], len(batch))
+                m["wait_seconds"] += sum(started - enqueued for _, _, enqueued in batch)
+                m["encode_seconds"] += finished - started
+
+    def stats(self):
+        with self._lock:
+            m = dict(self._metrics)
+        batches = m["batches"] or 1
+        items = m["items"] or 1
+        return {
+            "batches": m["batches"],
+            "items": m["items"],
+            "avg_batch_size": m["items"] / batches,
+            "max_batch_size": m["max_batch_size"],
+            "avg_wait_ms": m["wait_seconds"] / items * 1000,
+            "avg_encode_ms": m["encode_seconds"] / batches * 1000,
+        }
+
+    def close(self):
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join(timeout=1)
@@ -0,0 +1,199 @@
+"""
+RAG Chatbot - ONNX Embedding Arka Ucu
+SentenceTransformer modelini bir kez ONNX'e aktarıp (isteğe bağlı int8 kuantize)
+ONNX Runtime ile CPU'da çalıştırma; PyTorch vektörleriyle uyum (parity) kontrolü
+
+Kullanım:
+    python src/onnx_embed.py              # Aktar ve PyTorch ile karşılaştır
+    python src/onnx_embed.py --quantize   # int8 modeli de üret
+"""
+
+import argparse
+import json
+import os
+import re
+
+import numpy as np
+
+from config import EMBED_MODEL_NAME, ONNX_MODEL_PATH, ONNX_QUANTIZE, ONNX_THREADS
+
+_POOLING_MODES = ("mean", "cls", "max")
+
+
+def model_dir(model_name=EMBED_MODEL_NAME, path=ONNX_MODEL_PATH):
+    return os.path.join(path, re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name))
+
+
+def export_model(model_name=EMBED_MODEL_NAME, path=ONNX_MODEL_PATH):
+    """
+    Modeli `path/<model>/` altına ONNX olarak aktarır (zaten varsa dokunmaz).
+
+    Yalnızca transformer gövdesi aktarılır (çıktı: last_hidden_state); pooling
+    ve normalizasyon ayarları meta.json'a yazılır ve NumPy'da uygulanır.
+    Tokenizer da aynı klasöre kaydedilir, böylece sonraki açılışlarda PyTorch
+    ve sentence_transformers import edilmez.
+    """
+    target = model_dir(model_name, path)
+    if os.path.exists(os.path.join(target, "model.onnx")) and os.path.exists(os.path.join(target, "meta.json")):
+        return target
+
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    st = SentenceTransformer(model_name, device="cpu")
+    pooling = st[1]
+    if getattr(pooling, "pooling_mode_mean_tokens", False):
+        mode = "mean"
+    elif getattr(pooling, "pooling_mode_cls_token", False):
+        mode = "cls"
+    elif getattr(pooling, "pooling_mode_max_tokens", False):
+        mode = "max"
+    else:
+        raise ValueError(f"Desteklenmeyen pooling: {pooling}")
+
+    auto_model = st[0].auto_model.eval()
+    sample = st.tokenizer(["Savaş sanatı nedir?"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+
+    class HiddenStates(torch.nn.Module):
+        def forward(self, *inputs):
+            return auto_model(**dict(zip(input_names, inputs))).last_hidden_state
+
+    os.makedirs(target, exist_ok=True)
+    axes = {0: "batch", 1: "sequence"}
+    tmp_path = os.path.join(target, "model.onnx.tmp")
+    with torch.no_grad():
+        torch.onnx.export(
+            HiddenStates(), tuple(sample[name] for name in input_names), tmp_path,
+            input_names=input_names, output_names=["last_hidden_state"],
+            dynamic_axes={**{name: axes for name in input_names}, "last_hidden_state": axes},
+            opset_version=14, do_constant_folding=True,
+        )
+    st.tokenizer.save_pretrained(target)
+    with open(os.path.join(target, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({
+            "model": model_name,
+            "dim": st.get_sentence_embedding_dimension(),
+            "max_seq_length": st.max_seq_length,
+            "pooling": mode,
+            "normalize": any(type(module).__name__ == "Normalize" for module in st),
+        }, f, indent=2)
+    # meta.json'dan sonra: model.onnx varsa aktarım tamamlanmıştır
+    os.replace(tmp_path, os.path.join(target, "model.onnx"))
+    return target
+
+
+def quantize_model(target):
+    """
+    Aktarılmış modelin ağırlıklarını dinamik int8'e kuantize eder (zaten varsa dokunmaz)
+    """
+    quantized = os.path.join(target, "model.int8.onnx")
+    if not os.path.exists(quantized):
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        tmp_path = quantized + ".tmp"
+        quantize_dynamic(os.path.join(target, "model.onnx"), tmp_path, weight_type=QuantType.QInt8)
+        os.replace(tmp_path, quantized)
+    return quantized
+
+
+class OnnxEmbedder:
+    """
+    SentenceTransformer.encode arayüzünü sunan ONNX Runtime embedder'ı.
+
+    Model ilk açılışta aktarılır; sonraki açılışlar yalnızca tokenizer ve ONNX
+    oturumunu yükler. Metinler uzunluğa göre sıralanıp batch'lenir (padding
+    azalır), sonuçlar girdiyle aynı sırada döner.
+    """
+
+    def __init__(self, model_name=EMBED_MODEL_NAME, path=ONNX_MODEL_PATH, quantize=ONNX_QUANTIZE,
+                 threads=ONNX_THREADS):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        target = export_model(model_name, path)
+        with open(os.path.join(target, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta["pooling"] not in _POOLING_MODES:
+            raise ValueError(f"Desteklenmeyen pooling: {meta['pooling']}")
+        self.model_name = model_name
+        self.quantized = quantize
+        self.dim = meta["dim"]
+        self.max_seq_length = meta["max_seq_length"]
+        self.pooling = meta["pooling"]
+        self.normalize = meta["normalize"]
+        self.tokenizer = AutoTokenizer.from_pretrained(target)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        model_path = quantize_model(target) if quantize else os.path.join(target, "model.onnx")
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self._inputs = {i.name for i in self.session.get_inputs()}
+
+    def _forward(self, texts):
+        encoded = self.tokenizer(texts, padding=True, truncation=True, max_length=self.max_seq_length,
+                                 return_tensors="np")
+        feeds = {name: value.astype(np.int64) for name, value in encoded.items() if name in self._inputs}
+        hidden = self.session.run(None, feeds)[0]
+        mask = encoded["attention_mask"][..., None].astype(np.float32)
+        if self.pooling == "cls":
+            return hidden[:, 0]
+        if self.pooling == "max":
+            return np.where(mask > 0, hidden, -1e9).max(axis=1)
+        return (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+    def encode(self, sentences, batch_size=32, show_progress_bar=False, normalize_embeddings=False,
+               **kwargs):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        vectors = np.empty((len(texts), self.dim), dtype=np.float32)
+        order = np.argsort([-len(t) for t in texts], kind="stable")
+        for start in range(0, len(texts), batch_size):
+            rows = order[start:start + batch_size]
+            vectors[rows] = self._forward([texts[i] for i in rows])
+        if self.normalize or normalize_embeddings:
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors /= np.where(norms > 0, norms, 1)
+        return vectors[0] if single else vectors
+
+    def get_sentence_embedding_dimension(self):
+        return self.dim
+
+
+def cosine_agreement(reference, candidate):
+    """
+    İki embedding matrisinin satır satır kosinüs benzerliği
+    """
+    reference = np.asarray(reference, dtype=np.float32)
+    candidate = np.asarray(candidate, dtype=np.float32)
+    dots = (reference * candidate).sum(axis=1)
+    norms = np.linalg.norm(reference, axis=1) * np.linalg.norm(candidate, axis=1)
+    return dots / np.where(norms > 0, norms, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embedding modelini ONNX'e aktar ve PyTorch ile karsilastir")
+    parser.add_argument("--model", default=EMBED_MODEL_NAME)
+    parser.add_argument("--quantize", action="store_true", help="int8 modeli de uret ve karsilastir")
+    parser.add_argument("--corpus", default="sun_tzu.txt", help="Karsilastirma metinleri")
+    args = parser.parse_args()
+
+    from sentence_transformers import SentenceTransformer
+
+    print(f"Aktariliyor: {args.model} -> {model_dir(args.model)}")
+    export_model(args.model)
+
+    with open(args.corpus, "r", encoding="utf-8") as f:
+        texts = [line.strip() for line in f if len(line.strip()) > 10]
+    reference = SentenceTransformer(args.model, device="cpu").encode(texts, show_progress_bar=False)
+    for quantize in ((False, True) if args.quantize else (False,)):
+        embedder = OnnxEmbedder(args.model, quantize=quantize)
+        agreement = cosine_agreement(reference, embedder.encode(texts))
+        print(f"{'int8' if quantize else 'fp32'}: {len(texts)} metin, kosinus ortalama "
+              f"{agreement.mean():.5f}, en dusuk {agreement.min():.5f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+RAG Chatbot - Çok Süreçli Embedding
+Büyük ingestion işlerinde encode'u SentenceTransformer süreç havuzuyla tüm CPU çekirdeklerine yayma
+"""
+
+from contextlib import contextmanager
+
+from config import EMBED_WORKERS, EMBED_PROCESS_CHUNK_SIZE
+
+
+class MultiProcessEmbedder:
+    """
+    Embedder'ın önüne konan, aynı `encode` arayüzünü sunan süreç havuzu sarmalayıcısı.
+
+    Liste halinde gelen büyük çağrılar `chunk_size`'lık parçalara bölünüp
+    `workers` ayrı süreçte encode edilir; sonuçlar girdiyle aynı sırada döner.
+    Tek metinler ve havuza dağıtmaya değmeyecek kadar küçük listeler ana
+    süreçteki modelle encode edilir. Havuz ilk büyük çağrıda başlatılır ve
+    `close()` ile kapatılmalıdır (veya `with` bloğu kullanılır).
+    """
+
+    def __init__(self, embedder, workers=EMBED_WORKERS, chunk_size=EMBED_PROCESS_CHUNK_SIZE,
+                 device="cpu"):
+        self.embedder = embedder
+        self.workers = workers
+        self.chunk_size = chunk_size or None  # None: sentence-transformers kendisi seçer
+        self.device = device
+        self._pool = None
+
+    def _ensure_pool(self):
+        if self._pool is None:
+            self._pool = self.embedder.start_multi_process_pool(
+                target_devices=[self.device] * self.workers
+            )
+        return self._pool
+
+    def encode(self, sentences, batch_size=32, **kwargs):
+        if (self.workers <= 1 or isinstance(sentences, str)
+                or len(sentences) < batch_size * self.workers):
+            return self.embedder.encode(sentences, batch_size=batch_size, **kwargs)
+        extra = {}
+        if "normalize_embeddings" in kwargs:
+            extra["normalize_embeddings"] = kwargs["normalize_embeddings"]
+        return self.embedder.encode_multi_process(
+            list(sentences), self._ensure_pool(), batch_size=batch_size,
+            chunk_size=self.chunk_size, **extra
+        )
+
+    def __getattr__(self, name):
+        # tokenizer, get_sentence_embedding_dimension vb. embedder'dan gelir
+        return getattr(self.embedder, name)
+
+    def close(self):
+        if self._pool is not None:
+            self.embedder.stop_multi_process_pool(self._pool)
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+@contextmanager
+def parallel_embedder(embedder, workers=EMBED_WORKERS, chunk_size=EMBED_PROCESS_CHUNK_SIZE):
+    """
+    workers > 1 ise embedder'ı süreç havuzuyla sarar, değilse olduğu gibi döndürür.
+    Süreç havuzu olmayan embedder'lar (ONNX kendi thread'lerini kullanır, hash
+    stub) da olduğu gibi döner. Havuz blok sonunda kapatılır.
+    """
+    if workers <= 1 or not hasattr(embedder, "start_multi_process_pool"):
+        yield embedder
+        return
+    with MultiProcessEmbedder(embedder, workers, chunk_size) as wrapped:
+        yield wrapped
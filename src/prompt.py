@@ -0,0 +1,33 @@
+"""
+RAG Chatbot - Prompt Şablonu
+CLI, web arayüzü ve async pipeline'ın ortak kullandığı Gemini prompt'u
+"""
+
+PROMPT_TEMPLATE = """
+Sen Sun Tzu'nun Savaş Sanatı konusunda uzman bir asistan olarak görev yapıyorsun. 
+Aşağıdaki bağlamda (context) Sun Tzu'nun öğretileri yer almaktadır.
+
+Bağlam:
+{context}
+{history}
+Soru: {query}
+
+Lütfen bu bağlamdaki bilgilere dayanarak kısa ve anlaşılır bir yanıt ver. 
+Sun Tzu'nun öğretilerini kullanarak pratik öneriler sun.
+Eğer bağlamda doğrudan bilgi yoksa, benzer konulardaki öğretileri kullanarak yanıt ver.
+"""
+
+
+HISTORY_TEMPLATE = """
+Önceki konuşma (takip sorularını anlamak için):
+{history}
+"""
+
+
+def build_prompt(context, query, history=None):
+    """
+    Bağlam ve sorudan Gemini prompt'unu oluşturur; sohbet modunda `history`
+    (chat_session.ChatSession.history_text) soru öncesine eklenir
+    """
+    history = HISTORY_TEMPLATE.format(history=history) if history else ""
+    return PROMPT_TEMPLATE.format(context=context, history=history, query=query)
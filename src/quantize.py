@@ -0,0 +1,36 @@
+"""
+RAG Chatbot - Embedding Kuantizasyonu
+Vektörleri float16 veya vektör başına ölçekli int8 olarak sıkıştırma
+"""
+
+import numpy as np
+
+DTYPES = ("float32", "float16", "int8")
+
+
+def quantize(vectors, dtype):
+    """
+    float32 vektörleri saklama tipine çevirir; (kodlar, ölçekler) döndürür.
+    Ölçekler yalnızca int8 için vardır (vektör başına max|x| / 127), diğerlerinde None.
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if dtype == "float32":
+        return vectors, None
+    if dtype == "float16":
+        return vectors.astype(np.float16), None
+    if dtype == "int8":
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+        return codes, scales.astype(np.float32)
+    raise ValueError(f"Bilinmeyen saklama tipi: {dtype}")
+
+
+def dequantize(codes, scales=None):
+    """
+    Saklanan kodları float32 vektörlere geri çevirir
+    """
+    vectors = np.asarray(codes).astype(np.float32)
+    if scales is not None:
+        vectors *= np.asarray(scales, dtype=np.float32)[:, None]
+    return vectors
@@ -0,0 +1,150 @@
+"""
+RAG Chatbot - Sorgu Embedding Cache'i
+Tekrarlanan sorular için transformer forward pass'ini atlayan sınırlı LRU cache
+"""
+
+import atexit
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from config import EMBED_CACHE_KEY, QUERY_CACHE_SIZE, QUERY_CACHE_PATH, ENCODE_BATCH_SIZE
+from textnorm import normalize_query
+
+
+class QueryEmbeddingCache:
+    """
+    Normalize edilmiş sorgu metnine göre anahtarlanan, thread-safe LRU cache.
+
+    `persist_path` verilirse cache başlangıçta diskten yüklenir, kapanışta ve
+    her `save_every` yeni kayıtta diske yazılır. Farklı bir embedding modeli
+    veya arka ucuyla (EMBED_CACHE_KEY) kaydedilmiş dosyalar yok sayılır.
+    """
+
+    def __init__(self, max_size=QUERY_CACHE_SIZE, persist_path=None,
+                 model_name=EMBED_CACHE_KEY, save_every=50):
+        self.max_size = max_size
+        self.persist_path = persist_path
+        self.model_name = model_name
+        self.save_every = save_every
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._unsaved = 0
+
+        if persist_path:
+            self.load()
+            atexit.register(self.save)
+
+    def get(self, key):
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return vector
+
+    def put(self, key, vector):
+        with self._lock:
+            self._entries[key] = vector
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            self._unsaved += 1
+            should_save = self.persist_path and self._unsaved >= self.save_every
+        if should_save:
+            self.save()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def save(self):
+        """
+        Cache içeriğini (en eskiden en yeniye) npz dosyasına yazar
+        """
+        if not self.persist_path:
+            return
+        with self._lock:
+            keys = list(self._entries)
+            vectors = np.array([self._entries[k] for k in keys], dtype=np.float32)
+            self._unsaved = 0
+        os.makedirs(os.path.dirname(self.persist_path) or ".", exist_ok=True)
+        tmp_path = self.persist_path + ".tmp.npz"
+        np.savez(tmp_path, vectors=vectors,
+                 meta=np.array(json.dumps({"model": self.model_name, "keys": keys})))
+        os.replace(tmp_path, self.persist_path)
+
+    def load(self):
+        """
+        Diskteki cache'i yükler; dosya yoksa veya model farklıysa hiçbir şey yapmaz
+        """
+        try:
+            with np.load(self.persist_path) as data:
+                meta = json.loads(str(data["meta"]))
+                vectors = data["vectors"]
+        except (FileNotFoundError, OSError, KeyError, ValueError):
+            return
+        if meta.get("model") != self.model_name:
+            return
+        with self._lock:
+            for key, vector in zip(meta["keys"], vectors):
+                self._entries[key] = vector
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+
+# Süreç genelinde paylaşılan varsayılan cache
+default_cache = QueryEmbeddingCache(persist_path=QUERY_CACHE_PATH)
+
+
+def encode_query(embedder, query, cache=default_cache):
+    """
+    Sorgunun embedding'ini cache'ten döndürür, yoksa normalize edilmiş sorguyu encode eder
+    """
+    key = normalize_query(query)
+    if cache is None:
+        return np.asarray(embedder.encode(key, show_progress_bar=False), dtype=np.float32)
+    vector = cache.get(key)
+    if vector is None:
+        vector = np.asarray(embedder.encode(key, show_progress_bar=False), dtype=np.float32)
+        cache.put(key, vector)
+    return vector
+
+
+def encode_queries(embedder, queries, cache=default_cache, batch_size=ENCODE_BATCH_SIZE):
+    """
+    encode_query'nin toplu hali: cache'te olmayan sorgular tek `encode`
+    çağrısında (batch'ler halinde) encode edilir. (len(queries), dim) matris döner.
+    """
+    keys = [normalize_query(query) for query in queries]
+    vectors = [None if cache is None else cache.get(key) for key in keys]
+    missing = sorted({key for key, vector in zip(keys, vectors) if vector is None})
+    if missing:
+        encoded = np.asarray(embedder.encode(missing, batch_size=batch_size, show_progress_bar=False),
+                             dtype=np.float32)
+        fresh = dict(zip(missing, encoded))
+        if cache is not None:
+            for key, vector in fresh.items():
+                cache.put(key, vector)
+        vectors = [fresh[key] if vector is None else vector for key, vector in zip(keys, vectors)]
+    return np.stack(vectors) if vectors else np.empty((0, 0), dtype=np.float32)
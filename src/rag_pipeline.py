@@ -4,124 +4,177 @@ Sun Tzu metinlerinden anlamsal arama yapıp Gemini ile cevap üretme
 """
 
 import os
+import time
 from dotenv import load_dotenv
-import google.generativeai as genai
-import chromadb
-from sentence_transformers import SentenceTransformer
+
+from config import (
+    VECTOR_BACKEND, WARMUP_EMBEDDER, LLM_BACKEND, ASYNC_CONCURRENCY, STREAM_RESPONSES
+)
+from chunker import iter_file_chunks, chapter_filter
+from ingest import sync_collection, format_stats
+from embedding_cache import cached_embedder
+from query_cache import default_cache as query_cache, encode_query
+from answer_cache import default_cache as answer_cache
+from prompt import build_prompt
+from context_builder import retrieve_context
+from chat_session import new_session, record_prompt_tokens, format_turn_tokens
+from lexical import use_lexical_fast_path
+from metrics import Trace, count_error
+from async_pipeline import run_batch
+from streaming import stream_response
+from stubs import StubLLM
+from llm_client import create_gemini_model
+from startup import StartupTimer, configure_gemini, resolve_model_name, load_embedder, warm_up
+from vector_store import open_vector_store
 
 def setup_rag_pipeline():
     """
     RAG pipeline'ını kurar ve yapılandırır
     """
     print("RAG Pipeline kurulumu basliyor...")
+    timer = StartupTimer()
     
     # 1. Ortam değişkenlerini yükle
     load_dotenv()
     api_key = os.getenv("GOOGLE_API_KEY")
     
-    # API key kontrolü
-    if not api_key:
-        print("HATA: GOOGLE_API_KEY bulunamadi! .env dosyasini kontrol edin.")
-        return None, None, None
-    
-    if not api_key:
-        print("HATA: GOOGLE_API_KEY bulunamadi! .env dosyasini kontrol edin.")
-        return None, None, None
-    
-    genai.configure(api_key=api_key)
-    print("Google API yapilandirildi")
-    
-    # 2. Model seçimi (ücretsiz, hızlı, az token harcayan)
-    MODEL_NAME = "gemini-1.5-flash"
-    print(f"Model secildi: {MODEL_NAME}")
+    if LLM_BACKEND == "stub":
+        # Ağ gerektirmeyen deterministik LLM (test ve benchmark için)
+        genai = None
+        MODEL_NAME = "stub"
+        print("LLM_BACKEND=stub: Gemini yerine sahte LLM kullaniliyor")
+    else:
+        # API key kontrolü
+        if not api_key:
+            print("HATA: GOOGLE_API_KEY bulunamadi! .env dosyasini kontrol edin.")
+            return None, None, None
+        
+        with timer.step("gemini import"):
+            genai = configure_gemini(api_key)
+        print("Google API yapilandirildi")
+        
+        # 2. Model seçimi (diskteki cache'ten, list_models() başlangıcı bloklamaz)
+        with timer.step("model secimi"):
+            MODEL_NAME = resolve_model_name(genai)
+        print(f"Model secildi: {MODEL_NAME}")
     
-    # 3. Embedding modeli ve Chroma retriever ayarı
+    # 3. Embedding modeli ve vector store retriever ayarı
     print("Embedding modeli yukleniyor...")
-    embedder = SentenceTransformer("sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2")
+    with timer.step("embedder"):
+        embedder = load_embedder()
     
-    print("ChromaDB baglantisi kuruluyor...")
-    chroma_client = chromadb.PersistentClient(path="./chroma_db")
+    if WARMUP_EMBEDDER:
+        with timer.step("isinma"):
+            warm_up(embedder)
     
-    try:
-        collection = chroma_client.get_collection("sun_tzu_collection")
-        print("ChromaDB koleksiyonu bulundu")
-    except:
-        print("ChromaDB koleksiyonu bulunamadi, yeniden olusturuluyor...")
+    print(f"Vector store aciliyor ({VECTOR_BACKEND})...")
+    with timer.step("vector store"):
+        collection = open_vector_store()
+    
+    if collection.count() > 0:
+        print("Koleksiyon bulundu")
+    else:
+        print("Koleksiyon bulunamadi, yeniden olusturuluyor...")
         
         # Embedding'i yeniden oluştur
-        with open("data/sun_tzu.txt", "r", encoding="utf-8") as f:
-            texts = [t.strip() for t in f.readlines() if t.strip() and len(t.strip()) > 10]
-        
-        collection = chroma_client.create_collection(name="sun_tzu_collection")
-        print(f"{len(texts)} metin embedding'e donusturuluyor...")
-        
-        for i, text in enumerate(texts):
-            emb = embedder.encode(text).tolist()
-            collection.add(
-                ids=[str(i)],
-                embeddings=[emb],
-                documents=[text]
-            )
+        with timer.step("indeksleme"):
+            chunks = iter_file_chunks("data/sun_tzu.txt")
+            stats = sync_collection(collection, cached_embedder(embedder), chunks)
+            print(f"Ingestion: {format_stats(stats)}")
         
         print("Embedding tamamlandi!")
     
-    # 4. Mevcut modelleri listele
-    print("Mevcut modeller kontrol ediliyor...")
-    try:
-        models = genai.list_models()
-        print("Mevcut modeller:")
-        for m in models:
-            if 'generateContent' in m.supported_generation_methods:
-                print(f"  - {m.name}")
-    except Exception as e:
-        print(f"Model listesi alinamadi: {e}")
-    
-    # 5. Gemini modeli
-    model = genai.GenerativeModel(MODEL_NAME)
+    # 4. Gemini modeli (süre sınırı, tekrar deneme ve hız sınırlama katmanıyla)
+    model = StubLLM() if genai is None else create_gemini_model(genai, MODEL_NAME, api_key)
     print("Gemini modeli hazir")
     
+    print(timer.format())
     print("RAG Pipeline basariyla kuruldu!")
     return model, embedder, collection
 
-def get_response(model, embedder, collection, query):
+def get_response(model, embedder, collection, query, chapter=None, trace=None, session=None):
     """
-    Kullanıcı sorgusuna RAG pipeline ile cevap üretir
+    Kullanıcı sorgusuna RAG pipeline ile cevap üretir.
+    `chapter` verilirse arama yalnızca o bölümün parçalarında yapılır; aşama
+    süreleri `trace`'e (verilmezse yeni bir Trace) yazılır. `session`
+    (chat_session.ChatSession) verilirse arama bağımsız soruyla yapılır,
+    prompt'a sohbet geçmişi eklenir ve tur oturuma kaydedilir.
     """
+    trace = Trace() if trace is None else trace
     print(f"\nSorgu isleniyor: '{query}'")
     
+    # Takip sorularında arama, geçmişe bakmadan anlaşılabilen soruyla yapılır
+    search_query, history = query, None
+    if session is not None and session.has_history():
+        with trace.span("condense"):
+            search_query = session.standalone_question(query)
+            history = session.history_text()
+        if search_query != query:
+            print(f"Bagimsiz soru: '{search_query}'")
+    
+    # Anahtar kelime sorgularında (hybrid mod) embedder atlanır, yalnızca BM25 kullanılır
+    query_emb = None
+    if not use_lexical_fast_path(collection, search_query):
+        with trace.span("encode"):
+            query_emb = encode_query(embedder, search_query)
+    
+    # 0. Çok benzer bir soru daha önce cevaplandıysa Gemini'yi atla
+    # (bölüm filtreli sorgular farklı bağlam, geçmişli sorgular farklı prompt kullandığı için cache'lenmez)
+    use_cache = answer_cache is not None and chapter is None and history is None and query_emb is not None
+    if use_cache:
+        cached = answer_cache.lookup(query, query_emb)
+        if cached is not None:
+            trace["cached"] = True
+            print("Cevap semantik cache'ten dondu")
+            if session is not None:
+                session.add_turn(query, cached[0])
+            return cached[0]
+    
     # 1. En alakalı dokümanları getir
     print("En alakali metinler araniyor...")
-    query_emb = embedder.encode(query).tolist()
-    results = collection.query(query_embeddings=[query_emb], n_results=3)
-    context = "\n\n".join(results["documents"][0])
+    tokenizer = getattr(embedder, "tokenizer", None)
+    if query_emb is not None:
+        query_emb = query_emb.tolist()
+    with trace.span("search"):
+        built = retrieve_context(collection, query_emb, tokenizer,
+                                 where=chapter_filter(chapter), query=search_query)
+        context = built["context"]
+    trace["context_tokens"] = built["tokens"]
+    trace["tokens_saved"] = built["tokens_saved"]
     
-    print(f"Bulunan {len(results['documents'][0])} alakali metin parcası")
+    print(f"Bulunan {built['k']} alakali metin parcası ({built['mode']} arama, {built['tokens']} token, "
+          f"{built['tokens_saved']} token tasarruf)")
     print(f"Context (ilk 200 karakter): {context[:200]}...")
     
     # 2. Prompt oluştur
-    prompt = f"""
-Sen Sun Tzu'nun Savaş Sanatı konusunda uzman bir asistan olarak görev yapıyorsun. 
-Aşağıdaki bağlamda (context) Sun Tzu'nun öğretileri yer almaktadır.
-
-Bağlam:
-{context}
-
-Soru: {query}
-
-Lütfen bu bağlamdaki bilgilere dayanarak kısa ve anlaşılır bir yanıt ver. 
-Sun Tzu'nun öğretilerini kullanarak pratik öneriler sun.
-Eğer bağlamda doğrudan bilgi yoksa, benzer konulardaki öğretileri kullanarak yanıt ver.
-"""
+    with trace.span("prompt"):
+        prompt = build_prompt(context, query, history)
+    record_prompt_tokens(trace, prompt, history, tokenizer)
     
     # 3. Gemini API çağrısı
     print("Gemini ile cevap uretiliyor...")
     try:
-        response = model.generate_content(prompt)
+        with trace.span("generation"):
+            response = model.generate_content(prompt)
+        if use_cache:
+            answer_cache.store(query, query_emb, response.text, context)
+        if session is not None:
+            session.add_turn(query, response.text, prompt=trace["prompt_tokens"],
+                             history=trace["history_tokens"], context=built["tokens"])
+        print(f"Sureler: {trace.format()}")
         return response.text
     except Exception as e:
+        count_error("llm")
         print(f"Gemini API hatasi: {e}")
         return "Uzgunum, bir hata olustu. Lutfen tekrar deneyin."
 
+def print_turn_tokens(session):
+    """
+    Sohbetin son turunun token sayılarını yazdırır (prompt büyümesini izlemek için)
+    """
+    if session.transcript:
+        print(f"({format_turn_tokens(session.transcript[-1], len(session))})")
+
 def interactive_chat():
     """
     Etkileşimli chat modu
@@ -133,9 +186,12 @@ def interactive_chat():
     
     print("\n" + "="*50)
     print("Sun Tzu RAG Chatbot")
-    print("Cikmak icin 'cikis' yazin")
+    print("Cikmak icin 'cikis', sohbeti sifirlamak icin 'yeni' yazin")
     print("="*50)
     
+    # Son turlar olduğu gibi, eskileri özet olarak prompt'a girer
+    session = new_session(model, getattr(embedder, "tokenizer", None))
+    
     while True:
         query = input("\nSoru: ").strip()
         
@@ -146,8 +202,31 @@ def interactive_chat():
         if not query:
             continue
         
-        response = get_response(model, embedder, collection, query)
-        print(f"\nCevap: {response}")
+        if query.lower() in ['yeni', 'new']:
+            session.clear()
+            print("Sohbet gecmisi temizlendi")
+            continue
+        
+        if not STREAM_RESPONSES:
+            response = get_response(model, embedder, collection, query, session=session)
+            print(f"\nCevap: {response}")
+            print_turn_tokens(session)
+            continue
+        
+        # Kaynakları üretimden önce göster, cevabı geldikçe yazdır
+        timings = Trace()
+        context, chunks = stream_response(model, embedder, collection, query, timings, session=session)
+        print(f"\nKaynaklar (ilk 200 karakter): {context[:200]}...")
+        print("\nCevap: ", end="", flush=True)
+        for chunk in chunks:
+            print(chunk, end="", flush=True)
+        print()
+        if timings.get("cached"):
+            print("(Cevap semantik cache'ten dondu)")
+        else:
+            print(f"(Ilk token: {timings.get('ttft', 0):.2f} sn, toplam uretim: {timings['generation']:.2f} sn)")
+            print(f"(Sureler: {timings.format()})")
+        print_turn_tokens(session)
 
 def single_query():
     """
@@ -181,14 +260,25 @@ def main():
     if not all([model, embedder, collection]):
         return
     
-    print("\nTest sorgulari calistiriliyor...")
+    print(f"\nTest sorgulari calistiriliyor (es zamanli: {ASYNC_CONCURRENCY})...")
+    
+    start = time.perf_counter()
+    results = run_batch(model, embedder, collection, test_queries)
+    elapsed = time.perf_counter() - start
     
-    for query in test_queries:
+    for query, (response, context) in zip(test_queries, results):
         print(f"\n{'='*50}")
-        response = get_response(model, embedder, collection, query)
+        print(f"Sorgu: '{query}'")
         print(f"\nCevap: {response}")
     
+    print(f"\n{len(test_queries)} sorgu {elapsed:.2f} sn'de tamamlandi")
+    
     print(f"\n{'='*50}")
+    stats = query_cache.stats()
+    print(f"Sorgu embedding cache: {stats['hits']} hit, {stats['misses']} miss, {stats['size']}/{stats['max_size']} kayit")
+    if answer_cache is not None:
+        stats = answer_cache.stats()
+        print(f"Cevap cache: {stats['hits']} hit, {stats['misses']} miss (hit orani {stats['hit_rate']:.0%})")
     print("Test tamamlandi!")
 
 if __name__ == "__main__":
@@ -0,0 +1,209 @@
+"""
+RAG Chatbot - FastAPI Servisi
+Embedder, Chroma koleksiyonu ve Gemini modelini süreç başına bir kez yükleyip
+RAG pipeline'ını HTTP üzerinden sunma
+"""
+
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import List, Optional
+
+import uvicorn
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel
+from starlette.concurrency import iterate_in_threadpool
+
+from config import (
+    SERVER_HOST, SERVER_PORT, SERVER_PROCESSES, SERVER_WORKERS,
+    SERVER_MAX_CONCURRENCY, SERVER_QUEUE_SIZE, SERVER_MAX_BATCH, MICROBATCH_ENABLED
+)
+from rag_pipeline import setup_rag_pipeline
+from async_pipeline import aget_response, aget_responses
+from streaming import stream_response
+from microbatch import MicroBatcher
+from metrics import Trace, default_registry as metrics, register_cache_metrics
+from query_cache import default_cache as query_cache
+from answer_cache import default_cache as answer_cache
+
+
+class RequestLimiter:
+    """
+    Aynı anda en fazla `max_concurrency` isteği işler, en fazla `max_queue`
+    isteği bekletir; kuyruk doluysa 503 döndürür
+    """
+
+    def __init__(self, max_concurrency=SERVER_MAX_CONCURRENCY, max_queue=SERVER_QUEUE_SIZE):
+        self.max_queue = max_queue
+        self.waiting = 0
+        self.active = 0
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def acquire(self):
+        if self._semaphore.locked() and self.waiting >= self.max_queue:
+            raise HTTPException(status_code=503, detail="Sunucu mesgul, lutfen tekrar deneyin")
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        self.active += 1
+
+    def release(self):
+        self.active -= 1
+        self._semaphore.release()
+
+
+class QueryRequest(BaseModel):
+    query: str
+    chapter: Optional[int] = None  # Yalnızca /query: aramayı tek bir bölümle sınırlar
+
+
+class BatchRequest(BaseModel):
+    queries: List[str]
+
+
+state = {}
+
+
+@asynccontextmanager
+async def lifespan(app):
+    model, embedder, collection = setup_rag_pipeline()
+    if not all([model, embedder, collection]):
+        raise RuntimeError("RAG pipeline kurulamadi")
+    if MICROBATCH_ENABLED:
+        # Eşzamanlı isteklerin sorgu encode'larını tek forward pass'te topla
+        embedder = MicroBatcher(embedder)
+    state.update({
+        "model": model,
+        "embedder": embedder,
+        "collection": collection,
+        "executor": ThreadPoolExecutor(max_workers=SERVER_WORKERS, thread_name_prefix="rag"),
+        "limiter": RequestLimiter(),
+    })
+    register_cache_metrics(query_cache, answer_cache)
+    limiter = state["limiter"]
+    metrics.register_callback("rag_active_requests", "gauge", "Islenen istek sayisi", lambda: limiter.active)
+    metrics.register_callback("rag_queued_requests", "gauge", "Bekleyen istek sayisi", lambda: limiter.waiting)
+    if isinstance(embedder, MicroBatcher):
+        metrics.register_callback(
+            "rag_embed_batches_total", "counter", "Micro-batch encode cagrisi",
+            lambda: embedder.stats()["batches"],
+        )
+    yield
+    state["executor"].shutdown(wait=False)
+    if isinstance(state["embedder"], MicroBatcher):
+        state["embedder"].close()
+    state.clear()
+
+
+app = FastAPI(title="Sun Tzu RAG Chatbot", lifespan=lifespan)
+
+
+def _components():
+    return state["model"], state["embedder"], state["collection"]
+
+
+@app.middleware("http")
+async def record_request_metrics(request, call_next):
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Bilinmeyen yollar etiket sayısını şişirmesin
+        path = request.url.path if status != 404 else "other"
+        metrics.inc("rag_http_requests_total", path=path, status=status)
+        metrics.observe("rag_http_request_seconds", time.perf_counter() - start, path=path)
+
+
+@app.post("/query")
+async def query(request: QueryRequest):
+    limiter = state["limiter"]
+    await limiter.acquire()
+    trace = Trace()
+    try:
+        answer, context = await aget_response(
+            *_components(), request.query, state["executor"], chapter=request.chapter, trace=trace
+        )
+    finally:
+        limiter.release()
+    return {"query": request.query, "answer": answer, "context": context, "timings": trace}
+
+
+@app.post("/query/stream")
+async def query_stream(request: QueryRequest):
+    limiter = state["limiter"]
+    await limiter.acquire()
+    try:
+        loop = asyncio.get_running_loop()
+        context, chunks = await loop.run_in_executor(
+            state["executor"], stream_response, *_components(), request.query
+        )
+    except Exception:
+        limiter.release()
+        raise
+
+    async def body():
+        # İlk satır kaynak metinler, sonraki satırlar cevap parçaları (NDJSON)
+        try:
+            yield json.dumps({"context": context}, ensure_ascii=False) + "\n"
+            async for chunk in iterate_in_threadpool(chunks):
+                yield json.dumps({"token": chunk}, ensure_ascii=False) + "\n"
+        finally:
+            limiter.release()
+
+    return StreamingResponse(body(), media_type="application/x-ndjson")
+
+
+@app.post("/batch")
+async def batch(request: BatchRequest):
+    if len(request.queries) > SERVER_MAX_BATCH:
+        raise HTTPException(
+            status_code=413, detail=f"En fazla {SERVER_MAX_BATCH} soru gonderilebilir"
+        )
+    limiter = state["limiter"]
+    await limiter.acquire()
+    try:
+        results = await aget_responses(
+            *_components(), request.queries, executor=state["executor"]
+        )
+    finally:
+        limiter.release()
+    return {
+        "results": [
+            {"query": q, "answer": answer, "context": context}
+            for q, (answer, context) in zip(request.queries, results)
+        ]
+    }
+
+
+@app.get("/healthz")
+async def healthz():
+    if not state:
+        raise HTTPException(status_code=503, detail="Yukleniyor")
+    limiter = state["limiter"]
+    health = {
+        "status": "ok",
+        "documents": state["collection"].count(),
+        "active_requests": limiter.active,
+        "queued_requests": limiter.waiting,
+    }
+    if isinstance(state["embedder"], MicroBatcher):
+        health["embed_batching"] = state["embedder"].stats()
+    return health
+
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    # Prometheus metin formatı; SERVER_PROCESSES > 1 ise her süreç kendi değerlerini döndürür
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+if __name__ == "__main__":
+    uvicorn.run("server:app", host=SERVER_HOST, port=SERVER_PORT, workers=SERVER_PROCESSES)
@@ -0,0 +1,167 @@
+"""
+RAG Chatbot - Hızlı Başlangıç
+Ağır kütüphaneleri ilk kullanımda yükleme, Gemini model adını diskte cache'leme,
+embedder ısınması ve başlangıç süre dökümü
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from config import (
+    EMBED_BACKEND, EMBED_MODEL_NAME, CHROMA_PATH, STARTUP_MODE, MODEL_CACHE_PATH, MODEL_CACHE_TTL,
+    GEMINI_MODEL, DEFAULT_GEMINI_MODEL, GEMINI_MODEL_PREFERENCE
+)
+
+
+class StartupTimer:
+    """
+    Başlangıç adımlarının sürelerini toplar
+    """
+
+    def __init__(self):
+        self.steps = []
+
+    @contextmanager
+    def step(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.steps.append((name, time.perf_counter() - start))
+
+    def total(self):
+        return sum(seconds for _, seconds in self.steps)
+
+    def format(self):
+        parts = ", ".join(f"{name} {seconds:.2f} sn" for name, seconds in self.steps)
+        return f"Baslangic suresi: {self.total():.2f} sn ({parts})"
+
+
+def configure_gemini(api_key):
+    """
+    google.generativeai'yi ilk kullanımda import edip yapılandırır
+    """
+    import google.generativeai as genai
+
+    genai.configure(api_key=api_key)
+    return genai
+
+
+def list_generate_models(genai):
+    """
+    generateContent destekleyen modellerin adlarını döndürür (ağ çağrısı yapar)
+    """
+    return [
+        m.name for m in genai.list_models()
+        if "generateContent" in m.supported_generation_methods
+    ]
+
+
+def choose_model(available_models):
+    """
+    Mevcut modeller arasından tercih sırasına göre model seçer
+    """
+    for name in GEMINI_MODEL_PREFERENCE:
+        if f"models/{name}" in available_models:
+            return name
+    if available_models:
+        return available_models[0].split("/", 1)[-1]
+    return DEFAULT_GEMINI_MODEL
+
+
+def _read_model_cache(cache_path):
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def _refresh_model_cache(genai, cache_path):
+    """
+    list_models() ile modeli çözümler ve sonucu diske yazar
+    """
+    name = choose_model(list_generate_models(genai))
+    os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+    tmp_path = cache_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"model": name, "resolved_at": time.time()}, f)
+    os.replace(tmp_path, cache_path)
+    return name
+
+
+def _refresh_in_background(genai, cache_path):
+    def run():
+        try:
+            name = _refresh_model_cache(genai, cache_path)
+            print(f"Model cache guncellendi: {name}")
+        except Exception as e:
+            print(f"Model listesi alinamadi: {e}")
+
+    threading.Thread(target=run, name="gemini-model-resolver", daemon=True).start()
+
+
+def resolve_model_name(genai, mode=STARTUP_MODE, cache_path=MODEL_CACHE_PATH):
+    """
+    Kullanılacak Gemini model adını döndürür.
+
+    GEMINI_MODEL ayarlıysa doğrudan o kullanılır. "fast" modunda diskteki cache
+    okunur; cache yoksa veya eskiyse varsayılan/cache'teki ad hemen döner ve
+    list_models() arka planda çalışıp cache'i bir sonraki başlangıç için yeniler.
+    "check" modunda list_models() beklenir.
+    """
+    if GEMINI_MODEL:
+        return GEMINI_MODEL
+
+    if mode == "check":
+        try:
+            return _refresh_model_cache(genai, cache_path)
+        except Exception as e:
+            print(f"Model listesi alinamadi: {e}")
+            return DEFAULT_GEMINI_MODEL
+
+    cached = _read_model_cache(cache_path)
+    if cached and time.time() - cached.get("resolved_at", 0) < MODEL_CACHE_TTL:
+        return cached["model"]
+
+    _refresh_in_background(genai, cache_path)
+    return cached["model"] if cached else DEFAULT_GEMINI_MODEL
+
+
+def load_embedder(model_name=EMBED_MODEL_NAME):
+    """
+    sentence_transformers'ı ilk kullanımda import edip embedding modelini yükler
+    (EMBED_BACKEND=onnx ise ONNX Runtime embedder'ı, hash ise model indirmeyen
+    deterministik embedder döner)
+    """
+    if EMBED_BACKEND == "hash":
+        from stubs import HashEmbedder
+
+        return HashEmbedder()
+    if EMBED_BACKEND == "onnx":
+        from onnx_embed import OnnxEmbedder
+
+        return OnnxEmbedder(model_name)
+
+    from sentence_transformers import SentenceTransformer
+
+    return SentenceTransformer(model_name)
+
+
+def warm_up(embedder):
+    """
+    Tokenizer ve forward pass'i ilk gerçek sorgudan önce ısıtır
+    """
+    embedder.encode(["Savaş sanatı nedir?"], show_progress_bar=False)
+
+
+def get_chroma_client(path=CHROMA_PATH):
+    """
+    chromadb'yi ilk kullanımda import edip kalıcı client döndürür
+    """
+    import chromadb
+
+    return chromadb.PersistentClient(path=path)
@@ -0,0 +1,290 @@
+"""
+RAG Chatbot - Akışlı Ingestion Pipeline'ı
+Hugging Face veri setini ara metin dosyası olmadan parçalayıp embed ederek vector store'a yazma
+"""
+
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+
+from config import (
+    EMBED_MODEL_NAME, MANIFEST_PATH, ENCODE_BATCH_SIZE, WRITE_CHUNK_SIZE, CHUNK_SIZE,
+    CHUNK_OVERLAP, DATASET_NAME, DATASET_SPLIT, PIPELINE_QUEUE_SIZE, PIPELINE_CHECKPOINT_PATH,
+    PIPELINE_CHECKPOINT_EVERY, VECTOR_BACKEND,
+)
+from chunker import iter_chunks
+from ingest import split_record, content_id, known_ids, finish_sync, format_stats
+
+_DONE = object()
+
+
+def iter_dataset(source=DATASET_NAME, split=DATASET_SPLIT):
+    """
+    Veri seti kayıtlarını tek tek döndürür. `source` yerel bir .jsonl dosyasıysa
+    ağ kullanılmadan okunur, değilse `load_dataset(..., streaming=True)` kullanılır.
+    """
+    if os.path.isfile(source):
+        with open(source, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+        return
+
+    from datasets import load_dataset
+    yield from load_dataset(source, split=split, streaming=True)
+
+
+def iter_dataset_lines(items):
+    """
+    Kayıtları notebooks/data_prep.py'nin yazdığı dosyayla aynı satırlara çevirir:
+    her kayıt bir bölüm başlığı ve ardından içerik satırları
+    """
+    for i, item in enumerate(items):
+        if isinstance(item, dict):
+            content = item.get("content", item.get("text", item.get("metin", str(item))))
+            chapter = item.get("chapter", item.get("bolum", f"Bolum {i+1}"))
+            yield f"=== BOLUM {i+1}: {chapter} ==="
+        else:
+            content = item
+            yield f"=== BOLUM {i+1} ==="
+        yield from str(content).splitlines()
+
+
+def load_checkpoint(path, signature):
+    """
+    Aynı kaynak ve ayarlarla yazılmış checkpoint'teki konumu döndürür, yoksa 0
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            checkpoint = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return 0
+    if checkpoint.get("signature") != signature:
+        return 0
+    return checkpoint.get("position", 0)
+
+
+def save_checkpoint(path, signature, position):
+    """
+    Akışta kalıcı olarak yazılmış son konumu atomik olarak kaydeder
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"signature": signature, "position": position}, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def _put(q, item, stop):
+    """
+    Kuyruk doluyken bekler; pipeline durdurulursa vazgeçer
+    """
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def run_pipeline(collection, embedder, chunks, signature, checkpoint_path=PIPELINE_CHECKPOINT_PATH,
+                 manifest_path=MANIFEST_PATH, model_name=EMBED_MODEL_NAME,
+                 batch_size=ENCODE_BATCH_SIZE, write_chunk_size=WRITE_CHUNK_SIZE,
+                 queue_size=PIPELINE_QUEUE_SIZE, checkpoint_every=PIPELINE_CHECKPOINT_EVERY,
+                 resume=True, progress_callback=None):
+    """
+    Parça akışını üç aşamalı bir pipeline'la koleksiyona yazar.
+
+    Okuma/parçalama ve encode ayrı thread'lerde, yazma çağıran thread'de çalışır;
+    aşamalar en fazla `queue_size` yazım parçası tutan kuyruklarla bağlıdır. Böylece
+    bir parça encode edilirken önceki parça yazılır ve bellek kullanımı sınırlı
+    kalır. Her `checkpoint_every` yazımda store kalıcı hale getirilir ve akıştaki
+    konum `signature` ile birlikte kaydedilir; yarıda kalan çalıştırma aynı imzayla
+    yeniden başlatılınca o konuma kadar olan ve store'da bulunan parçalar encode
+    edilmeden atlanır.
+    Sonunda sync_collection ile aynı manifest ve istatistikler üretilir.
+    """
+    start_position = load_checkpoint(checkpoint_path, signature) if resume else 0
+    if start_position:
+        print(f"Checkpoint bulundu, {start_position}. parcadan devam ediliyor")
+
+    known, known_current = known_ids(collection, manifest_path, model_name)
+    # Checkpoint yalnızca konumu tutar; o konuma kadar olan parçalardan yalnızca
+    # store'da gerçekten bulunanlar atlanır (kalıcı hale gelmeden kaybolan yazımlar tekrarlanır)
+    stored = set(collection.get(include=[])["ids"]) if start_position else set()
+    seen = {}  # id -> None; ekleme sırasını koruyan küme
+    counts = {"unchanged": 0}
+    errors = []
+    stop = threading.Event()
+    read_q = queue.Queue(maxsize=queue_size)
+    encode_q = queue.Queue(maxsize=queue_size)
+    stats = {"docs": 0, "bytes": 0, "encode_seconds": 0.0, "write_seconds": 0.0}
+
+    def read():
+        position, batch = 0, []
+        try:
+            for record in chunks:
+                if stop.is_set():
+                    return
+                position += 1
+                text, metadata = split_record(record)
+                doc_id = content_id(text, metadata)
+                if doc_id in seen:
+                    continue
+                seen[doc_id] = None
+                if (position <= start_position and doc_id in stored) or doc_id in known_current:
+                    counts["unchanged"] += 1
+                    continue
+                batch.append((doc_id, text, metadata))
+                if len(batch) >= write_chunk_size:
+                    if not _put(read_q, (batch, position), stop):
+                        return
+                    batch = []
+            if batch:
+                _put(read_q, (batch, position), stop)
+        except Exception as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            _put(read_q, _DONE, stop)
+
+    def encode():
+        try:
+            while not stop.is_set():
+                try:
+                    item = read_q.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if item is _DONE:
+                    break
+                batch, position = item
+                texts = [r[1] for r in batch]
+                t0 = time.perf_counter()
+                embeddings = embedder.encode(
+                    texts, batch_size=batch_size, show_progress_bar=False
+                ).tolist()
+                stats["encode_seconds"] += time.perf_counter() - t0
+                if not _put(encode_q, (batch, embeddings, position), stop):
+                    return
+        except Exception as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            _put(encode_q, _DONE, stop)
+
+    threads = [
+        threading.Thread(target=read, name="ingest-read", daemon=True),
+        threading.Thread(target=encode, name="ingest-encode", daemon=True),
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+
+    persist = getattr(collection, "persist", None)
+    writes = 0
+    try:
+        while not stop.is_set():
+            try:
+                item = encode_q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if item is _DONE:
+                break
+            batch, embeddings, position = item
+            t0 = time.perf_counter()
+            kwargs = {
+                "ids": [r[0] for r in batch],
+                "embeddings": embeddings,
+                "documents": [r[1] for r in batch],
+            }
+            if any(r[2] is not None for r in batch):
+                kwargs["metadatas"] = [r[2] for r in batch]
+            collection.upsert(**kwargs)
+            writes += 1
+            if writes % checkpoint_every == 0:
+                if callable(persist):
+                    persist()
+                save_checkpoint(checkpoint_path, signature, position)
+            stats["write_seconds"] += time.perf_counter() - t0
+            stats["docs"] += len(batch)
+            stats["bytes"] += sum(len(r[1].encode("utf-8")) for r in batch)
+            if progress_callback:
+                progress_callback(stats["docs"], None)
+    except BaseException:
+        stop.set()
+        raise
+    finally:
+        for thread in threads:
+            thread.join()
+
+    if errors:
+        raise errors[0]
+
+    elapsed = time.perf_counter() - start
+    stats["seconds"] = elapsed
+    stats["docs_per_s"] = stats["docs"] / elapsed if elapsed > 0 else 0.0
+    stats["mb_per_s"] = stats["bytes"] / (1024 * 1024) / elapsed if elapsed > 0 else 0.0
+    stats["resumed_from"] = start_position
+
+    stats = finish_sync(collection, known, seen, stats, counts["unchanged"],
+                        manifest_path, model_name, write_chunk_size)
+    # Tamamlanan çalıştırmanın checkpoint'i bir sonrakini etkilememeli
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    return stats
+
+
+def ingest_dataset(collection, embedder, source=DATASET_NAME, split=DATASET_SPLIT,
+                   chunk_size=CHUNK_SIZE, overlap=CHUNK_OVERLAP, **pipeline_kwargs):
+    """
+    Veri setini akış olarak okuyup parçalar ve run_pipeline ile koleksiyona yazar
+    """
+    chunks = iter_chunks(iter_dataset_lines(iter_dataset(source, split)),
+                         chunk_size=chunk_size, overlap=overlap, source=source)
+    signature = {
+        "source": source,
+        "split": split,
+        "chunk_size": chunk_size,
+        "overlap": overlap,
+        "model": pipeline_kwargs.get("model_name", EMBED_MODEL_NAME),
+        "write_chunk_size": pipeline_kwargs.get("write_chunk_size", WRITE_CHUNK_SIZE),
+    }
+    return run_pipeline(collection, embedder, chunks, signature, **pipeline_kwargs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Veri setini ara dosya olmadan vector store'a akıt")
+    parser.add_argument("--source", default=DATASET_NAME,
+                        help="Hugging Face veri seti adı veya yerel .jsonl dosyası")
+    parser.add_argument("--split", default=DATASET_SPLIT)
+    parser.add_argument("--rebuild", action="store_true", help="Koleksiyonu sıfırdan kur")
+    parser.add_argument("--restart", action="store_true", help="Checkpoint'i yok say")
+    args = parser.parse_args()
+
+    from startup import load_embedder
+    from parallel_embed import parallel_embedder
+    from embedding_cache import cached_embedder
+    from vector_store import open_vector_store
+
+    print("Embedding modeli yukleniyor...")
+    embedder = load_embedder()
+    print(f"Vector store aciliyor ({VECTOR_BACKEND})...")
+    collection = open_vector_store(rebuild=args.rebuild)
+
+    def report(done, total):
+        print(f"   {done} parca yazildi...")
+
+    with parallel_embedder(embedder) as encoder:
+        stats = ingest_dataset(collection, cached_embedder(encoder), args.source, args.split,
+                               resume=not (args.restart or args.rebuild), progress_callback=report)
+    print(f"Ingestion: {format_stats(stats)}")
+    print(f"Koleksiyon: {collection.count()} kayit, surum {stats['version']}")
+
+
+if __name__ == "__main__":
+    main()
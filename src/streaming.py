@@ -0,0 +1,93 @@
+"""
+RAG Chatbot - Cevap Streaming'i
+Kaynak metinleri üretimden önce döndürüp Gemini cevabını parça parça akıtma,
+ilk token süresi (TTFT) ve toplam üretim süresini ölçme
+"""
+
+import time
+
+from query_cache import encode_query
+from answer_cache import default_cache as answer_cache
+from prompt import build_prompt
+from context_builder import retrieve_context
+from chat_session import record_prompt_tokens
+from lexical import use_lexical_fast_path
+from metrics import Trace, count_error
+
+ERROR_MESSAGE = "Uzgunum, bir hata olustu. Lutfen tekrar deneyin."
+
+
+def stream_response(model, embedder, collection, query, timings=None, error_message=ERROR_MESSAGE,
+                    session=None):
+    """
+    Retrieval'ı hemen yapar ve (bağlam, cevap parçaları generator'ı) döndürür.
+
+    Bağlam generator tüketilmeden önce hazırdır, böylece arayüz kaynakları
+    üretim başlamadan gösterebilir. `timings` (metrics.Trace) içine "encode",
+    "search", "prompt" süreleri hemen, "ttft" (ilk parçaya kadar geçen süre),
+    "generation" (toplam üretim süresi) ve "cached" generator bittiğinde yazılır.
+    `session` verilirse arama bağımsız soruyla yapılır, prompt'a geçmiş eklenir
+    ve tur generator bittiğinde oturuma kaydedilir.
+    """
+    timings = Trace() if timings is None else timings
+    search_query, history = query, None
+    if session is not None and session.has_history():
+        with timings.span("condense"):
+            search_query = session.standalone_question(query)
+            history = session.history_text()
+
+    query_emb = None
+    if not use_lexical_fast_path(collection, search_query):
+        with timings.span("encode"):
+            query_emb = encode_query(embedder, search_query)
+
+    use_cache = answer_cache is not None and history is None and query_emb is not None
+    if use_cache:
+        cached = answer_cache.lookup(query, query_emb)
+        if cached is not None:
+            answer, context = cached
+            timings["cached"] = True
+            if session is not None:
+                session.add_turn(query, answer)
+            return context, iter([answer])
+
+    if query_emb is not None:
+        query_emb = query_emb.tolist()
+    tokenizer = getattr(embedder, "tokenizer", None)
+    with timings.span("search"):
+        built = retrieve_context(collection, query_emb, tokenizer, query=search_query)
+        context = built["context"]
+    timings["context_tokens"] = built["tokens"]
+    timings["tokens_saved"] = built["tokens_saved"]
+    with timings.span("prompt"):
+        prompt = build_prompt(context, query, history)
+    record_prompt_tokens(timings, prompt, history, tokenizer)
+
+    def generate():
+        start = time.perf_counter()
+        parts = []
+        timings["cached"] = False
+        try:
+            for chunk in model.generate_content(prompt, stream=True):
+                text = chunk.text
+                if not text:
+                    continue
+                if not parts:
+                    timings.record("ttft", time.perf_counter() - start)
+                parts.append(text)
+                yield text
+        except Exception as e:
+            count_error("llm")
+            print(f"Gemini API hatasi: {e}")
+            yield error_message
+            return
+        finally:
+            timings.record("generation", time.perf_counter() - start)
+
+        if use_cache and parts:
+            answer_cache.store(query, query_emb, "".join(parts), context)
+        if session is not None and parts:
+            session.add_turn(query, "".join(parts), prompt=timings["prompt_tokens"],
+                             history=timings["history_tokens"], context=built["tokens"])
+
+    return context, generate()
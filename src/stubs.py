@@ -0,0 +1,211 @@
+"""
+RAG Chatbot - Test Yardımcıları
+Ağ erişimi olmadan pipeline'ı çalıştırmak için deterministik sahte LLM, embedder
+ve gecikme/hata enjekte eden yerel Gemini HTTP sunucusu
+"""
+
+import asyncio
+import json
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from config import STUB_LLM_DELAY
+from textnorm import turkish_casefold
+
+
+class StubResponse:
+    """
+    Gemini cevabı gibi davranan basit nesne (`.text`)
+    """
+
+    def __init__(self, text):
+        self.text = text
+
+
+class StubLLM:
+    """
+    genai.GenerativeModel arayüzünü taklit eden deterministik LLM.
+
+    Cevap, prompt'taki soru satırından üretilir; her çağrı `delay` saniye sürer.
+    """
+
+    def __init__(self, delay=STUB_LLM_DELAY):
+        self.delay = delay
+        self.calls = 0
+
+    def _answer(self, prompt):
+        question = next(
+            (line[len("Soru:"):].strip() for line in prompt.splitlines() if line.startswith("Soru:")),
+            prompt.strip()[:80],
+        )
+        return f"[stub] '{question}' sorusu icin Sun Tzu'nun ogretilerine dayali cevap."
+
+    def generate_content(self, prompt, stream=False):
+        self.calls += 1
+        if stream:
+            return self._stream(prompt)
+        time.sleep(self.delay)
+        return StubResponse(self._answer(prompt))
+
+    def _stream(self, prompt):
+        """
+        Cevabı kelime kelime akıtır; toplam süre yine `delay` kadardır
+        """
+        words = self._answer(prompt).split(" ")
+        for i, word in enumerate(words):
+            time.sleep(self.delay / len(words))
+            yield StubResponse(word if i == 0 else " " + word)
+
+    async def generate_content_async(self, prompt):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return StubResponse(self._answer(prompt))
+
+
+class HashEmbedder:
+    """
+    SentenceTransformer.encode arayüzünü taklit eden deterministik embedder.
+
+    Kelimeler sabit boyutlu bir vektöre hash'lenir (feature hashing), böylece
+    ortak kelimesi çok olan metinler benzer vektörler alır. Model indirmeden
+    benchmark ve deneme yapmak için; anlamsal kalite hedeflenmez.
+    """
+
+    def __init__(self, dim=384):
+        self.dim = dim
+
+    def encode(self, sentences, batch_size=32, show_progress_bar=False,
+               normalize_embeddings=True, **kwargs):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            for token in turkish_casefold(text).split():
+                h = zlib.crc32(token.encode("utf-8"))
+                vectors[i, h % self.dim] += 1.0 if (h >> 16) & 1 else -1.0
+        if normalize_embeddings:
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors /= np.where(norms > 0, norms, 1)
+        return vectors[0] if single else vectors
+
+    def get_sentence_embedding_dimension(self):
+        return self.dim
+
+
+class StubGeminiServer:
+    """
+    Gemini REST API'sini (generateContent, streamGenerateContent?alt=sse)
+    taklit eden yerel HTTP sunucusu; istemci dayanıklılığını denemek için.
+
+    Her istek `delay` saniye sürer; ilk `slow_first` istek ve ardından
+    `slow_rate` oranındaki istekler `slow_delay` saniye bekler (kuyruk
+    gecikmesi, hedging için). İlk
+    `fail_first` istek ve ardından `error_rate` oranındaki istekler
+    `error_status` koduyla döner (429'da Retry-After: 0). Cevap metni StubLLM
+    ile aynıdır. `with` bloğuyla veya start()/stop() ile kullanılır.
+    """
+
+    def __init__(self, delay=0.0, slow_rate=0.0, slow_delay=2.0, error_rate=0.0, error_status=503,
+                 fail_first=0, slow_first=0, seed=0, host="127.0.0.1", port=0):
+        self.delay = delay
+        self.slow_rate = slow_rate
+        self.slow_delay = slow_delay
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.fail_first = fail_first
+        self.slow_first = slow_first
+        self.requests = 0
+        self.errors = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._llm = StubLLM(delay=0)
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _plan(self):
+        """
+        Sıradaki isteğin (gecikme, hata kodu veya None) planı
+        """
+        with self._lock:
+            self.requests += 1
+            fail = self.requests <= self.fail_first or self._random.random() < self.error_rate
+            slow = self.requests <= self.slow_first or self._random.random() < self.slow_rate
+            if fail:
+                self.errors += 1
+        return (self.slow_delay if slow else self.delay), (self.error_status if fail else None)
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, body, content_type="application/json", headers=()):
+                data = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in headers:
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                delay, error = server._plan()
+                time.sleep(delay)
+                if error is not None:
+                    headers = [("Retry-After", "0")] if error == 429 else []
+                    self._send(error, json.dumps({"error": {"code": error, "message": "stub hata"}}),
+                               headers=headers)
+                    return
+
+                prompt = "".join(
+                    part.get("text", "") for content in payload.get("contents", [])
+                    for part in content.get("parts", [])
+                )
+                answer = server._llm._answer(prompt)
+                if ":streamGenerateContent" in self.path:
+                    words = answer.split(" ")
+                    events = "".join(
+                        "data: " + json.dumps(_candidate(word if i == 0 else " " + word)) + "\r\n\r\n"
+                        for i, word in enumerate(words)
+                    )
+                    self._send(200, events, content_type="text/event-stream")
+                elif ":generateContent" in self.path:
+                    self._send(200, json.dumps(_candidate(answer)))
+                else:
+                    self._send(404, json.dumps({"error": {"code": 404, "message": self.path}}))
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def _candidate(text):
+    return {"candidates": [{"content": {"role": "model", "parts": [{"text": text}]}}]}
@@ -0,0 +1,43 @@
+"""
+RAG Chatbot - Türkçe Metin Normalizasyonu
+Türkçe'ye uygun küçük harfe çevirme (İ/ı), boşluk sadeleştirme ve aksan katlama
+"""
+
+import re
+import unicodedata
+
+_WHITESPACE = re.compile(r"\s+")
+
+# Aksan katlamada kullanılan Türkçe karakter eşlemesi (ı -> i dahil)
+_TURKISH_FOLD = str.maketrans({
+    "ç": "c", "ğ": "g", "ı": "i", "ö": "o", "ş": "s", "ü": "u", "â": "a", "î": "i", "û": "u",
+})
+
+
+def turkish_casefold(text):
+    """
+    Türkçe kurallarıyla küçük harfe çevirir: "I" -> "ı", "İ" -> "i"
+    """
+    text = unicodedata.normalize("NFC", text)
+    return text.replace("I", "ı").replace("İ", "i").lower()
+
+
+def fold_diacritics(text):
+    """
+    Türkçe karakterleri ASCII karşılıklarına katlar ("düşman" -> "dusman")
+    """
+    text = text.translate(_TURKISH_FOLD)
+    decomposed = unicodedata.normalize("NFD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def normalize_query(query, fold=False):
+    """
+    Sorguyu cache anahtarı olarak kullanılacak biçime getirir.
+
+    Unicode NFC'ye çevrilir, Türkçe kurallarıyla küçük harfe indirilir ve
+    boşluklar tek boşluğa indirilir. Aksanlar varsayılan olarak korunur
+    (embedding'ler "düşman" ile "dusman" için farklıdır); fold=True ile katlanır.
+    """
+    text = _WHITESPACE.sub(" ", turkish_casefold(query)).strip()
+    return fold_diacritics(text) if fold else text
@@ -0,0 +1,204 @@
+"""
+RAG Chatbot - Chroma HNSW Ayarı
+space / M / construction_ef / search_ef ızgarasını koleksiyondaki vektörlerden
+ayrılan (veya sentetik) sorgularla tarayıp birebir aramaya göre recall@k,
+sorgu gecikmesi ve index kurulum süresini ölçme; seçilen ayarı HNSW_CONFIG_PATH'e yazma
+
+Seçim: recall@k >= --min-recall olan ayarlar arasında p50 gecikmesi en düşük
+olan (hiçbiri eşiğe ulaşmazsa recall'u en yüksek olan). Varsayılan olarak
+yalnızca ayarlı mesafe tipi taranır. --space ile başka tipler de taranabilir;
+recall hepsi için ayarlı tipin birebir aramasına göre ölçülür, böylece
+karşılaştırılabilir olur ve başka tipin döndürdüğü farklı komşular recall'u
+düşürür. Mesafe tipi yalnızca --change-space verilirse değiştirilir.
+
+Kullanım:
+    python src/tune_hnsw.py                                # Koleksiyondaki vektörlerle
+    python src/tune_hnsw.py --synthetic 100000 --dry-run   # Sentetik vektörlerle, yazmadan
+    python src/tune_hnsw.py --m 16 32 --search-ef 20 40 80 --min-recall 0.98
+    python src/tune_hnsw.py --space cosine l2 ip --change-space  # Mesafe tipi de seçilebilir
+"""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from config import CONTEXT_CANDIDATES, HNSW_CONFIG_PATH
+from vector_store import NumpyVectorStore, SPACES, hnsw_metadata, hnsw_config, open_vector_store
+
+ADD_BATCH = 5000
+
+
+def collection_vectors():
+    """
+    Ayarlanan vector store'daki tüm embedding'ler
+    """
+    collection = open_vector_store()
+    embeddings = collection.get(include=["embeddings"])["embeddings"]
+    return np.asarray(embeddings, dtype=np.float32)
+
+
+def synthetic_vectors(n, dim, seed):
+    """
+    Kümelenmiş, normalize edilmemiş (MiniLM çıktısına benzer) vektörler
+    """
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(n // 100, 1), dim)).astype(np.float32)
+    scales = rng.uniform(0.5, 2.0, (n, 1)).astype(np.float32)
+    return scales * (centers[rng.integers(0, len(centers), n)] + 0.5 * rng.standard_normal((n, dim)).astype(np.float32))
+
+
+def split_queries(vectors, n_queries, seed=0):
+    """
+    Vektörlerin bir kısmını sorgu olarak ayırır (index'e eklenmez)
+    """
+    rng = np.random.default_rng(seed)
+    n_queries = min(n_queries, len(vectors) // 10)
+    held_out = np.zeros(len(vectors), dtype=bool)
+    held_out[rng.choice(len(vectors), n_queries, replace=False)] = True
+    return vectors[~held_out], vectors[held_out]
+
+
+def build_collection(client, vectors, config):
+    name = f"tune-{config['space']}-{config['M']}-{config['construction_ef']}-{config['search_ef']}"
+    try:
+        client.delete_collection(name=name)
+    except Exception:
+        pass
+    start = time.perf_counter()
+    collection = client.create_collection(name=name, metadata=hnsw_metadata(config))
+    ids = [str(i) for i in range(len(vectors))]
+    for i in range(0, len(vectors), ADD_BATCH):
+        collection.add(ids=ids[i:i + ADD_BATCH], embeddings=vectors[i:i + ADD_BATCH])
+    return collection, time.perf_counter() - start
+
+
+def measure(collection, queries, exact_ids, k):
+    collection.query(query_embeddings=queries[:1], n_results=k, include=[])  # ısınma
+    latencies, recalls = [], []
+    for query, expected in zip(queries, exact_ids):
+        start = time.perf_counter()
+        found = collection.query(query_embeddings=[query], n_results=k, include=[])["ids"][0]
+        latencies.append(time.perf_counter() - start)
+        recalls.append(len(set(found) & set(expected)) / len(expected))
+    latencies = np.asarray(latencies)
+    return {
+        "recall_at_k": float(np.mean(recalls)),
+        "p50_ms": float(np.percentile(latencies, 50) * 1000),
+        "p95_ms": float(np.percentile(latencies, 95) * 1000),
+    }
+
+
+def exact_neighbors(vectors, queries, space, k):
+    """
+    Birebir aramada her sorgunun en yakın k vektörünün id'leri
+    """
+    reference = NumpyVectorStore(space=space)
+    reference.add(ids=[str(i) for i in range(len(vectors))], embeddings=vectors)
+    return reference.query(query_embeddings=queries, n_results=k, include=[])["ids"]
+
+
+def sweep(vectors, queries, spaces, reference_space, ms, construction_efs, search_efs, k):
+    """
+    Her ayar için ayrı index kurulur: Chroma, search_ef değişikliğini yalnızca
+    index belleğe yüklenmeden önce uygular (open_vector_store açılışta yapar).
+    Tüm mesafe tiplerinin recall'u `reference_space`'teki birebir aramaya göredir.
+    """
+    import chromadb
+
+    exact_ids = exact_neighbors(vectors, queries, reference_space, k)
+    client = chromadb.EphemeralClient()
+    results = []
+    for space in spaces:
+        for m in ms:
+            for construction_ef in construction_efs:
+                for search_ef in search_efs:
+                    config = {"space": space, "M": m, "construction_ef": construction_ef, "search_ef": search_ef}
+                    collection, build_seconds = build_collection(client, vectors, config)
+                    row = dict(config, build_seconds=build_seconds, **measure(collection, queries, exact_ids, k))
+                    client.delete_collection(name=collection.name)
+                    results.append(row)
+                    print(f"  {space:<6}  M {m:>3}  construction_ef {construction_ef:>4}  search_ef {search_ef:>4}  "
+                          f"recall@{k} {row['recall_at_k']:.3f}  p50 {row['p50_ms']:6.2f} ms  "
+                          f"p95 {row['p95_ms']:6.2f} ms  kurulum {build_seconds:6.1f} sn")
+    return results
+
+
+def choose(results, min_recall, space=None):
+    """
+    `space` verilirse yalnızca o mesafe tipindeki ayarlar arasından seçer
+    """
+    if space is not None:
+        results = [row for row in results if row["space"] == space]
+        if not results:
+            return None
+    eligible = [row for row in results if row["recall_at_k"] >= min_recall]
+    if not eligible:
+        return max(results, key=lambda row: (row["recall_at_k"], -row["p50_ms"]))
+    return min(eligible, key=lambda row: (row["p50_ms"], row["build_seconds"]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chroma HNSW ayarlarini recall/gecikme icin tara")
+    parser.add_argument("--space", nargs="+", choices=SPACES,
+                        help="Taranan mesafe tipleri (varsayilan: ayarli tip). MiniLM vektorleri normalize "
+                             "edilmedigi icin l2/ip kosinusten farkli komsular dondurebilir")
+    parser.add_argument("--change-space", action="store_true",
+                        help="Ayarli tipten farkli bir mesafe tipinin secilip yazilmasina izin ver")
+    parser.add_argument("--m", type=int, nargs="+", default=[8, 16, 32])
+    parser.add_argument("--construction-ef", type=int, nargs="+", default=[64, 128, 256])
+    parser.add_argument("--search-ef", type=int, nargs="+", default=[10, 20, 40, 80, 160])
+    parser.add_argument("--queries", type=int, default=200, help="Ayrilan sorgu sayisi")
+    parser.add_argument("--k", type=int, default=CONTEXT_CANDIDATES, help="recall@k icin k (aramadaki aday sayisi)")
+    parser.add_argument("--min-recall", type=float, default=0.95)
+    parser.add_argument("--synthetic", type=int, help="Koleksiyon yerine bu kadar sentetik vektor kullan")
+    parser.add_argument("--dim", type=int, default=384, help="Sentetik vektor boyutu")
+    parser.add_argument("--config", default=HNSW_CONFIG_PATH, help="Secilen ayarin yazilacagi dosya")
+    parser.add_argument("--dry-run", action="store_true", help="Secilen ayari yazma")
+    parser.add_argument("--output", help="Tum sonuclarin yazilacagi JSON dosyasi")
+    args = parser.parse_args()
+
+    vectors = synthetic_vectors(args.synthetic, args.dim, seed=0) if args.synthetic else collection_vectors()
+    if len(vectors) < 100:
+        print(f"Ayar icin en az 100 vektor gerekli ({len(vectors)} bulundu); once indeksleyin veya --synthetic kullanin")
+        return
+    vectors, queries = split_queries(vectors, args.queries)
+    current = hnsw_config(args.config)
+    spaces = args.space or [current["space"]]
+    print(f"{len(vectors)} vektor, {len(queries)} sorgu, {'/'.join(spaces)} "
+          f"(recall referansi: birebir {current['space']}), recall@{args.k} esigi {args.min_recall}")
+    print(f"Mevcut ayar: {current}\n")
+
+    results = sweep(vectors, queries, spaces, current["space"], args.m, args.construction_ef,
+                    args.search_ef, args.k)
+    best = choose(results, args.min_recall, space=None if args.change_space else current["space"])
+    chosen = best and {key: best[key] for key in ("space", "M", "construction_ef", "search_ef")}
+    if best is None:
+        print(f"\n{current['space']} taranmadi; baska bir mesafe tipini secmek icin --change-space verin")
+    else:
+        print(f"\nSecilen: {chosen} (recall@{args.k} {best['recall_at_k']:.3f}, p50 {best['p50_ms']:.2f} ms)")
+        if best["recall_at_k"] < args.min_recall:
+            print(f"Uyari: hicbir ayar {args.min_recall} recall'a ulasmadi; --search-ef veya --m degerlerini artirin")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "reference_space": current["space"], "results": results,
+                       "chosen": chosen}, f, indent=2)
+        print(f"Sonuclar yazildi: {args.output}")
+
+    if best is not None and not args.dry_run:
+        os.makedirs(os.path.dirname(args.config) or ".", exist_ok=True)
+        tmp_path = args.config + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(dict(chosen, recall_at_k=best["recall_at_k"], p50_ms=best["p50_ms"], k=args.k,
+                           vectors=len(vectors)), f, indent=2)
+        os.replace(tmp_path, args.config)
+        print(f"Ayar yazildi: {args.config}")
+        print("search_ef bir sonraki acilista uygulanir; space, M ve construction_ef icin yeniden indeksleyin "
+              "(python src/stream_ingest.py --rebuild)")
+
+
+if __name__ == "__main__":
+    main()
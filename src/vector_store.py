@@ -0,0 +1,516 @@
+"""
+RAG Chatbot - Vector Store Arka Uçları
+Chroma koleksiyonu, birebir NumPy arama motoru ve FAISS (flat / IVF / HNSW)
+arasında ayarla seçilebilen ortak arayüz
+"""
+
+import json
+import os
+import shutil
+
+import numpy as np
+
+from quantize import DTYPES, quantize, dequantize
+from config import (
+    CHROMA_PATH, COLLECTION_NAME, VECTOR_BACKEND, VECTOR_STORE_PATH, VECTOR_SPACE,
+    VECTOR_DTYPE, VECTOR_RESCORE, VECTOR_RESCORE_FACTOR,
+    FAISS_INDEX, FAISS_NLIST, FAISS_NPROBE, FAISS_HNSW_M, FAISS_EF_CONSTRUCTION, FAISS_EF_SEARCH,
+    CHROMA_HNSW_M, CHROMA_HNSW_CONSTRUCTION_EF, CHROMA_HNSW_SEARCH_EF, HNSW_CONFIG_PATH
+)
+
+SPACES = ("l2", "ip", "cosine")
+HNSW_PARAMS = ("space", "M", "construction_ef", "search_ef")
+# Metadata'da ayar yoksa Chroma'nın kullandığı değerler
+_CHROMA_HNSW_DEFAULTS = {"space": "l2", "M": 16, "construction_ef": 100, "search_ef": 10}
+
+
+class NumpyVectorStore:
+    """
+    Tüm vektörleri tek bir matriste tutan, birebir (exact) arama yapan store.
+
+    Chroma koleksiyonuyla aynı metotları (add, upsert, delete, get, query,
+    count) ve aynı sonuç biçimini sunar; pipeline kodu hangi arka ucun
+    kullanıldığını bilmez. Mesafeler Chroma ile aynı tanımlıdır: "l2" kare
+    L2, "ip" 1 - iç çarpım, "cosine" 1 - kosinüs benzerliği. `path`
+    verilirse `persist()` ile diske yazılır ve açılışta yüklenir.
+
+    `dtype` "float16" veya "int8" ise vektörler sıkıştırılmış saklanır ve
+    arama dekuantize edilmiş bloklar üzerinde yapılır. `rescore=True` ile
+    float32 kopyalar da tutulur (diske kaydedildiyse memory-map ile açılır) ve
+    en iyi k * `rescore_factor` aday tam hassasiyetle yeniden puanlanır.
+    """
+
+    SEARCH_BLOCK = 65536  # Aramada tek seferde dekuantize edilen satır sayısı
+
+    def __init__(self, space=VECTOR_SPACE, path=None, dtype=VECTOR_DTYPE,
+                 rescore=VECTOR_RESCORE, rescore_factor=VECTOR_RESCORE_FACTOR):
+        if space not in SPACES:
+            raise ValueError(f"Bilinmeyen mesafe tipi: {space}")
+        if dtype not in DTYPES:
+            raise ValueError(f"Bilinmeyen saklama tipi: {dtype}")
+        self.space = space
+        self.path = path
+        self.dtype = dtype
+        self.rescore = rescore and dtype != "float32"
+        self.rescore_factor = rescore_factor
+        self._ids = []
+        self._rows = {}
+        self._documents = []
+        self._metadatas = []
+        # Kapasitesi ikiye katlanarak büyüyen tamponlar
+        self._buffer = None  # Saklama tipindeki vektörler
+        self._scales = None  # int8 için vektör başına ölçek
+        self._full = None  # rescore için float32 kopyalar
+        if path and os.path.exists(os.path.join(path, "vectors.npy")):
+            self._load()
+
+    @property
+    def _matrix(self):
+        """
+        Tüm vektörlerin float32 hali (float32 saklamada kopyasız görünüm)
+        """
+        if self._buffer is None:
+            return None
+        return self._vectors(slice(0, len(self._ids)))
+
+    def _vectors(self, rows):
+        scales = None if self._scales is None else self._scales[rows]
+        return dequantize(self._buffer[rows], scales) if self.dtype != "float32" else self._buffer[rows]
+
+    def _reserve(self, rows, dim):
+        capacity = 0 if self._buffer is None else len(self._buffer)
+        if capacity >= rows:
+            return
+        capacity = max(rows, 2 * capacity, 1024)
+        n = len(self._ids)
+
+        def grow(array, shape, dtype):
+            grown = np.empty(shape, dtype=dtype)
+            if array is not None:
+                grown[:n] = array[:n]
+            return grown
+
+        self._buffer = grow(self._buffer, (capacity, dim), self.dtype)
+        if self.dtype == "int8":
+            self._scales = grow(self._scales, (capacity,), np.float32)
+        if self.rescore:
+            self._full = grow(self._full, (capacity, dim), np.float32)
+
+    def _write(self, rows, vectors):
+        if isinstance(self._full, np.memmap):
+            self._full = np.array(self._full)
+        codes, scales = quantize(vectors, self.dtype)
+        self._buffer[rows] = codes
+        if scales is not None:
+            self._scales[rows] = scales
+        if self.rescore:
+            self._full[rows] = vectors
+
+    # --- Yazma ---
+
+    def add(self, ids, embeddings, documents=None, metadatas=None):
+        duplicates = [doc_id for doc_id in ids if doc_id in self._rows]
+        if duplicates:
+            raise ValueError(f"Id zaten mevcut: {duplicates[0]}")
+        self.upsert(ids, embeddings, documents, metadatas)
+
+    def upsert(self, ids, embeddings, documents=None, metadatas=None):
+        vectors = self._prepare(np.asarray(embeddings, dtype=np.float32))
+        documents = documents if documents is not None else [None] * len(ids)
+        metadatas = metadatas if metadatas is not None else [None] * len(ids)
+
+        new_rows = []
+        for i, (doc_id, document, metadata) in enumerate(zip(ids, documents, metadatas)):
+            row = self._rows.get(doc_id)
+            if row is None:
+                new_rows.append((i, doc_id, document, metadata))
+                continue
+            self._write([row], vectors[i:i + 1])
+            self._documents[row] = document
+            self._metadatas[row] = metadata
+
+        if new_rows:
+            start = len(self._ids)
+            self._reserve(start + len(new_rows), vectors.shape[1])
+            self._write(slice(start, start + len(new_rows)), vectors[[r[0] for r in new_rows]])
+            for offset, (_, doc_id, document, metadata) in enumerate(new_rows):
+                self._rows[doc_id] = start + offset
+                self._ids.append(doc_id)
+                self._documents.append(document)
+                self._metadatas.append(metadata)
+        self._changed()
+
+    def delete(self, ids):
+        drop = {self._rows[doc_id] for doc_id in ids if doc_id in self._rows}
+        if not drop:
+            return
+        keep = [row for row in range(len(self._ids)) if row not in drop]
+        self._buffer = self._buffer[keep]
+        if self._scales is not None:
+            self._scales = self._scales[keep]
+        if self._full is not None:
+            self._full = np.array(self._full[keep])
+        self._ids = [self._ids[row] for row in keep]
+        self._documents = [self._documents[row] for row in keep]
+        self._metadatas = [self._metadatas[row] for row in keep]
+        self._rows = {doc_id: row for row, doc_id in enumerate(self._ids)}
+        self._changed()
+
+    # --- Okuma ---
+
+    def count(self):
+        return len(self._ids)
+
+    def get(self, ids=None, where=None, include=("documents", "metadatas")):
+        rows = range(len(self._ids)) if ids is None else [self._rows[i] for i in ids if i in self._rows]
+        rows = [row for row in rows if _matches(self._metadatas[row], where)]
+        result = {"ids": [self._ids[row] for row in rows]}
+        if "documents" in include:
+            result["documents"] = [self._documents[row] for row in rows]
+        if "metadatas" in include:
+            result["metadatas"] = [self._metadatas[row] for row in rows]
+        if "embeddings" in include:
+            result["embeddings"] = self._vectors(rows) if rows else np.empty((0, 0), np.float32)
+        return result
+
+    def query(self, query_embeddings, n_results=10, where=None,
+              include=("documents", "metadatas", "distances")):
+        queries = self._prepare(np.asarray(query_embeddings, dtype=np.float32))
+        if self._buffer is None or not self._ids:
+            rows = np.empty((len(queries), 0), dtype=np.int64)
+            distances = np.empty((len(queries), 0), dtype=np.float32)
+        else:
+            candidates = None
+            if where:
+                candidates = np.array(
+                    [row for row in range(len(self._ids)) if _matches(self._metadatas[row], where)],
+                    dtype=np.int64,
+                )
+            k = n_results * self.rescore_factor if self.rescore else n_results
+            if candidates is None:
+                rows, distances = self._search(queries, k)
+            else:
+                rows, distances = self._exact_search(queries, k, candidates)
+            if self.rescore:
+                rows, distances = self._rescore(queries, rows, n_results)
+        return self._format(rows, distances, include)
+
+    # --- Arama ---
+
+    def _search(self, queries, k):
+        return self._exact_search(queries, k)
+
+    def _exact_search(self, queries, k, candidates=None):
+        """
+        Satırları bloklar halinde tarar, her blokta top-k'yı alıp birleştirir
+        """
+        total = len(self._ids) if candidates is None else len(candidates)
+        k = min(k, total)
+        best_rows = np.empty((len(queries), 0), np.int64)
+        best_distances = np.empty((len(queries), 0), np.float32)
+        if k == 0:
+            return best_rows, best_distances
+
+        for start in range(0, total, self.SEARCH_BLOCK):
+            end = min(start + self.SEARCH_BLOCK, total)
+            rows = np.arange(start, end) if candidates is None else candidates[start:end]
+            block = self._vectors(slice(start, end) if candidates is None else rows)
+            distances = self._distances(queries, block)
+            block_k = min(k, end - start)
+            top = np.argpartition(distances, block_k - 1, axis=1)[:, :block_k]
+            best_rows = np.hstack([best_rows, rows[top]])
+            best_distances = np.hstack([best_distances, np.take_along_axis(distances, top, axis=1)])
+
+        order = np.argsort(best_distances, axis=1, kind="stable")[:, :k]
+        return (np.take_along_axis(best_rows, order, axis=1),
+                np.take_along_axis(best_distances, order, axis=1))
+
+    def _rescore(self, queries, rows, k):
+        """
+        Kuantize aramadan gelen adayları float32 vektörlerle yeniden sıralar
+        """
+        out_rows, out_distances = [], []
+        for query, query_rows in zip(queries, rows):
+            # Sıralı satır erişimi memory-map'li dosyada daha hızlıdır
+            query_rows = np.sort(np.asarray(query_rows, dtype=np.int64))
+            distances = self._distances(query[None, :], self._full[query_rows])[0]
+            order = np.argsort(distances, kind="stable")[:k]
+            out_rows.append(query_rows[order])
+            out_distances.append(distances[order])
+        return out_rows, out_distances
+
+    def _distances(self, queries, matrix):
+        scores = queries @ matrix.T
+        if self.space == "l2":
+            sq_norms = np.einsum("ij,ij->i", matrix, matrix)
+            q_norms = np.einsum("ij,ij->i", queries, queries)
+            return np.maximum(q_norms[:, None] - 2 * scores + sq_norms[None, :], 0)
+        # "ip" ve "cosine" (vektörler normalize edilmiş) için
+        return 1.0 - scores
+
+    def _prepare(self, vectors):
+        if vectors.ndim == 1:
+            vectors = vectors[None, :]
+        if self.space == "cosine":
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors = vectors / np.where(norms > 0, norms, 1)
+        return vectors.astype(np.float32, copy=False)
+
+    def _format(self, rows, distances, include):
+        result = {"ids": [[self._ids[row] for row in query_rows] for query_rows in rows]}
+        if "documents" in include:
+            result["documents"] = [[self._documents[row] for row in query_rows] for query_rows in rows]
+        if "metadatas" in include:
+            result["metadatas"] = [[self._metadatas[row] for row in query_rows] for query_rows in rows]
+        if "distances" in include:
+            result["distances"] = [[float(d) for d in query_distances] for query_distances in distances]
+        return result
+
+    def _changed(self):
+        """
+        Alt sınıfların index'i yeniden kurması için kanca
+        """
+
+    # --- Kalıcılık ---
+
+    def memory_bytes(self):
+        """
+        Arama için RAM'de tutulan vektör verisinin boyutu (memory-map'li dosyalar hariç)
+        """
+        n = len(self._ids)
+        total = 0 if self._buffer is None else self._buffer[:n].nbytes
+        if self._scales is not None:
+            total += self._scales[:n].nbytes
+        if self._full is not None and not isinstance(self._full, np.memmap):
+            total += self._full[:n].nbytes
+        return total
+
+    def persist(self):
+        if not self.path:
+            return
+        os.makedirs(self.path, exist_ok=True)
+        n = len(self._ids)
+        empty = np.empty((0, 0), np.float32)
+        np.save(os.path.join(self.path, "vectors.npy"), self._buffer[:n] if self._buffer is not None else empty)
+        if self._scales is not None:
+            np.save(os.path.join(self.path, "scales.npy"), self._scales[:n])
+        if self._full is not None and not isinstance(self._full, np.memmap):
+            np.save(os.path.join(self.path, "vectors_full.npy"), self._full[:n])
+        with open(os.path.join(self.path, "records.json"), "w", encoding="utf-8") as f:
+            json.dump({
+                "space": self.space,
+                "dtype": self.dtype,
+                "ids": self._ids,
+                "documents": self._documents,
+                "metadatas": self._metadatas,
+            }, f, ensure_ascii=False)
+
+    def _load(self):
+        with open(os.path.join(self.path, "records.json"), "r", encoding="utf-8") as f:
+            records = json.load(f)
+        if records["space"] != self.space or records.get("dtype", "float32") != self.dtype:
+            print(f"Uyari: {self.path} farkli ayarlarla kaydedilmis "
+                  f"({records['space']}, {records.get('dtype', 'float32')}), yeniden indeksleyin")
+            return
+        self._ids = records["ids"]
+        self._documents = records["documents"]
+        self._metadatas = records["metadatas"]
+        self._rows = {doc_id: row for row, doc_id in enumerate(self._ids)}
+        if not self._ids:
+            return
+        self._buffer = np.load(os.path.join(self.path, "vectors.npy"))
+        if self.dtype == "int8":
+            self._scales = np.load(os.path.join(self.path, "scales.npy"))
+        full_path = os.path.join(self.path, "vectors_full.npy")
+        if self.rescore and os.path.exists(full_path):
+            # Tam hassasiyetli kopyalar yalnızca yeniden puanlamada okunur, RAM'e alınmaz
+            self._full = np.load(full_path, mmap_mode="r")
+        elif self.rescore:
+            self.rescore = False
+            print(f"Uyari: {full_path} bulunamadi, yeniden puanlama kapatildi")
+
+
+class FaissVectorStore(NumpyVectorStore):
+    """
+    Vektörleri NumpyVectorStore gibi saklayıp aramayı FAISS index'i ile yapan store.
+
+    index_type: "flat" (birebir, NumPy ile aynı sonuç), "ivf" (IndexIVFFlat)
+    veya "hnsw" (IndexHNSWFlat). Index ilk sorguda ve her değişiklikten
+    sonraki ilk sorguda yeniden kurulur; metadata filtreli sorgular birebir
+    NumPy aramasına düşer.
+    """
+
+    def __init__(self, space=VECTOR_SPACE, path=None, index_type=FAISS_INDEX,
+                 nlist=FAISS_NLIST, nprobe=FAISS_NPROBE, hnsw_m=FAISS_HNSW_M,
+                 ef_construction=FAISS_EF_CONSTRUCTION, ef_search=FAISS_EF_SEARCH):
+        import faiss
+
+        if index_type not in ("flat", "ivf", "hnsw"):
+            raise ValueError(f"Bilinmeyen FAISS index tipi: {index_type}")
+        self._faiss = faiss
+        self.index_type = index_type
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.hnsw_m = hnsw_m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self._index = None
+        # FAISS kendi float32 kopyasını tuttuğundan sıkıştırılmış saklama kullanılmaz
+        super().__init__(space=space, path=path, dtype="float32", rescore=False)
+
+    def _changed(self):
+        self._index = None
+
+    def build_index(self):
+        faiss = self._faiss
+        dim = self._matrix.shape[1]
+        metric = faiss.METRIC_L2 if self.space == "l2" else faiss.METRIC_INNER_PRODUCT
+
+        if self.index_type == "flat":
+            index = faiss.IndexFlat(dim, metric)
+        elif self.index_type == "ivf":
+            # Küme sayısı veri boyutuna göre sınırlanır (küme başına en az ~39 eğitim noktası)
+            nlist = max(1, min(self.nlist, len(self._ids) // 39))
+            quantizer = faiss.IndexFlat(dim, metric)
+            index = faiss.IndexIVFFlat(quantizer, dim, nlist, metric)
+            index.train(self._matrix)
+            index.nprobe = min(self.nprobe, nlist)
+        else:
+            index = faiss.IndexHNSWFlat(dim, self.hnsw_m, metric)
+            index.hnsw.efConstruction = self.ef_construction
+            index.hnsw.efSearch = self.ef_search
+
+        index.add(self._matrix)
+        self._index = index
+        return index
+
+    def _search(self, queries, k):
+        if self._index is None:
+            self.build_index()
+        k = min(k, len(self._ids))
+        scores, rows = self._index.search(queries, k)
+        distances = scores if self.space == "l2" else 1.0 - scores
+        # IVF/HNSW yeterli aday bulamazsa -1 döner; bunları at
+        if (rows < 0).any():
+            valid = rows >= 0
+            rows = [r[v] for r, v in zip(rows, valid)]
+            distances = [d[v] for d, v in zip(distances, valid)]
+        return rows, distances
+
+    def memory_bytes(self):
+        total = super().memory_bytes()
+        if self._index is not None and self.index_type != "flat":
+            total += self._faiss.serialize_index(self._index).nbytes
+        return total
+
+
+def _matches(metadata, where):
+    """
+    Chroma'nın basit eşitlik filtresini ({"alan": değer}, {"alan": {"$eq": değer}}) uygular
+    """
+    if not where:
+        return True
+    if metadata is None:
+        return False
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(_matches(metadata, sub) for sub in condition):
+                return False
+            continue
+        if isinstance(condition, dict):
+            op, value = next(iter(condition.items()))
+            if op == "$eq" and metadata.get(key) != value:
+                return False
+            if op == "$ne" and metadata.get(key) == value:
+                return False
+            if op == "$in" and metadata.get(key) not in value:
+                return False
+        elif metadata.get(key) != condition:
+            return False
+    return True
+
+
+def hnsw_config(path=HNSW_CONFIG_PATH):
+    """
+    Chroma HNSW ayarları: config değerleri, tune_hnsw'nun yazdığı dosya varsa onun değerleri
+    """
+    config = {
+        "space": VECTOR_SPACE, "M": CHROMA_HNSW_M,
+        "construction_ef": CHROMA_HNSW_CONSTRUCTION_EF, "search_ef": CHROMA_HNSW_SEARCH_EF,
+    }
+    if path:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                tuned = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            tuned = {}
+        config.update({key: tuned[key] for key in HNSW_PARAMS if key in tuned})
+    return config
+
+
+def hnsw_metadata(config):
+    return {f"hnsw:{key}": value for key, value in config.items()}
+
+
+def collection_hnsw(collection):
+    """
+    Chroma koleksiyonunda uygulanan HNSW ayarları (yeni sürümlerde
+    `configuration`, eskilerde metadata okunur)
+    """
+    hnsw = (getattr(collection, "configuration", None) or {}).get("hnsw")
+    if hnsw:
+        return {"space": hnsw["space"], "M": hnsw["max_neighbors"],
+                "construction_ef": hnsw["ef_construction"], "search_ef": hnsw["ef_search"]}
+    metadata = collection.metadata or {}
+    return {key: metadata.get(f"hnsw:{key}", default) for key, default in _CHROMA_HNSW_DEFAULTS.items()}
+
+
+def set_search_ef(collection, search_ef):
+    """
+    Var olan koleksiyonun search_ef'ini değiştirir; Chroma sürümü desteklemiyorsa False
+    """
+    try:
+        collection.modify(configuration={"hnsw": {"ef_search": search_ef}})
+    except Exception:
+        return False
+    return True
+
+
+def open_vector_store(backend=VECTOR_BACKEND, rebuild=False, name=COLLECTION_NAME):
+    """
+    Ayarlanan arka uç için store'u açar (yoksa boş oluşturur).
+    rebuild=True mevcut veriyi siler.
+    """
+    if backend == "chroma":
+        from startup import get_chroma_client
+
+        client = get_chroma_client(CHROMA_PATH)
+        if rebuild:
+            try:
+                client.delete_collection(name=name)
+            except Exception:
+                pass
+        config = hnsw_config()
+        # Metadata yalnızca oluştururken verilir: var olan koleksiyona vermek
+        # saklanan ayarların üzerine yazıp uyumsuzluğu gizleyebilir
+        try:
+            collection = client.get_collection(name=name)
+        except Exception:  # Koleksiyon yok (Chroma sürümüne göre NotFoundError veya ValueError)
+            return client.get_or_create_collection(name=name, metadata=hnsw_metadata(config))
+        applied = collection_hnsw(collection)
+        if applied["search_ef"] != config["search_ef"]:
+            set_search_ef(collection, config["search_ef"])
+        stale = {key: applied[key] for key in ("space", "M", "construction_ef") if applied[key] != config[key]}
+        if stale:
+            print(f"Uyari: {name} farkli HNSW ayarlariyla olusturulmus ({stale}), "
+                  f"{config} icin yeniden indeksleyin")
+        return collection
+
+    path = os.path.join(VECTOR_STORE_PATH, f"{name}_{backend}")
+    if rebuild and os.path.isdir(path):
+        shutil.rmtree(path)
+    if backend == "numpy":
+        return NumpyVectorStore(path=path)
+    if backend == "faiss":
+        return FaissVectorStore(path=path)
+    raise ValueError(f"Bilinmeyen vector store arka ucu: {backend}")
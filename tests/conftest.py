@@ -0,0 +1,8 @@
+import os
+import sys
+
+# Testler model indirmeden deterministik hash embedder ile çalışır
+os.environ.setdefault("EMBED_BACKEND", "hash")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
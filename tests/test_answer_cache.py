@@ -0,0 +1,48 @@
+import os
+
+import numpy as np
+
+import answer_cache
+from answer_cache import SemanticAnswerCache
+from ingest import save_manifest
+
+
+def vec(*values):
+    return np.array(values, dtype=np.float32)
+
+
+def test_similarity_threshold_and_exact_key(tmp_path):
+    cache = SemanticAnswerCache(threshold=0.95, manifest_path=str(tmp_path / "manifest.json"))
+    cache.store("Düşman nasıl yenilir?", vec(1, 0, 0), "cevap", "bağlam")
+
+    # Aksansız/küçük harfli yazım birebir anahtarla eşleşir, vektör farklı olsa bile
+    assert cache.lookup("dusman nasil yenilir?", vec(0, 1, 0)) == ("cevap", "bağlam")
+    assert cache.lookup("Başka soru", vec(0.99, 0.1, 0)) == ("cevap", "bağlam")  # kosinüs ~0.995
+    assert cache.lookup("Başka soru", vec(0.8, 0.6, 0)) is None  # kosinüs 0.8
+    assert cache.stats()["hits"] == 2 and cache.stats()["misses"] == 1
+
+
+def test_ttl_expiry(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(answer_cache.time, "time", lambda: now[0])
+    cache = SemanticAnswerCache(ttl=60, manifest_path=str(tmp_path / "manifest.json"))
+    cache.store("soru", vec(1, 0), "cevap", "bağlam")
+    now[0] += 59
+    assert cache.lookup("soru", vec(1, 0)) is not None
+    now[0] += 2
+    assert cache.lookup("soru", vec(1, 0)) is None
+    assert cache.stats()["size"] == 0
+
+
+def test_invalidated_when_manifest_version_changes(tmp_path):
+    manifest = str(tmp_path / "manifest.json")
+    save_manifest({"version": "v1", "ids": []}, manifest)
+    cache = SemanticAnswerCache(manifest_path=manifest)
+    cache.store("soru", vec(1, 0), "cevap", "bağlam")
+    assert cache.lookup("soru", vec(1, 0)) is not None
+
+    save_manifest({"version": "v2", "ids": []}, manifest)
+    stat = os.stat(manifest)
+    os.utime(manifest, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))  # mtime çözünürlüğünden bağımsız
+    assert cache.lookup("soru", vec(1, 0)) is None
+    assert cache.stats()["invalidations"] == 1
@@ -0,0 +1,61 @@
+import asyncio
+import os
+
+import pytest
+
+import async_pipeline
+from async_pipeline import run_batch
+from chunker import iter_file_chunks
+from ingest import sync_collection
+from stubs import HashEmbedder, StubLLM
+from vector_store import NumpyVectorStore
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class CountingLLM(StubLLM):
+    """
+    Aynı anda çalışan async üretim sayısının en yükseğini tutan stub
+    """
+
+    def __init__(self, delay):
+        super().__init__(delay=delay)
+        self.started = 0
+        self.active = 0
+        self.peak = 0
+
+    async def generate_content_async(self, prompt):
+        self.started += 1
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            # Önce başlayan daha geç biter: sonuç sırası tamamlanma sırasına bağlı olmamalı
+            await asyncio.sleep(self.delay / self.started)
+            return await super().generate_content_async(prompt)
+        finally:
+            self.active -= 1
+
+
+@pytest.fixture(scope="module")
+def collection(tmp_path_factory):
+    store = NumpyVectorStore()
+    manifest = tmp_path_factory.mktemp("ingest") / "manifest.json"
+    sync_collection(store, HashEmbedder(), iter_file_chunks(os.path.join(ROOT, "sun_tzu.txt")),
+                    manifest_path=str(manifest))
+    return store
+
+
+@pytest.mark.parametrize("concurrency", [1, 3])
+def test_run_batch_bounded_and_ordered(monkeypatch, collection, concurrency):
+    monkeypatch.setattr(async_pipeline, "answer_cache", None)
+    queries = [f"Soru {i}: savaşta strateji nedir?" for i in range(8)]
+    model = CountingLLM(delay=0.02)
+
+    results = run_batch(model, HashEmbedder(), collection, queries, concurrency=concurrency, workers=2)
+
+    assert model.peak == concurrency
+    assert model.calls == len(queries)
+    assert [answer for answer, _ in results] == [
+        f"[stub] '{query}' sorusu icin Sun Tzu'nun ogretilerine dayali cevap." for query in queries
+    ]
+    assert all(context for _, context in results)
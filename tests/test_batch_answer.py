@@ -0,0 +1,62 @@
+import json
+import os
+
+import batch_answer
+from batch_answer import completed_ids, run
+from chunker import iter_file_chunks
+from ingest import sync_collection
+from stubs import HashEmbedder, StubLLM
+from vector_store import NumpyVectorStore
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def write_lines(path, records):
+    with open(path, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def read_ids(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line)["id"] for line in f]
+
+
+def test_completed_ids_truncates_partial_line(tmp_path):
+    path = tmp_path / "cevaplar.jsonl"
+    assert completed_ids(str(path)) == set()
+
+    write_lines(path, [{"id": "1", "answer": "a"}, {"id": "2", "answer": "b"}])
+    with open(path, "ab") as f:
+        f.write('{"id": "3", "answer": "yar'.encode("utf-8"))
+
+    assert completed_ids(str(path)) == {"1", "2"}
+    # Yarım satır kesilir, sonraki yazımlar geçerli bir satırdan başlar
+    assert path.read_bytes().endswith(b'"b"}\n')
+    assert read_ids(path) == ["1", "2"]
+
+
+def test_run_resumes_after_interruption(monkeypatch, tmp_path):
+    monkeypatch.setattr(batch_answer, "answer_cache", None)
+    store = NumpyVectorStore()
+    sync_collection(store, HashEmbedder(), iter_file_chunks(os.path.join(ROOT, "sun_tzu.txt")),
+                    manifest_path=str(tmp_path / "manifest.json"))
+    questions = tmp_path / "sorular.jsonl"
+    write_lines(questions, [{"id": str(i), "query": f"Soru {i}: savaşta strateji nedir?"} for i in range(6)])
+
+    output = tmp_path / "cevaplar.jsonl"
+    write_lines(output, [{"id": "0", "answer": "x"}, {"id": "3", "answer": "y"}])
+    with open(output, "ab") as f:
+        f.write(b'{"id": "4", "ans')
+
+    model = StubLLM(delay=0)
+    stats = run(model, HashEmbedder(), store, str(questions), str(output), concurrency=2, block_size=2)
+    assert stats["answered"] == 4 and stats["failed"] == 0
+    assert model.calls == 4
+    ids = read_ids(output)
+    assert ids[:2] == ["0", "3"]
+    assert sorted(ids) == [str(i) for i in range(6)]
+
+    # Tamamlanmış çıktıyla tekrar çalıştırmak hiçbir soruyu yeniden cevaplamaz
+    again = run(model, HashEmbedder(), store, str(questions), str(output))
+    assert again["answered"] == 0 and model.calls == 4
@@ -0,0 +1,57 @@
+from chat_session import ChatSession
+from context_builder import count_tokens
+
+QUESTIONS = [
+    "Savaşta en önemli şey nedir?",
+    "Kuşatma ne zaman yapılmalıdır?",
+    "Casuslar nasıl kullanılır?",
+    "Arazi türleri nelerdir?",
+]
+
+
+def answer(i):
+    return f"Cevap {i} ilk cümledir. Bu ikinci cümle özete girmez."
+
+
+def test_window_keeps_last_turns_and_summarizes_rest():
+    session = ChatSession(window=2)
+    for i, question in enumerate(QUESTIONS[:3]):
+        session.add_turn(question, answer(i))
+
+    assert session.turns == [(QUESTIONS[1], answer(1)), (QUESTIONS[2], answer(2))]
+    assert session.summary == f"{QUESTIONS[0]} -> Cevap 0 ilk cümledir."
+    assert len(session) == 3
+
+    session.add_turn(QUESTIONS[3], answer(3))
+    assert [q for q, _ in session.turns] == QUESTIONS[2:]
+    assert session.summary.split("\n") == [
+        f"{QUESTIONS[0]} -> Cevap 0 ilk cümledir.",
+        f"{QUESTIONS[1]} -> Cevap 1 ilk cümledir.",
+    ]
+    history = session.history_text()
+    assert history.startswith("Özet: ") and "Asistan: " + answer(3) in history
+
+
+def test_summary_rollover_drops_oldest_within_budget():
+    session = ChatSession(window=1, summary_max_tokens=15)
+    for i, question in enumerate(QUESTIONS):
+        session.add_turn(question, answer(i))
+
+    assert count_tokens(session.summary) <= 15
+    # Bütçe aşıldıkça en eski satırlar atılır, en yeni özet satırı kalır
+    assert session.summary == f"{QUESTIONS[2]} -> Cevap 2 ilk cümledir."
+    assert session.turns == [(QUESTIONS[3], answer(3))]
+    assert len(session.transcript) == 4
+
+
+def test_follow_up_uses_last_topic():
+    session = ChatSession(window=2)
+    assert session.standalone_question("Peki bunu nasıl yaparım?") == "Peki bunu nasıl yaparım?"
+    session.add_turn(QUESTIONS[1], answer(1))
+    assert session.standalone_question("Peki bunu nasıl yaparım?") == f"{QUESTIONS[1]} Peki bunu nasıl yaparım?"
+    standalone = "Casusları savaşta nasıl kullanmak gerekir?"
+    assert session.standalone_question(standalone) == standalone
+
+    tokens = session.add_turn("Peki bunu nasıl yaparım?", "Sabırla.", prompt=50)
+    assert tokens == {"prompt": 50, "answer": count_tokens("Sabırla.")}
+    assert session.topic == QUESTIONS[1]
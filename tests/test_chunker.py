@@ -0,0 +1,77 @@
+from chunker import iter_chunks, parse_header
+
+LINES = [
+    "Giriş notu: bu metin bölüm başlığından önce gelir ve yeterince uzundur.",
+    "BÖLÜM 1: PLANLAMA",
+    "Savaş devlet için hayati önemdedir. Ölüm ya da kalım meselesidir. "
+    "Güvenliğe ya da yıkıma giden yoldur. Bu yüzden hiçbir şekilde ihmal edilemez.",
+    "Savaş sanatı beş sabit faktör tarafından yönetilir. Bunlar ahlak yasası, gök, "
+    "yer, komutan ile yöntem ve disiplindir.",
+    "=== BOLUM 2: SAVAŞ YÖNETİMİ ===",
+    "Savaşta zafer asıl amaç olmalıdır. Uzun süren savaşlarda silahlar körelir ve "
+    "askerlerin hevesi söner. Kuşatma güçlerini tüketir.",
+]
+
+
+def chunks(**kwargs):
+    kwargs.setdefault("chunk_size", 100)
+    kwargs.setdefault("overlap", 30)
+    kwargs.setdefault("min_length", 10)
+    return list(iter_chunks(LINES, source="kitap.txt", **kwargs))
+
+
+def test_parse_header_formats():
+    assert parse_header("BÖLÜM 3: STRATEJİK SALDIRI") == (3, "STRATEJİK SALDIRI")
+    assert parse_header("=== BOLUM 3: STRATEJIK SALDIRI ===") == (3, "STRATEJIK SALDIRI")
+    assert parse_header("=== SUN TZU'NUN ÖĞÜTLERİ ===") == (0, "SUN TZU'NUN ÖĞÜTLERİ")
+    assert parse_header("Savaş bir sanattır.") is None
+
+
+def test_chunks_carry_chapter_metadata():
+    result = chunks()
+    assert [c["metadata"]["chunk"] for c in result] == list(range(len(result)))
+    assert {c["metadata"]["source"] for c in result} == {"kitap.txt"}
+    assert result[0]["metadata"]["chapter"] == 0
+    assert result[0]["metadata"]["chapter_title"] == ""
+
+    by_chapter = {}
+    for chunk in result:
+        meta = chunk["metadata"]
+        by_chapter.setdefault(meta["chapter"], set()).add(meta["chapter_title"])
+    assert by_chapter == {0: {""}, 1: {"PLANLAMA"}, 2: {"SAVAŞ YÖNETİMİ"}}
+
+
+def test_chunks_stay_within_chapter():
+    result = chunks()
+    chapter_two = " ".join(c["text"] for c in result if c["metadata"]["chapter"] == 2)
+    assert "disiplindir" not in chapter_two
+    assert "Savaşta zafer" in chapter_two
+    # Bölümün ilk parçası önceki bölümden örtüşme taşımaz
+    first = next(c for c in result if c["metadata"]["chapter"] == 2)
+    assert first["text"].startswith("Savaşta zafer")
+
+
+def test_consecutive_chunks_overlap():
+    result = chunks()
+    pairs = [
+        (a["text"], b["text"]) for a, b in zip(result, result[1:])
+        if a["metadata"]["chapter"] == b["metadata"]["chapter"]
+    ]
+    assert pairs
+    for previous, current in pairs:
+        assert len(current) <= 100
+        # Yeni parça, öncekinin en fazla `overlap` karakterlik kuyruğuyla başlar
+        shared = next(n for n in range(min(len(previous), 30), -1, -1)
+                      if current.startswith(previous[len(previous) - n:]))
+        assert 0 < shared <= 30
+
+
+def test_no_overlap_when_disabled():
+    result = chunks(overlap=0)
+    texts = " ".join(c["text"] for c in result)
+    for line in LINES:
+        if parse_header(line) is None:
+            for word in line.split():
+                assert texts.count(word) >= 1
+    for a, b in zip(result, result[1:]):
+        assert not b["text"].startswith(a["text"][-10:])
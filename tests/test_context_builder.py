@@ -0,0 +1,44 @@
+from context_builder import build_context, count_tokens, select_documents, truncate_tokens
+
+
+def words(prefix, n):
+    return " ".join(f"{prefix}{i}" for i in range(n))
+
+
+def test_budget_skips_what_does_not_fit():
+    docs = [words("a", 20), words("b", 20), words("c", 3)]
+    sizes = [count_tokens(d) for d in docs]
+    budget = sizes[0] + sizes[2] + 1
+
+    built = build_context(docs, [0.1, 0.1, 0.1], max_tokens=budget, ratio=0)
+    # İkinci metin sığmaz, atlanır; sonraki küçük metin yine eklenir
+    assert built["context"] == docs[0] + "\n\n" + docs[2]
+    assert built["k"] == 2
+    assert built["tokens"] == sizes[0] + sizes[2] <= budget
+    assert built["tokens_saved"] == count_tokens("\n\n".join(docs)) - built["tokens"]
+
+
+def test_first_document_truncated_to_budget():
+    doc = words("kelime", 100)
+    built = build_context([doc], [0.1], max_tokens=20)
+    assert built["k"] == 1
+    assert 0 < built["tokens"] <= 20
+    assert doc.startswith(built["context"])
+    assert truncate_tokens(doc, 20, None) == built["context"]
+
+
+def test_near_duplicates_dropped_and_overlap_stripped():
+    base = words("s", 30)
+    duplicate = base + " ek"
+    tail = " ".join(base.split()[-8:])
+    follower = tail + " " + words("t", 10)
+
+    selected = select_documents([base, duplicate, follower], [0.1, 0.1, 0.1], ratio=0)
+    assert selected == [base, words("t", 10)]
+
+
+def test_distance_ratio_limits_k():
+    docs = [words("a", 5), words("b", 5), words("c", 5)]
+    assert len(select_documents(docs, [0.2, 0.3, 0.9], ratio=2.0)) == 2
+    assert len(select_documents(docs, [0.2, 0.3, 0.9], ratio=0)) == 3
+    assert len(select_documents(docs, [0.2, 0.3, 0.9], ratio=0, max_k=1)) == 1
@@ -0,0 +1,81 @@
+import importlib
+
+import numpy as np
+import pytest
+
+import config
+from embedding_cache import CachedEmbedder, EmbeddingCache, cached_embedder, text_key
+from stubs import HashEmbedder
+
+
+@pytest.fixture
+def reload_config(monkeypatch):
+    def load(**env):
+        for name in ("EMBED_BACKEND", "EMBED_MODEL_NAME", "ONNX_QUANTIZE"):
+            monkeypatch.delenv(name, raising=False)
+        for name, value in env.items():
+            monkeypatch.setenv(name, value)
+        return importlib.reload(config)
+
+    yield load
+    monkeypatch.undo()
+    importlib.reload(config)
+
+
+def test_cache_key_separates_backends(reload_config):
+    keys = {
+        reload_config(EMBED_BACKEND="sentence-transformers").EMBED_CACHE_KEY,
+        reload_config(EMBED_BACKEND="onnx").EMBED_CACHE_KEY,
+        reload_config(EMBED_BACKEND="onnx", ONNX_QUANTIZE="1").EMBED_CACHE_KEY,
+        reload_config(EMBED_BACKEND="hash").EMBED_CACHE_KEY,
+    }
+    assert len(keys) == 4
+    # int8 yalnızca ONNX arka ucunda anlamlı
+    assert reload_config(ONNX_QUANTIZE="1").EMBED_CACHE_KEY == reload_config().EMBED_CACHE_KEY
+
+
+def test_cache_entries_not_shared_between_keys(tmp_path):
+    model = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+    keys = [text_key("Savaş bir sanattır.")]
+    EmbeddingCache(str(tmp_path), f"{model}-sentence-transformers").put_many(keys, np.ones((1, 4)))
+
+    rows, _ = EmbeddingCache(str(tmp_path), f"{model}-onnx-int8").get_many(keys)
+    assert rows.tolist() == [-1]
+    rows, vectors = EmbeddingCache(str(tmp_path), f"{model}-sentence-transformers").get_many(keys)
+    assert rows.tolist() == [0] and vectors.tolist() == [[1.0] * 4]
+
+
+def test_hash_backend_not_cached(monkeypatch):
+    import embedding_cache
+
+    monkeypatch.setattr(embedding_cache, "EMBED_BACKEND", "hash")
+    embedder = HashEmbedder()
+    assert cached_embedder(embedder) is embedder
+
+
+class CountingEmbedder(HashEmbedder):
+    def __init__(self):
+        super().__init__()
+        self.seen = []
+
+    def encode(self, sentences, **kwargs):
+        self.seen.append(list(sentences))
+        return super().encode(sentences, **kwargs)
+
+
+def test_mixed_hits_and_misses_keep_input_order(tmp_path):
+    embedder = CountingEmbedder()
+    cached = CachedEmbedder(embedder, EmbeddingCache(str(tmp_path), "stub"))
+    texts = ["Savaş bir sanattır.", "Düşmanını tanı.", "Kendini tanı.", "Su gibi ol."]
+    expected = HashEmbedder().encode(texts)
+
+    cached.encode([texts[1], texts[3]])
+    result = cached.encode(texts)
+    # Yalnızca cache'te olmayanlar embedder'a gider, sonuç girdi sırasında döner
+    assert embedder.seen == [[texts[1], texts[3]], [texts[0], texts[2]]]
+    np.testing.assert_allclose(result, expected)
+
+    # Tamamı cache'ten okunur, embedder çağrılmaz
+    reopened = CachedEmbedder(embedder, EmbeddingCache(str(tmp_path), "stub"))
+    np.testing.assert_allclose(reopened.encode(texts[::-1]), expected[::-1])
+    assert len(embedder.seen) == 2
@@ -0,0 +1,27 @@
+import pytest
+
+from example_answers import model_label
+from llm_client import ResilientModel
+from stubs import StubLLM
+
+
+class FakeGenerativeModel:
+    model_name = "models/gemini-1.5-flash"
+
+
+def test_model_label_sdk_model():
+    assert model_label(FakeGenerativeModel()) == "gemini-1.5-flash"
+    assert model_label(ResilientModel(FakeGenerativeModel(), rate_limit=0)) == "gemini-1.5-flash"
+
+
+def test_model_label_rest_model():
+    pytest.importorskip("requests")
+    from llm_client import GeminiRestModel
+
+    rest = GeminiRestModel("gemini-1.5-flash", api_key="test")
+    assert model_label(rest) == "gemini-1.5-flash"
+    assert model_label(ResilientModel(rest, rate_limit=0)) == "gemini-1.5-flash"
+
+
+def test_model_label_stub():
+    assert model_label(StubLLM()) == "StubLLM"
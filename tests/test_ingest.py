@@ -0,0 +1,59 @@
+import os
+
+from chunker import iter_chunks
+from ingest import content_id, load_manifest, sync_collection
+from stubs import HashEmbedder
+from vector_store import NumpyVectorStore
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def chunk_ids(lines, source):
+    return {
+        content_id(chunk["text"], chunk["metadata"]): chunk["metadata"]["chapter"]
+        for chunk in iter_chunks(lines, source=source)
+    }
+
+
+def test_unrelated_edit_keeps_other_ids():
+    with open(os.path.join(ROOT, "sun_tzu.txt"), "r", encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    before = chunk_ids(lines, source="sun_tzu.txt")
+
+    # Bölüm 1'e paragraf eklenir ve dosya taşınır: sonraki parçaların sıra
+    # numarası ve kaynağı değişir, ama içerikleri değişmez
+    edited = list(lines)
+    edited.insert(lines.index("BÖLÜM 2: SAVAŞ YÖNETİMİ"), "Yeni eklenen bir paragraf: plan yapmadan yola çıkma.")
+    after = chunk_ids(edited, source="kitaplar/sun_tzu.txt")
+
+    others = {doc_id for doc_id, chapter in before.items() if chapter != 1}
+    assert len(others) > 5
+    assert others <= set(after)
+    assert set(after) - set(before), "eklenen paragraf yeni bir id uretmeli"
+
+
+def test_id_ignores_position_and_source():
+    text = "Savaş bir sanattır."
+    first = content_id(text, {"chapter": 1, "chapter_title": "X", "source": "a.txt", "chunk": 0})
+    moved = content_id(text, {"chapter": 1, "chapter_title": "X", "source": "b.txt", "chunk": 7})
+    other_chapter = content_id(text, {"chapter": 2, "chapter_title": "X", "source": "a.txt", "chunk": 0})
+    assert first == moved
+    assert first != other_chapter
+
+
+def test_sync_adds_removes_and_keeps_unchanged(tmp_path):
+    manifest = str(tmp_path / "manifest.json")
+    store, embedder = NumpyVectorStore(), HashEmbedder()
+    first = ["Savaş bir sanattır.", "Düşmanını tanı.", "Kendini tanı."]
+
+    stats = sync_collection(store, embedder, first, manifest_path=manifest)
+    assert (stats["added"], stats["removed"], stats["unchanged"]) == (3, 0, 0)
+
+    stats = sync_collection(store, embedder, first, manifest_path=manifest)
+    assert (stats["added"], stats["removed"], stats["unchanged"]) == (0, 0, 3)
+
+    second = ["Savaş bir sanattır.", "Kendini tanı.", "Su gibi ol.", "Su gibi ol."]
+    stats = sync_collection(store, embedder, second, manifest_path=manifest)
+    assert (stats["added"], stats["removed"], stats["unchanged"]) == (1, 1, 2)
+    assert sorted(store.get(include=["documents"])["documents"]) == sorted(set(second))
+    assert sorted(load_manifest(manifest)["ids"]) == sorted(content_id(text) for text in set(second))
@@ -0,0 +1,60 @@
+from lexical import BM25Index, index_for, is_keyword_query, tokenize
+from stubs import HashEmbedder
+from textnorm import fold_diacritics, turkish_casefold
+from vector_store import NumpyVectorStore
+
+DOCS = {
+    "kus": "Kuşatma en son çaredir; şehirleri kuşatmak ordunun gücünü tüketir.",
+    "casus": "Casusları kullanmak düşmanın niyetini önceden öğrenmeyi sağlar.",
+    "isik": "IŞIK ve gölge gibi, düzen de kargaşadan doğar.",
+    "ilim": "İLİM sahibi komutan düşmanını ve kendini tanır.",
+}
+
+
+def build(**kwargs):
+    metadatas = [{"chapter": i} for i in range(len(DOCS))]
+    return BM25Index(list(DOCS), list(DOCS.values()), metadatas, **kwargs)
+
+
+def test_turkish_casefold_dotted_and_dotless_i():
+    assert turkish_casefold("IŞIK İLİM") == "ışık ilim"
+    assert "İ".lower() != "i"  # Python'un varsayılanı birleşik nokta bırakır
+    assert fold_diacritics(turkish_casefold("IŞIK İLİM Düşman")) == "isik ilim dusman"
+    assert tokenize("Işık ve İlim", prefix_len=0) == ["isik", "ilim"]
+
+
+def test_bm25_ranks_and_folds_case():
+    index = build(prefix_len=0)
+    assert index.search("ışık")["ids"] == ["isik"]
+    assert index.search("ILIM")["ids"] == ["ilim"]
+    # Önekle kısaltma ekleri yok sayar: "düşmanın" ve "düşmanını" aynı terime düşer
+    stemmed = build()
+    assert set(stemmed.search("DÜŞMAN")["ids"]) == {"casus", "ilim"}
+
+    result = stemmed.search("kuşatma casus")
+    assert result["ids"][0] == "kus"  # terim iki kez geçer
+    assert result["scores"] == sorted(result["scores"], reverse=True)
+    assert "isik" not in result["ids"]  # skoru 0 olanlar dönmez
+
+
+def test_bm25_where_filter_and_k():
+    index = build()
+    assert index.search("düşman", where={"chapter": 3})["ids"] == ["ilim"]
+    assert len(index.search("düşman kuşatma ışık", k=2)["ids"]) == 2
+
+
+def test_index_rebuilt_when_collection_changes(tmp_path):
+    manifest = str(tmp_path / "manifest.json")
+    store = NumpyVectorStore()
+    texts = list(DOCS.values())[:2]
+    store.add(ids=list(DOCS)[:2], documents=texts, embeddings=HashEmbedder().encode(texts).tolist())
+    first = index_for(store, manifest)
+    assert index_for(store, manifest) is first
+    assert not is_keyword_query("ilim", first)
+
+    text = DOCS["ilim"]
+    store.add(ids=["ilim"], documents=[text], embeddings=HashEmbedder().encode([text]).tolist())
+    second = index_for(store, manifest)
+    assert second is not first and len(second) == 3
+    assert is_keyword_query("İlim komutan", second)
+    assert not is_keyword_query("ilim nedir", second)
@@ -0,0 +1,179 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from llm_client import GeminiHTTPError, LLMResponse, LLMTimeoutError, ResilientModel, TokenBucket
+
+
+def resilient(model, **kwargs):
+    options = dict(timeout=1.0, deadline=5.0, retries=2, backoff=0.01, max_backoff=0.05,
+                   rate_limit=0, hedge_after=0, pool_size=2)
+    options.update(kwargs)
+    return ResilientModel(model, **options)
+
+
+class FlakyAsyncModel:
+    """
+    İlk `failures` async çağrıda `error` yükselten, sonra cevap veren model
+    """
+
+    def __init__(self, failures, error, delay=0.0):
+        self.failures = failures
+        self.error = error
+        self.delay = delay
+        self.calls = 0
+
+    def generate_content(self, prompt):
+        raise AssertionError("async yol kullanilmali")
+
+    async def generate_content_async(self, prompt):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.calls <= self.failures:
+            raise self.error
+        return LLMResponse(f"cevap: {prompt}")
+
+
+class SyncModel:
+    """
+    Sırayla `errors`'taki hataları yükselten (None: cevap verir), her çağrıda
+    `delays`'teki kadar bekleyen senkron model
+    """
+
+    def __init__(self, errors=(), delays=()):
+        self.errors = list(errors)
+        self.delays = list(delays)
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt):
+        with self._lock:
+            index = self.calls
+            self.calls += 1
+        time.sleep(self.delays[index] if index < len(self.delays) else 0)
+        if index < len(self.errors) and self.errors[index] is not None:
+            raise self.errors[index]
+        return LLMResponse(f"cevap {index}: {prompt}")
+
+
+def test_async_uses_native_api_and_retries():
+    inner = FlakyAsyncModel(failures=2, error=GeminiHTTPError(503, "unavailable"))
+    response = asyncio.run(resilient(inner).generate_content_async("soru"))
+    assert response.text == "cevap: soru"
+    assert inner.calls == 3
+
+
+def test_async_does_not_retry_permanent_errors():
+    inner = FlakyAsyncModel(failures=1, error=GeminiHTTPError(400, "bad request"))
+    with pytest.raises(GeminiHTTPError):
+        asyncio.run(resilient(inner).generate_content_async("soru"))
+    assert inner.calls == 1
+
+
+def test_async_timeout():
+    inner = FlakyAsyncModel(failures=0, error=None, delay=1.0)
+    with pytest.raises(LLMTimeoutError):
+        asyncio.run(resilient(inner, timeout=0.05, deadline=0.2, retries=0).generate_content_async("soru"))
+
+
+def test_async_falls_back_to_sync_model():
+    inner = SyncModel()
+    model = resilient(inner)
+    assert hasattr(model, "generate_content_async")
+    assert asyncio.run(model.generate_content_async("soru")).text == "cevap 0: soru"
+    assert inner.calls == 1
+
+
+def test_retries_transient_errors():
+    inner = SyncModel(errors=[GeminiHTTPError(503, "unavailable"), GeminiHTTPError(502, "bad gateway")])
+    assert resilient(inner).generate_content("soru").text == "cevap 2: soru"
+    assert inner.calls == 3
+
+
+def test_gives_up_after_retries():
+    inner = SyncModel(errors=[GeminiHTTPError(503, "unavailable")] * 5)
+    with pytest.raises(GeminiHTTPError):
+        resilient(inner, retries=2).generate_content("soru")
+    assert inner.calls == 3
+
+
+def test_permanent_error_not_retried():
+    inner = SyncModel(errors=[GeminiHTTPError(400, "bad request")])
+    with pytest.raises(GeminiHTTPError):
+        resilient(inner).generate_content("soru")
+    assert inner.calls == 1
+
+
+def test_honours_retry_after():
+    inner = SyncModel(errors=[GeminiHTTPError(429, "quota", retry_after=0.2)])
+    start = time.monotonic()
+    assert resilient(inner).generate_content("soru").text == "cevap 1: soru"
+    assert time.monotonic() - start >= 0.2
+
+
+def test_attempt_timeout_is_retried():
+    inner = SyncModel(delays=[0.5])
+    start = time.monotonic()
+    assert resilient(inner, timeout=0.05).generate_content("soru").text == "cevap 1: soru"
+    assert time.monotonic() - start < 0.4
+
+
+def test_hedge_wins_over_slow_primary():
+    inner = SyncModel(delays=[0.5, 0.0])
+    start = time.monotonic()
+    response = resilient(inner, hedge_after=0.05).generate_content("soru")
+    assert response.text == "cevap 1: soru"
+    assert time.monotonic() - start < 0.4
+    assert inner.calls == 2
+
+
+def test_no_hedge_when_primary_is_fast():
+    inner = SyncModel()
+    resilient(inner, hedge_after=0.2).generate_content("soru")
+    assert inner.calls == 1
+
+
+def test_token_bucket_rate():
+    bucket = TokenBucket(rate=20, capacity=2)
+    start = time.monotonic()
+    for _ in range(6):
+        assert bucket.acquire(timeout=1)
+    # 2 token hazır, kalan 4'ü saniyede 20 hızla dolar
+    assert 0.15 <= time.monotonic() - start < 0.5
+
+
+def test_token_bucket_timeout():
+    bucket = TokenBucket(rate=1, capacity=1)
+    assert bucket.try_acquire()
+    assert not bucket.try_acquire()
+    assert not bucket.acquire(timeout=0.05)
+
+
+def test_rate_limit_spaces_calls():
+    inner = SyncModel()
+    model = resilient(inner, rate_limit=600, burst=1)  # saniyede 10 istek
+    start = time.monotonic()
+    for _ in range(3):
+        model.generate_content("soru")
+    assert time.monotonic() - start >= 0.15
+
+
+def test_model_timeout_error_not_mistaken_for_attempt_timeout():
+    error = TimeoutError("read timed out")
+    inner = SyncModel(errors=[error])
+    with pytest.raises(TimeoutError) as raised:
+        resilient(inner, retries=0).generate_content("soru")
+    assert raised.value is error
+    # Geçici hata olarak yine tekrar denenir
+    inner = SyncModel(errors=[TimeoutError("read timed out")])
+    assert resilient(inner).generate_content("soru").text == "cevap 1: soru"
+
+
+def test_async_model_timeout_error_propagates():
+    error = TimeoutError("read timed out")
+    inner = FlakyAsyncModel(failures=1, error=error)
+    with pytest.raises(TimeoutError) as raised:
+        asyncio.run(resilient(inner, retries=0).generate_content_async("soru"))
+    assert raised.value is error
@@ -0,0 +1,49 @@
+import time
+
+import pytest
+
+pytest.importorskip("requests")
+
+from llm_client import GeminiHTTPError, GeminiRestModel, LLMTimeoutError, ResilientModel  # noqa: E402
+from stubs import StubGeminiServer  # noqa: E402
+
+
+def client(server, **kwargs):
+    options = dict(timeout=2.0, deadline=5.0, retries=3, backoff=0.01, max_backoff=0.05,
+                   rate_limit=0, hedge_after=0, pool_size=2)
+    options.update(kwargs)
+    return ResilientModel(GeminiRestModel("gemini-test", api_key="test", base_url=server.url), **options)
+
+
+@pytest.mark.parametrize("status", [429, 503])
+def test_transient_errors_retried(status):
+    with StubGeminiServer(fail_first=2, error_status=status) as server:
+        response = client(server).generate_content("Soru: savas nedir?")
+    assert "savas nedir?" in response.text
+    assert server.requests == 3
+
+
+def test_client_error_not_retried():
+    with StubGeminiServer(fail_first=1, error_status=400) as server:
+        with pytest.raises(GeminiHTTPError) as error:
+            client(server).generate_content("Soru: savas nedir?")
+    assert error.value.status == 400
+    assert server.requests == 1
+
+
+def test_slow_response_hedged():
+    with StubGeminiServer(slow_first=1, slow_delay=1.0) as server:
+        start = time.monotonic()
+        response = client(server, hedge_after=0.1).generate_content("Soru: savas nedir?")
+        elapsed = time.monotonic() - start
+    assert "savas nedir?" in response.text
+    assert elapsed < 0.8
+    assert server.requests == 2
+
+
+def test_deadline_exceeded():
+    with StubGeminiServer(delay=1.0) as server:
+        start = time.monotonic()
+        with pytest.raises(LLMTimeoutError):
+            client(server, timeout=0.2, deadline=0.5).generate_content("Soru: savas nedir?")
+        assert time.monotonic() - start < 0.9
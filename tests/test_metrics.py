@@ -0,0 +1,47 @@
+import pytest
+
+from metrics import MetricsRegistry, Trace, count_error
+
+
+def test_trace_current_stage():
+    trace = Trace(MetricsRegistry())
+    assert trace.current is None
+    with trace.span("encode"):
+        assert trace.current == "encode"
+    trace["context_tokens"] = 120  # aşama olmayan anahtarlar current'ı etkilemez
+    assert trace.current is None
+
+    with pytest.raises(RuntimeError):
+        with trace.span("search"):
+            raise RuntimeError("store kapali")
+    # Hatalı aşama kaydedilir ve current'ta kalır
+    assert trace.current == "search"
+    assert "search" in trace
+
+
+def test_count_error_labels_failed_stage():
+    registry = MetricsRegistry()
+    trace = Trace(registry)
+    try:
+        with trace.span("encode"):
+            pass
+        trace["history_tokens"] = 0
+        with trace.span("prompt"):
+            raise ValueError("sablon")
+    except ValueError:
+        count_error(trace.current or "other", registry)
+    assert registry.counter_values("rag_errors_total") == {(("stage", "prompt"),): 1}
+
+
+def test_stream_response_failure_leaves_failed_stage():
+    from streaming import stream_response
+    from vector_store import NumpyVectorStore
+
+    class BrokenEmbedder:
+        def encode(self, *args, **kwargs):
+            raise RuntimeError("model yuklenemedi")
+
+    timings = Trace(MetricsRegistry())
+    with pytest.raises(RuntimeError):
+        stream_response(None, BrokenEmbedder(), NumpyVectorStore(), "Bozuk embedder ile sorgu", timings)
+    assert timings.current == "encode"
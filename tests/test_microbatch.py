@@ -0,0 +1,63 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from microbatch import MicroBatcher
+from stubs import HashEmbedder
+
+
+class RecordingEmbedder(HashEmbedder):
+    def __init__(self, fail_on=None):
+        super().__init__()
+        self.batches = []
+        self.fail_on = fail_on
+
+    def encode(self, sentences, **kwargs):
+        if not isinstance(sentences, str):
+            self.batches.append(len(sentences))
+            if self.fail_on in sentences:
+                raise RuntimeError("encode hatasi")
+        return super().encode(sentences, **kwargs)
+
+
+def test_concurrent_queries_batched_in_order():
+    embedder = RecordingEmbedder()
+    batcher = MicroBatcher(embedder, max_batch_size=8, max_wait_ms=50)
+    texts = [f"soru {i} savaş" for i in range(16)]
+    try:
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            vectors = list(pool.map(batcher.encode, texts))
+    finally:
+        batcher.close()
+    # Her çağıran kendi metninin vektörünü alır
+    for text, vector in zip(texts, vectors):
+        assert np.allclose(vector, HashEmbedder().encode(text))
+    assert max(embedder.batches) > 1
+    assert max(embedder.batches) <= 8
+    assert batcher.stats()["items"] == len(texts)
+
+
+def test_errors_reach_every_caller_in_batch():
+    embedder = RecordingEmbedder(fail_on="bozuk")
+    batcher = MicroBatcher(embedder, max_batch_size=2, max_wait_ms=500)
+    try:
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            futures = [pool.submit(batcher.encode, text) for text in ("bozuk", "sağlam")]
+            for future in futures:
+                with pytest.raises(RuntimeError):
+                    future.result()
+        # Hatadan sonra batcher çalışmaya devam eder
+        assert batcher.encode("sağlam").shape == (embedder.dim,)
+    finally:
+        batcher.close()
+
+
+def test_list_calls_bypass_queue():
+    embedder = RecordingEmbedder()
+    batcher = MicroBatcher(embedder)
+    try:
+        assert batcher.encode(["a", "b", "c"]).shape == (3, embedder.dim)
+        assert batcher.stats()["batches"] == 0
+    finally:
+        batcher.close()
@@ -0,0 +1,41 @@
+import os
+
+import pytest
+
+pytest.importorskip("onnxruntime")
+pytest.importorskip("transformers")
+sentence_transformers = pytest.importorskip("sentence_transformers")
+
+from onnx_embed import OnnxEmbedder, cosine_agreement  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# conftest hash arka ucunu seçtiğinden model adı config'ten alınmaz
+MODEL = os.getenv("ONNX_TEST_MODEL", "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2")
+
+# Kosinüs benzerliği alt sınırları (metin başına en düşük değer). int8 dinamik
+# kuantizasyon ağırlıkları yuvarladığından fp32'den gevşektir.
+MIN_COSINE_FP32 = 0.99
+MIN_COSINE_INT8 = 0.95
+
+
+@pytest.fixture(scope="module")
+def texts():
+    with open(os.path.join(ROOT, "sun_tzu.txt"), "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if len(line.strip()) > 10]
+
+
+@pytest.fixture(scope="module")
+def reference(texts):
+    try:
+        model = sentence_transformers.SentenceTransformer(MODEL, device="cpu")
+    except Exception as e:  # Model indirilemiyor (çevrimdışı ortam)
+        pytest.skip(f"{MODEL} yuklenemedi: {e}")
+    return model.encode(texts, show_progress_bar=False)
+
+
+@pytest.mark.parametrize("quantize, min_cosine", [(False, MIN_COSINE_FP32), (True, MIN_COSINE_INT8)],
+                         ids=["fp32", "int8"])
+def test_onnx_matches_pytorch(texts, reference, quantize, min_cosine):
+    embedder = OnnxEmbedder(MODEL, quantize=quantize)
+    agreement = cosine_agreement(reference, embedder.encode(texts))
+    assert agreement.min() >= min_cosine, f"kosinus ortalama {agreement.mean():.5f}, en dusuk {agreement.min():.5f}"
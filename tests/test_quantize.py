@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from quantize import dequantize, quantize
+from vector_store import NumpyVectorStore
+
+K = 10
+
+
+@pytest.fixture(scope="module")
+def data():
+    """
+    Kümelenmiş, normalize edilmemiş vektörler ve index'te olmayan sorgular
+    """
+    rng = np.random.default_rng(1)
+    centers = rng.standard_normal((30, 64))
+    points = centers[rng.integers(0, 30, 3050)] + 0.5 * rng.standard_normal((3050, 64))
+    points *= rng.uniform(0.5, 2.0, (3050, 1))
+    return points[:3000].astype(np.float32), points[3000:].astype(np.float32)
+
+
+def search(vectors, queries, **options):
+    store = NumpyVectorStore(space="cosine", **options)
+    store.add(ids=[str(i) for i in range(len(vectors))], embeddings=vectors)
+    return store.query(query_embeddings=queries, n_results=K, include=[])["ids"]
+
+
+def recall(expected, found):
+    return np.mean([len(set(e) & set(f)) / K for e, f in zip(expected, found)])
+
+
+def test_int8_roundtrip_error_bounded():
+    vectors = np.random.default_rng(0).standard_normal((100, 32)).astype(np.float32)
+    codes, scales = quantize(vectors, "int8")
+    assert codes.dtype == np.int8
+    # Vektör başına ölçek: hata en fazla yarım adım (max|x| / 254)
+    error = np.abs(dequantize(codes, scales) - vectors).max(axis=1)
+    assert np.all(error <= np.abs(vectors).max(axis=1) / 254 + 1e-6)
+
+
+@pytest.mark.parametrize("dtype, rescore, min_recall", [
+    ("float16", False, 0.99),
+    ("int8", False, 0.95),
+    ("int8", True, 0.99),
+])
+def test_quantized_recall(data, dtype, rescore, min_recall):
+    vectors, queries = data
+    exact = search(vectors, queries, dtype="float32")
+    assert recall(exact, search(vectors, queries, dtype=dtype, rescore=rescore)) >= min_recall
+
+
+def test_rescore_does_not_lower_recall(data):
+    vectors, queries = data
+    exact = search(vectors, queries, dtype="float32")
+    plain = recall(exact, search(vectors, queries, dtype="int8", rescore=False))
+    assert recall(exact, search(vectors, queries, dtype="int8", rescore=True)) >= plain
@@ -0,0 +1,37 @@
+import numpy as np
+
+from query_cache import QueryEmbeddingCache, encode_query
+from stubs import HashEmbedder
+
+
+def test_lru_eviction():
+    cache = QueryEmbeddingCache(max_size=2)
+    cache.put("a", np.zeros(2))
+    cache.put("b", np.ones(2))
+    assert cache.get("a") is not None  # "a" en son kullanılan olur
+    cache.put("c", np.ones(2))
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_persists_and_ignores_other_model(tmp_path):
+    path = str(tmp_path / "queries.npz")
+    cache = QueryEmbeddingCache(max_size=2, persist_path=path, model_name="m1")
+    for key in ("a", "b", "c"):
+        cache.put(key, np.full(2, ord(key), dtype=np.float32))
+    cache.save()
+
+    reloaded = QueryEmbeddingCache(max_size=2, persist_path=path, model_name="m1")
+    assert reloaded.get("a") is None
+    assert reloaded.get("c").tolist() == [ord("c")] * 2
+    assert QueryEmbeddingCache(persist_path=path, model_name="m2").stats()["size"] == 0
+
+
+def test_encode_query_normalizes_key():
+    cache = QueryEmbeddingCache()
+    embedder = HashEmbedder()
+    first = encode_query(embedder, "Savaş  nedir?", cache)
+    second = encode_query(embedder, "savaş nedir?", cache)
+    assert np.array_equal(first, second)
+    assert cache.stats()["hits"] == 1
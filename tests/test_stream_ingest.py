@@ -0,0 +1,90 @@
+import json
+import os
+
+import pytest
+
+from stream_ingest import ingest_dataset
+from stubs import HashEmbedder
+from vector_store import NumpyVectorStore
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE = os.path.join(ROOT, "notebooks", "sun_tzu_sample.jsonl")
+
+
+class CountingEmbedder(HashEmbedder):
+    def __init__(self):
+        super().__init__()
+        self.encoded = 0
+
+    def encode(self, sentences, **kwargs):
+        if not isinstance(sentences, str):
+            self.encoded += len(sentences)
+        return super().encode(sentences, **kwargs)
+
+
+class FailingStore(NumpyVectorStore):
+    """
+    `fail_after` yazımdan sonra kesinti taklidi yapan store
+    """
+
+    def __init__(self, fail_after):
+        super().__init__()
+        self.fail_after = fail_after
+        self.writes = 0
+
+    def upsert(self, **kwargs):
+        if self.writes == self.fail_after:
+            raise KeyboardInterrupt
+        self.writes += 1
+        super().upsert(**kwargs)
+
+
+def test_resume_from_checkpoint_then_noop_rerun(tmp_path):
+    paths = {"checkpoint_path": str(tmp_path / "checkpoint.json"),
+             "manifest_path": str(tmp_path / "manifest.json")}
+    options = dict(paths, write_chunk_size=2, checkpoint_every=1)
+    store = FailingStore(fail_after=2)
+
+    with pytest.raises(KeyboardInterrupt):
+        ingest_dataset(store, CountingEmbedder(), SAMPLE, **options)
+    written = store.count()
+    assert written == 4
+    with open(paths["checkpoint_path"], "r", encoding="utf-8") as f:
+        assert json.load(f)["position"] > 0
+
+    store.fail_after = None
+    embedder = CountingEmbedder()
+    stats = ingest_dataset(store, embedder, SAMPLE, **options)
+    total = store.count()
+    # Checkpoint'e kadar olan parçalar yeniden encode edilmez
+    assert embedder.encoded == stats["added"] == total - written
+    assert stats["resumed_from"] > 0
+    assert not os.path.exists(paths["checkpoint_path"])
+
+    embedder = CountingEmbedder()
+    stats = ingest_dataset(store, embedder, SAMPLE, **options)
+    assert (stats["added"], stats["removed"], stats["unchanged"]) == (0, 0, 13)
+    assert embedder.encoded == 0
+    assert store.count() == total == 13
+
+
+def test_resume_rewrites_chunks_missing_from_store(tmp_path):
+    paths = {"checkpoint_path": str(tmp_path / "checkpoint.json"),
+             "manifest_path": str(tmp_path / "manifest.json")}
+    options = dict(paths, write_chunk_size=2, checkpoint_every=1)
+    store = FailingStore(fail_after=2)
+
+    with pytest.raises(KeyboardInterrupt):
+        ingest_dataset(store, CountingEmbedder(), SAMPLE, **options)
+    # Checkpoint yazıldı ama yazımlar kalıcı hale gelmeden kayboldu
+    lost = store.get(include=[])["ids"]
+    store.delete(ids=lost[:3])
+
+    store.fail_after = None
+    embedder = CountingEmbedder()
+    stats = ingest_dataset(store, embedder, SAMPLE, **options)
+    assert stats["resumed_from"] > 0
+    assert set(lost) <= set(store.get(include=[])["ids"])
+    assert store.count() == 13
+    assert embedder.encoded == stats["added"] == 13 - 1
+    assert stats["unchanged"] == 1
@@ -0,0 +1,31 @@
+import numpy as np
+
+from tune_hnsw import choose, exact_neighbors, split_queries, synthetic_vectors
+
+
+def row(space, search_ef, recall, p50):
+    return {"space": space, "M": 16, "construction_ef": 100, "search_ef": search_ef,
+            "recall_at_k": recall, "p50_ms": p50, "build_seconds": 1.0}
+
+
+RESULTS = [row("cosine", 10, 0.90, 0.3), row("cosine", 40, 0.99, 0.5), row("l2", 10, 0.99, 0.2)]
+
+
+def test_choose_keeps_configured_space():
+    assert choose(RESULTS, 0.95, space="cosine")["search_ef"] == 40
+    assert choose(RESULTS, 0.95, space="ip") is None
+
+
+def test_choose_any_space_when_allowed():
+    assert choose(RESULTS, 0.95)["space"] == "l2"
+    # Eşiğe ulaşan yoksa recall'u en yüksek olan
+    assert choose(RESULTS, 0.999)["recall_at_k"] == 0.99
+
+
+def test_exact_neighbors_differ_by_space():
+    vectors, queries = split_queries(synthetic_vectors(1000, 16, seed=0), 20)
+    cosine = exact_neighbors(vectors, queries, "cosine", 5)
+    l2 = exact_neighbors(vectors, queries, "l2", 5)
+    assert np.shape(cosine) == (len(queries), 5)
+    # Normalize edilmemiş vektörlerde mesafe tipi komşuları değiştirir
+    assert cosine != l2
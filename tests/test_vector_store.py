@@ -0,0 +1,91 @@
+import os
+
+import numpy as np
+import pytest
+
+import startup
+from stubs import HashEmbedder
+from vector_store import FaissVectorStore, NumpyVectorStore, hnsw_config, hnsw_metadata, open_vector_store
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class FakeCollection:
+    def __init__(self, name, metadata):
+        self.name = name
+        self.metadata = dict(metadata)
+        self.configuration = None
+        self.modified = []
+
+    def modify(self, configuration=None, **kwargs):
+        self.modified.append(configuration)
+
+
+class FakeClient:
+    """
+    Var olan koleksiyona verilen metadata'yı (eski Chroma sürümleri gibi) saklanan ayarların üzerine yazar
+    """
+
+    def __init__(self):
+        self.collections = {}
+
+    def get_collection(self, name):
+        if name not in self.collections:
+            raise ValueError(f"Collection {name} does not exist.")
+        return self.collections[name]
+
+    def get_or_create_collection(self, name, metadata=None):
+        if name in self.collections:
+            self.collections[name].metadata.update(metadata or {})
+        else:
+            self.collections[name] = FakeCollection(name, metadata or {})
+        return self.collections[name]
+
+
+def test_existing_collection_keeps_stored_hnsw_settings(monkeypatch, capsys):
+    client = FakeClient()
+    monkeypatch.setattr(startup, "get_chroma_client", lambda path: client)
+    config = hnsw_config()
+    stored = dict(config, M=config["M"] * 2, construction_ef=config["construction_ef"] + 1)
+    client.collections["docs"] = FakeCollection("docs", hnsw_metadata(stored))
+
+    collection = open_vector_store("chroma", name="docs")
+
+    assert collection.metadata == hnsw_metadata(stored)
+    assert "farkli HNSW ayarlariyla" in capsys.readouterr().out
+
+
+def test_new_collection_created_with_config(monkeypatch, capsys):
+    client = FakeClient()
+    monkeypatch.setattr(startup, "get_chroma_client", lambda path: client)
+
+    collection = open_vector_store("chroma", name="docs")
+
+    assert collection.metadata == hnsw_metadata(hnsw_config())
+    assert "Uyari" not in capsys.readouterr().out
+
+
+@pytest.mark.parametrize("space", ["l2", "ip", "cosine"])
+def test_faiss_flat_matches_numpy(space):
+    pytest.importorskip("faiss")
+    with open(os.path.join(ROOT, "sun_tzu.txt"), "r", encoding="utf-8") as f:
+        texts = [line.strip() for line in f if len(line.strip()) > 10]
+    embedder = HashEmbedder()
+    # Hash vektörleri tam sayı bileşenli olduğundan eşit uzaklıklar sık görülür ve
+    # eşitlikte sıra tanımsızdır; küçük gürültü eşitlikleri kaldırır, rastgele
+    # ölçek normalize edilmemiş (ip ile cosine'in farklı sıraladığı) vektörler verir
+    rng = np.random.default_rng(0)
+    noise = rng.normal(0, 0.01, (len(texts), embedder.dim))
+    vectors = ((embedder.encode(texts) + noise) * rng.uniform(0.5, 2.0, (len(texts), 1))).astype(np.float32)
+    ids = [str(i) for i in range(len(texts))]
+    queries = embedder.encode(["savaş stratejisi", "düşmanı tanı", "komutan ve asker"])
+
+    exact = NumpyVectorStore(space=space, dtype="float32")
+    flat = FaissVectorStore(space=space, index_type="flat")
+    for store in (exact, flat):
+        store.add(ids=ids, embeddings=vectors, documents=texts)
+
+    expected = exact.query(query_embeddings=queries, n_results=5, include=["distances"])
+    found = flat.query(query_embeddings=queries, n_results=5, include=["distances"])
+    assert found["ids"] == expected["ids"]
+    np.testing.assert_allclose(found["distances"], expected["distances"], rtol=1e-5, atol=1e-5)
@@ -6,11 +6,31 @@ Sun Tzu'nun Savaş Sanatı öğretilerine dayalı akıllı sohbet asistanı
 import streamlit as st
 import os
 from dotenv import load_dotenv
-import google.generativeai as genai
-import chromadb
-from sentence_transformers import SentenceTransformer
+import sys
+import threading
 import time
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+# Ağır kütüphaneler (chromadb, sentence_transformers, google.generativeai)
+# startup modülü üzerinden ilk kullanımda import edilir
+from config import WARMUP_EMBEDDER, STREAM_RESPONSES, EXAMPLE_QUESTIONS, PRECOMPUTE_EXAMPLES
+from chunker import iter_file_chunks
+from ingest import sync_collection
+from embedding_cache import cached_embedder
+from query_cache import default_cache as query_cache, encode_query
+from answer_cache import default_cache as answer_cache
+from prompt import build_prompt
+from context_builder import retrieve_context
+from chat_session import new_session, record_prompt_tokens, format_turn_tokens
+from example_answers import ExampleAnswers
+from lexical import use_lexical_fast_path
+from streaming import stream_response
+from llm_client import create_gemini_model
+from metrics import Trace, STAGES, count_error, default_registry as metrics
+from startup import StartupTimer, configure_gemini, resolve_model_name, load_embedder, warm_up
+from vector_store import open_vector_store
+
 # Sayfa yapılandırması
 st.set_page_config(
     page_title="Sun Tzu Chatbot", 
@@ -24,6 +44,8 @@ def load_rag_components():
     """
     RAG bileşenlerini yükler ve cache'ler
     """
+    timer = StartupTimer()
+    
     # Ortam değişkenlerini yükle
     load_dotenv()
     api_key = os.getenv("GOOGLE_API_KEY")
@@ -31,124 +53,134 @@ def load_rag_components():
     # API key kontrolü
     if not api_key:
         st.error("GOOGLE_API_KEY bulunamadı! Lütfen .env dosyasında API key'inizi ayarlayın.")
-        return None, None, None, None
-    
-    if not api_key:
-        st.error("GOOGLE_API_KEY bulunamadı! .env dosyasını kontrol edin.")
-        return None, None, None, None
+        return None, None, None, None, None, timer
     
     # Gemini yapılandırması
-    genai.configure(api_key=api_key)
+    with timer.step("gemini import"):
+        genai = configure_gemini(api_key)
     
-    # Model kontrolü ve seçimi
-    try:
-        models = genai.list_models()
-        available_models = [m.name for m in models if 'generateContent' in m.supported_generation_methods]
-        
-        # En uygun modeli seç
-        if "models/gemini-1.5-flash-latest" in available_models:
-            MODEL_NAME = "gemini-1.5-flash-latest"
-        elif "models/gemini-1.5-flash" in available_models:
-            MODEL_NAME = "gemini-1.5-flash"
-        elif "models/gemini-flash-latest" in available_models:
-            MODEL_NAME = "gemini-flash-latest"
-        else:
-            MODEL_NAME = available_models[0] if available_models else "gemini-1.5-flash-latest"
-            
-        print(f"Seçilen model: {MODEL_NAME}")
-    except Exception as e:
-        print(f"Model listesi alınamadı: {e}")
-        MODEL_NAME = "gemini-1.5-flash-latest"
-    embedder = SentenceTransformer("sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2")
+    # Model seçimi (diskteki cache'ten, list_models() başlangıcı bloklamaz)
+    with timer.step("model seçimi"):
+        MODEL_NAME = resolve_model_name(genai)
+    print(f"Seçilen model: {MODEL_NAME}")
     
-    # ChromaDB bağlantısı (kalıcı veritabanı)
-    chroma_client = chromadb.PersistentClient(path="./chroma_db")
+    with timer.step("embedder"):
+        embedder = load_embedder()
     
-    try:
-        collection = chroma_client.get_collection("sun_tzu_collection")
-    except:
-        st.warning("ChromaDB koleksiyonu bulunamadı, yeniden oluşturuluyor...")
+    # İlk sorgunun tokenizer/forward pass ısınmasını başlangıçta öde
+    if WARMUP_EMBEDDER:
+        with timer.step("ısınma"):
+            warm_up(embedder)
+    
+    # Vector store bağlantısı (varsayılan: kalıcı ChromaDB)
+    with timer.step("vector store"):
+        collection = open_vector_store()
+    
+    if collection.count() == 0:
+        st.warning("Koleksiyon bulunamadı, yeniden oluşturuluyor...")
         
         # Embedding'i yeniden oluştur
         try:
             # Farklı dosya yollarını dene
             file_paths = ["sun_tzu.txt", "data/sun_tzu.txt", "./sun_tzu.txt", "./data/sun_tzu.txt"]
-            texts = []
+            file_path = next((p for p in file_paths if os.path.exists(p)), None)
             
-            for file_path in file_paths:
-                try:
-                    with open(file_path, "r", encoding="utf-8") as f:
-                        texts = [t.strip() for t in f.readlines() if t.strip() and len(t.strip()) > 10]
-                        st.success(f"Dosya bulundu: {file_path}")
-                        break
-                except FileNotFoundError:
-                    continue
-            
-            if not texts:
+            if file_path is None:
                 st.error("sun_tzu.txt dosyası bulunamadı! Lütfen dosyayı root dizinine ekleyin.")
-                return None, None, None, None
-            
-            collection = chroma_client.create_collection(name="sun_tzu_collection")
+                return None, None, None, None, None, timer
+            st.success(f"Dosya bulundu: {file_path}")
             
-            # Embedding'leri oluştur
-            progress_bar = st.progress(0)
+            # Dosya akış olarak parçalanır; toplam parça sayısı önceden bilinmez
             status_text = st.empty()
             
-            for i, text in enumerate(texts):
-                emb = embedder.encode(text).tolist()
-                collection.add(
-                    ids=[str(i)],
-                    embeddings=[emb],
-                    documents=[text]
-                )
-                
-                # Progress bar güncelle
-                progress = (i + 1) / len(texts)
-                progress_bar.progress(progress)
-                status_text.text(f"Embedding oluşturuluyor... {i+1}/{len(texts)}")
+            def report(done, total):
+                status_text.text(f"Embedding oluşturuluyor... {done} parça")
+            
+            with timer.step("indeksleme"):
+                sync_collection(collection, cached_embedder(embedder), iter_file_chunks(file_path),
+                                progress_callback=report)
             
-            progress_bar.empty()
             status_text.empty()
             
         except Exception as e:
             st.error(f"Embedding oluşturulamadı: {str(e)}")
-            return None, None, None, None
+            return None, None, None, None, None, timer
+    
+    # Gemini modeli (süre sınırı, tekrar deneme ve hız sınırlama katmanıyla)
+    model = create_gemini_model(genai, MODEL_NAME, api_key)
     
-    # Gemini modeli
-    model = genai.GenerativeModel(MODEL_NAME)
+    # Örnek soruların cevapları indeksin yanında saklanır; koleksiyon, prompt veya
+    # model değiştiyse eksikler başlangıcı bekletmeden arka planda üretilir
+    examples = ExampleAnswers.for_model(model)
+    if PRECOMPUTE_EXAMPLES and examples.missing():
+        threading.Thread(target=examples.precompute, args=(model, embedder, collection),
+                         name="example-answers", daemon=True).start()
     
-    return model, embedder, collection, MODEL_NAME
+    print(timer.format())
+    return model, embedder, collection, examples, MODEL_NAME, timer
 
-def get_response(model, embedder, collection, query):
+def get_response(model, embedder, collection, query, trace=None, session=None):
     """
-    RAG pipeline ile cevap üretir
+    RAG pipeline ile cevap üretir; aşama süreleri `trace`'e yazılır.
+    `session` verilirse arama bağımsız soruyla yapılır ve tur oturuma kaydedilir.
     """
+    trace = Trace() if trace is None else trace
     try:
+        # Takip sorularında arama, geçmişe bakmadan anlaşılabilen soruyla yapılır
+        search_query, history = query, None
+        if session is not None and session.has_history():
+            with trace.span("condense"):
+                search_query = session.standalone_question(query)
+                history = session.history_text()
+        
+        # Anahtar kelime sorgularında (hybrid mod) embedder atlanır
+        query_emb = None
+        if not use_lexical_fast_path(collection, search_query):
+            with trace.span("encode"):
+                query_emb = encode_query(embedder, search_query)
+        
+        # Çok benzer bir soru daha önce cevaplandıysa Gemini'yi atla (geçmişli sorular hariç)
+        use_cache = answer_cache is not None and history is None and query_emb is not None
+        if use_cache:
+            cached = answer_cache.lookup(query, query_emb)
+            if cached is not None:
+                trace["cached"] = True
+                if session is not None:
+                    session.add_turn(query, cached[0])
+                return cached
+        
         # Retriever kısmı
-        query_emb = embedder.encode(query).tolist()
-        results = collection.query(query_embeddings=[query_emb], n_results=3)
-        context = "\n\n".join(results["documents"][0])
+        if query_emb is not None:
+            query_emb = query_emb.tolist()
+        tokenizer = getattr(embedder, "tokenizer", None)
+        with trace.span("search"):
+            built = retrieve_context(collection, query_emb, tokenizer, query=search_query)
+            context = built["context"]
+        trace["context_tokens"] = built["tokens"]
+        trace["tokens_saved"] = built["tokens_saved"]
         
         # Prompt oluştur
-        prompt = f"""
-Sen Sun Tzu'nun Savaş Sanatı konusunda uzman bir asistan olarak görev yapıyorsun. 
-Aşağıdaki bağlamda (context) Sun Tzu'nun öğretileri yer almaktadır.
-
-Bağlam:
-{context}
-
-Soru: {query}
-
-Lütfen bu bağlamdaki bilgilere dayanarak kısa ve anlaşılır bir yanıt ver. 
-Sun Tzu'nun öğretilerini kullanarak pratik öneriler sun.
-Eğer bağlamda doğrudan bilgi yoksa, benzer konulardaki öğretileri kullanarak yanıt ver.
-"""
+        with trace.span("prompt"):
+            prompt = build_prompt(context, query, history)
+        record_prompt_tokens(trace, prompt, history, tokenizer)
         
         # Gemini API çağrısı
-        response = model.generate_content(prompt)
+        try:
+            with trace.span("generation"):
+                response = model.generate_content(prompt)
+        except Exception as e:
+            count_error("llm")
+            return f"Üzgünüm, bir hata oluştu: {str(e)}", ""
+        if use_cache:
+            answer_cache.store(query, query_emb, response.text, context)
+        if session is not None:
+            session.add_turn(query, response.text, prompt=trace["prompt_tokens"],
+                             history=trace["history_tokens"], context=built["tokens"])
         return response.text, context
         
     except Exception as e:
+        # Hata bir aşamanın içindeyse o aşama, aşamalar arasındaysa "other" olarak sayılır
+        count_error(trace.current or "other")
         return f"Üzgünüm, bir hata oluştu: {str(e)}", ""
 
 def main():
@@ -171,65 +203,148 @@ def main():
         **Teknoloji Stack:**
         - 🤖 Gemini 1.5 Flash (LLM)
         - 🧠 Sentence Transformers (Embedding)
-        - 🗄️ ChromaDB (Vector Database)
+        - 🗄️ ChromaDB / NumPy / FAISS (Vector Database)
         - 🚀 Streamlit (Web Arayüzü)
         """)
         
         st.header("💡 Örnek Sorular")
-        example_questions = [
-            "Savaşta strateji nasıl belirlenir?",
-            "Düşman nasıl yenilir?",
-            "Ordunun moralini nasıl yükseltirsin?",
-            "Kaynakları nasıl yönetirsin?",
-            "Liderlik nasıl olmalıdır?",
-            "Ne zaman savaşmamak gerekir?"
-        ]
-        
-        for question in example_questions:
+        # Tıklanan soru aynı çalıştırmada cevaplanır (ek st.rerun() gerekmez)
+        clicked = None
+        for question in EXAMPLE_QUESTIONS:
             if st.button(f"❓ {question}", key=f"example_{question}"):
-                st.session_state.user_input = question
-                st.rerun()
+                clicked = question
     
     # RAG bileşenlerini yükle
     with st.spinner("RAG sistemi yükleniyor..."):
-        model, embedder, collection, model_name = load_rag_components()
+        model, embedder, collection, examples, model_name, startup_timer = load_rag_components()
     
     if not all([model, embedder, collection]):
         st.error("RAG sistemi yüklenemedi! Lütfen konsol çıktısını kontrol edin.")
         return
     
-    # Kullanıcı girdisi
-    st.markdown("### 💬 Soru Sor")
+    with st.sidebar:
+        with st.expander("⏱️ Başlangıç süreleri"):
+            st.caption(f"Model: {model_name}")
+            for step_name, seconds in startup_timer.steps:
+                st.text(f"{step_name}: {seconds:.2f} sn")
+            st.text(f"Toplam: {startup_timer.total():.2f} sn")
     
-    # Örnek soru butonundan gelen değer
-    default_value = st.session_state.get('user_input', '')
-    if default_value:
-        st.session_state.user_input = ''  # Reset
+    # Oturum başına sohbet geçmişi: son turlar olduğu gibi, eskileri özet olarak prompt'a girer
+    if "chat" not in st.session_state:
+        st.session_state.chat = new_session(model, getattr(embedder, "tokenizer", None))
+    chat = st.session_state.chat
     
-    query = st.text_input(
-        "Sun Tzu'nun öğretileri hakkında bir soru sorun:",
-        value=default_value,
-        placeholder="Örn: Savaşta strateji nasıl belirlenir?",
-        help="Savaş stratejisi, liderlik, taktik veya stratejik düşünce konularında soru sorabilirsiniz."
-    )
+    with st.sidebar:
+        if st.button("🗑️ Sohbeti temizle", disabled=not len(chat)):
+            chat.clear()
+            st.rerun()
+    
+    # Önceki turlar
+    for number, turn in enumerate(chat.transcript, 1):
+        with st.chat_message("user"):
+            st.markdown(turn["question"])
+        with st.chat_message("assistant"):
+            st.markdown(turn["answer"])
+            st.caption(format_turn_tokens(turn, number))
     
+    # Kullanıcı girdisi (örnek soru butonundan gelen değer önceliklidir)
+    typed = st.chat_input("Sun Tzu'nun öğretileri hakkında bir soru sorun (örn: Savaşta strateji nasıl belirlenir?)")
+    query = clicked or typed
     if query:
-        with st.spinner("Düşünüyorum..."):
-            # RAG pipeline ile cevap üret
-            response, context = get_response(model, embedder, collection, query)
-        
-        # Yanıtı göster
-        st.markdown("### 🎯 Cevap")
-        st.markdown(response)
-        
-        # Kaynakları göster (genişletilebilir)
-        if context:
+        with st.chat_message("user"):
+            st.markdown(query)
+    
+    # Örnek sorular önceden hesaplanmış cevaptan anında gösterilir
+    precomputed = examples.get(query) if clicked else None
+    if precomputed is not None:
+        response, context = precomputed
+        chat.add_turn(query, response)
+        with st.chat_message("assistant"):
+            st.markdown(response)
             with st.expander("📚 Kullanılan Kaynak Metinler"):
                 st.text_area("Bağlam:", context, height=200, disabled=True)
+            st.caption("⚡ Önceden hazırlanmış örnek cevap")
+    
+    elif query and STREAM_RESPONSES:
+        timings = Trace()
+        with st.chat_message("assistant"):
+            try:
+                with st.spinner("İlgili metinler aranıyor..."):
+                    context, chunks = stream_response(
+                        model, embedder, collection, query, timings,
+                        error_message="Üzgünüm, bir hata oluştu. Lütfen tekrar deneyin.",
+                        session=chat,
+                    )
+            except Exception as e:
+                # Üretimdeki hatalar generator içinde "llm" olarak sayılır; bunlar retrieval hatalarıdır
+                count_error(timings.current or "other")
+                st.error(f"Üzgünüm, bir hata oluştu: {str(e)}")
+                context, chunks = "", None
             
-            # Performans bilgisi
-            st.markdown("---")
-            st.markdown("**💡 Bu cevap Sun Tzu'nun Savaş Sanatı eserinden alınan metinler temel alınarak üretilmiştir.**")
+            # Kaynakları üretim başlamadan göster
+            if context:
+                with st.expander("📚 Kullanılan Kaynak Metinler"):
+                    st.text_area("Bağlam:", context, height=200, disabled=True)
+            
+            # Yanıtı geldikçe göster
+            if chunks is not None:
+                start = time.perf_counter()
+                st.write_stream(chunks)
+                # Akış süresinden üretim süresi çıkarılınca arayüzün payı kalır
+                timings.record("render", max(time.perf_counter() - start - timings.get("generation", 0.0), 0.0))
+                
+                # Performans bilgisi
+                if timings.get("cached"):
+                    st.caption("⚡ Cevap semantik cache'ten geldi")
+                else:
+                    st.caption(
+                        f"⏱️ İlk token: {timings.get('ttft', 0):.2f} sn · "
+                        f"Toplam üretim: {timings.get('generation', 0):.2f} sn"
+                    )
+                st.caption(f"🔍 Aşamalar: {timings.format()}")
+    
+    elif query:
+        trace = Trace()
+        with st.chat_message("assistant"):
+            with st.spinner("Düşünüyorum..."):
+                # RAG pipeline ile cevap üret
+                response, context = get_response(model, embedder, collection, query, trace, session=chat)
+            
+            # Yanıtı göster
+            with trace.span("render"):
+                st.markdown(response)
+            
+            # Kaynakları göster (genişletilebilir)
+            if context:
+                with st.expander("📚 Kullanılan Kaynak Metinler"):
+                    st.text_area("Bağlam:", context, height=200, disabled=True)
+                
+                # Performans bilgisi
+                st.caption("⚡ Cevap semantik cache'ten geldi" if trace.get("cached") else f"🔍 Aşamalar: {trace.format()}")
+    
+    if query:
+        st.markdown("**💡 Cevaplar Sun Tzu'nun Savaş Sanatı eserinden alınan metinler temel alınarak üretilmiştir.**")
+    
+    # Cache istatistikleri (sorgu işlendikten sonra güncel değerlerle)
+    with st.sidebar:
+        with st.expander("📈 Cache istatistikleri"):
+            stats = query_cache.stats()
+            st.text(f"Sorgu embedding: {stats['hits']} hit / {stats['misses']} miss ({stats['hit_rate']:.0%})")
+            st.text(f"Boyut: {stats['size']}/{stats['max_size']}, atılan: {stats['evictions']}")
+            if answer_cache is not None:
+                stats = answer_cache.stats()
+                st.text(f"Cevap: {stats['hits']} hit / {stats['misses']} miss ({stats['hit_rate']:.0%})")
+                st.text(f"Boyut: {stats['size']}/{stats['max_size']}, geçersizleştirme: {stats['invalidations']}")
+        
+        # Bu süreçteki tüm isteklerin aşama ortalamaları ve hata sayıları
+        with st.expander("📊 Aşama süreleri (ortalama)"):
+            stage_stats = {dict(labels)["stage"]: h for labels, h in metrics.histogram_stats("rag_stage_seconds").items()}
+            for stage in STAGES:
+                if stage in stage_stats and stage_stats[stage]["count"]:
+                    h = stage_stats[stage]
+                    st.text(f"{stage}: {h['sum'] / h['count'] * 1000:.0f} ms ({h['count']} istek)")
+            for labels, value in metrics.counter_values("rag_errors_total").items():
+                st.text(f"Hata ({dict(labels)['stage']}): {value}")
     
     # Alt bilgi
     st.markdown("---")